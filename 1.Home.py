@@ -1,71 +1,14 @@
 import streamlit as st
 import pandas as pd
 
+from analise.estilo import aplicar_estilo
+from analise.imagens import miniatura
+
 # --- Configuração da página ---
 st.set_page_config(page_title="Dashboard: Qualidade da Água", layout="wide")
 
-# --- Estilo embutido: header oculto e fundo uniforme ---
-st.markdown("""
-<style>
-    header {visibility: hidden;}
-    .viewerBadge_container__1QSob {visibility: hidden;}
-
-    .main .block-container {
-        padding-top: 2rem;
-    }
-
-    body, .main, .block-container {
-        background-color: #f9f7fc !important;
-        color: #3e3553;
-        font-family: 'Segoe UI', sans-serif;
-    }
-
-    section[data-testid="stSidebar"] {
-        background-color: #5e4b8b !important;
-    }
-
-    section[data-testid="stSidebar"] * {
-        color: white !important;
-    }
-
-    h1, h2, h3, h4 {
-        color: #4a3d6a;
-    }
-
-    .stSelectbox > div > div {
-        background-color: white !important;
-        color: #5e4b8b !important;
-    }
-
-    .lavender-box {
-        background-color: #ede6fa;
-        border-left: 6px solid #b89fe6;
-        border-radius: 10px;
-        padding: 1.5rem;
-        margin-bottom: 25px;
-        box-shadow: 0 4px 10px rgba(0,0,0,0.05);
-    }
-
-    .banner {
-        background-color: #5e4b8b;
-        color: white;
-        padding: 1.5rem;
-        text-align: center;
-        font-size: 1.5rem;
-        font-weight: 600;
-        border-radius: 10px;
-        margin-bottom: 40px;
-        letter-spacing: 0.5px;
-    }
-
-    .footer {
-        font-size: 0.9rem;
-        color: #777;
-        text-align: center;
-        margin-top: 40px;
-    }
-</style>
-""", unsafe_allow_html=True)
+# --- Estilo comum: header oculto e fundo uniforme ---
+aplicar_estilo()
 
 # --- Banner de destaque ---
 st.markdown('<div class="banner">💧 Monitoramento de Qualidade da Água - Análise Estatística</div>', unsafe_allow_html=True)
@@ -81,14 +24,15 @@ st.markdown("""
 Em **5 de novembro de 2015**, ocorreu um dos maiores desastres socioambientais da história do Brasil: o **rompimento da barragem de Fundão**, em **Mariana (MG)**. A barragem, de responsabilidade da empresa **Samarco**, uma joint venture da **Vale** e da **BHP Billiton**, armazenava rejeitos da mineração de ferro.
 """)
 
-# Exibe imagem do diretório local (crie uma pasta 'images' e coloque a imagem lá)
+# Exibe imagem do diretório local (crie uma pasta 'images' e coloque a imagem lá),
+# já reduzida para a largura exibida
 col1, col2 = st.columns(2)
 
 with col1:
-    st.image("images/mariana_desastre.jpg", caption="Desastre de Mariana", width=300)
+    st.image(miniatura("images/mariana_desastre.jpg"), caption="Desastre de Mariana", width=300)
 
 with col2:
-    st.image("images/rio_doce_afetado.jpg", caption="Contaminação do Rio Doce", width=300)
+    st.image(miniatura("images/rio_doce_afetado.jpg"), caption="Contaminação do Rio Doce", width=300)
 
 st.markdown("""
 Com o colapso da estrutura, aproximadamente **40 milhões de metros cúbicos** de lama tóxica foram liberados, destruindo o distrito de **Bento Rodrigues**, atingindo comunidades vizinhas e causando **19 mortes**. A onda de rejeitos percorreu mais de **600 km ao longo do Rio Doce**, afetando ecossistemas, o abastecimento de água e meios de subsistência de milhares de pessoas em Minas Gerais e no Espírito Santo.
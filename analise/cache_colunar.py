@@ -0,0 +1,88 @@
+import os
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from analise.dados import RAIZ, ARQUIVO_DADOS, VERSAO_ESQUEMA, normalizar_colunas
+
+# --- Cache colunar (Arrow/Feather) compilado a partir das planilhas ---
+DIRETORIO_CACHE = RAIZ / ".cache"
+ARQUIVO_INSTAGRAM = RAIZ / "Dados_InstagramCliente_AULA_3ESP.xlsx"
+
+# Planilhas conhecidas e a normalização aplicada antes de gravar o cache
+PLANILHAS = {
+    ARQUIVO_DADOS: normalizar_colunas,
+    ARQUIVO_INSTAGRAM: None,
+}
+
+_CHAVE_ORIGEM = b"origem"
+
+
+def _assinatura(origem, normalizar=None):
+    # Inclui a versão do esquema: mudar a normalização também invalida o cache
+    info = os.stat(origem)
+    esquema = VERSAO_ESQUEMA if normalizar is not None else "bruto"
+    return f"{info.st_mtime_ns}:{info.st_size}:{esquema}".encode()
+
+
+def caminho_cache(origem):
+    return DIRETORIO_CACHE / (Path(origem).stem + ".feather")
+
+
+def cache_atualizado(origem, normalizar=None):
+    """Indica se o cache existe e foi gerado a partir da versão atual da planilha."""
+    destino = caminho_cache(origem)
+    if not destino.exists():
+        return False
+    try:
+        metadados = feather.read_table(destino, memory_map=True).schema.metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return False
+    return metadados.get(_CHAVE_ORIGEM) == _assinatura(origem, normalizar)
+
+
+def gravar(df, destino, metadados=None):
+    """Grava `df` em Feather sem compressão, de forma atômica (outras sessões podem estar lendo)."""
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    if metadados:
+        tabela = tabela.replace_schema_metadata({**(tabela.schema.metadata or {}), **metadados})
+
+    destino = Path(destino)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    fd, temporario = tempfile.mkstemp(dir=destino.parent, suffix=".tmp")
+    os.close(fd)
+    try:
+        feather.write_feather(tabela, temporario, compression="uncompressed")
+        os.replace(temporario, destino)
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+
+
+def compilar(origem, normalizar=None, forcar=False):
+    """Converte a planilha para Feather (sem compressão) se ela mudou desde a última vez."""
+    destino = caminho_cache(origem)
+    if not forcar and cache_atualizado(origem, normalizar):
+        return destino
+
+    assinatura = _assinatura(origem, normalizar)
+    df = pd.read_excel(origem)
+    if normalizar is not None:
+        df = normalizar(df)
+
+    gravar(df, destino, {_CHAVE_ORIGEM: assinatura})
+    return destino
+
+
+def ler(origem, normalizar=None):
+    """Lê a planilha a partir do cache colunar mapeado em memória, recompilando se necessário."""
+    destino = compilar(origem, normalizar)
+    return feather.read_table(destino, memory_map=True).to_pandas()
+
+
+if __name__ == "__main__":
+    for planilha, normalizacao in PLANILHAS.items():
+        print(f"{planilha.name} -> {compilar(planilha, normalizacao, forcar=True)}")
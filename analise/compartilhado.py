@@ -0,0 +1,145 @@
+import functools
+import os
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from analise.instrumentacao import marcar_execucao
+
+# --- Resultados compartilhados entre sessões ---
+# Cada resultado é identificado pela função e pelos argumentos, que sempre incluem
+# a versão dos dados. A primeira thread que pede um resultado o calcula e publica
+# um Future; pedidos iguais de qualquer sessão recebem o mesmo Future, mesmo com o
+# cálculo ainda em andamento, de modo que cada resultado é calculado uma vez.
+# Cálculos longos podem ir para o pool de threads (`antecipar`) enquanto a página
+# desenha o que já está pronto, e só são esperados onde o resultado é exibido.
+# Resultados marcados como persistentes também sobrevivem a reinícios do servidor
+# (analise.persistencia).
+WORKERS = max(2, os.cpu_count() or 1)
+
+
+class ResultadosCompartilhados:
+    """Futures por (nome, chave), com LRU por nome e coalescência de pedidos em andamento."""
+
+    def __init__(self, workers=WORKERS):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="resultados")
+        self._futuros = {}
+        self._trava = threading.Lock()
+        self.contadores = Counter()
+
+    def obter(self, nome, chave, funcao, max_itens=64):
+        """(Future, novo): `novo` indica que esta chamada calculou o resultado.
+
+        O cálculo roda na thread de quem pediu primeiro. Só se espera por Futures de
+        cálculos já em execução, nunca por tarefas paradas na fila do pool, o que
+        evita travar o pool com workers esperando uns pelos outros.
+        """
+        with self._trava:
+            itens = self._futuros.setdefault(nome, OrderedDict())
+            futuro = itens.get(chave)
+            if futuro is not None:
+                itens.move_to_end(chave)
+                self.contadores["reaproveitados" if futuro.done() else "coalescidos"] += 1
+                return futuro, False
+            futuro = Future()
+            futuro.set_running_or_notify_cancel()
+            itens[chave] = futuro
+            self.contadores["calculados"] += 1
+            self._descartar_antigos(itens, max_itens)
+
+        try:
+            futuro.set_result(funcao())
+        except BaseException as erro:
+            # Erros não ficam em cache: o próximo pedido tenta de novo
+            with self._trava:
+                if self._futuros[nome].get(chave) is futuro:
+                    del self._futuros[nome][chave]
+                self.contadores["falhas"] += 1
+            futuro.set_exception(erro)
+        return futuro, True
+
+    def _descartar_antigos(self, itens, max_itens):
+        # Só resultados prontos saem do LRU; os em andamento têm sessões esperando
+        for chave in list(itens):
+            if len(itens) <= max_itens:
+                break
+            if itens[chave].done():
+                del itens[chave]
+
+    def executar(self, funcao, *args, **kwargs):
+        """Executa no pool sem guardar o resultado."""
+        return self._pool.submit(funcao, *args, **kwargs)
+
+    def em_andamento(self):
+        with self._trava:
+            return sum(not f.done() for itens in self._futuros.values() for f in itens.values())
+
+    def __len__(self):
+        with self._trava:
+            return sum(len(itens) for itens in self._futuros.values())
+
+
+_resultados = None
+_trava_resultados = threading.Lock()
+
+
+def resultados():
+    """Instância única do processo (todas as sessões do servidor)."""
+    global _resultados
+    with _trava_resultados:
+        if _resultados is None:
+            _resultados = ResultadosCompartilhados()
+        return _resultados
+
+
+def obter(nome, chave, funcao, max_itens=64):
+    """Resultado compartilhado de `funcao()` identificado por (nome, chave)."""
+    futuro, novo = resultados().obter(nome, chave, funcao, max_itens)
+    if novo or not futuro.done():
+        # Para a instrumentação da página: a etapa calculou ou esperou um cálculo
+        marcar_execucao()
+    return futuro.result()
+
+
+def _persistir(nome, args, kwargs, calcular):
+    from analise import persistencia
+
+    caminho, versao, *parametros = args
+    chave = persistencia.chave_dos_dados(caminho, versao, (tuple(parametros), tuple(sorted(kwargs.items()))))
+    return persistencia.memorizar(nome, chave, calcular)
+
+
+def compartilhado(max_itens=64, persistente=False):
+    """Decorador: o resultado da função é calculado uma vez por combinação de argumentos.
+
+    Os argumentos devem ser hasheáveis e identificar o resultado por completo (inclua a
+    versão dos dados). Com `persistente=True` a função deve receber (caminho, versão dos
+    dados, ...) e o resultado também é gravado em disco, sob o hash do conteúdo do arquivo.
+    """
+    def decorador(funcao):
+        nome = f"{funcao.__module__}.{funcao.__qualname__}"
+
+        @functools.wraps(funcao)
+        def chamar(*args, **kwargs):
+            chave = (args, tuple(sorted(kwargs.items())))
+            calcular = functools.partial(funcao, *args, **kwargs)
+            if persistente:
+                calcular = functools.partial(_persistir, nome, args, kwargs, calcular)
+            return obter(nome, chave, calcular, max_itens)
+
+        return chamar
+    return decorador
+
+
+def antecipar(funcao, *args, **kwargs):
+    """Começa `funcao(*args)` no pool e devolve o Future (ex.: carregar resultados que a
+    página só vai exibir mais abaixo, enquanto o topo já é desenhado)."""
+    return resultados().executar(funcao, *args, **kwargs)
+
+
+def esperar(futuro):
+    """Resultado de um Future de `antecipar`; a etapa aberta só conta como acerto de
+    cache se o resultado já estava pronto quando a página precisou dele."""
+    if not futuro.done():
+        marcar_execucao()
+    return futuro.result()
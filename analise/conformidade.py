@@ -0,0 +1,149 @@
+import numpy as np
+import pandas as pd
+
+from analise.compartilhado import compartilhado
+from analise.cubo import NIVEIS
+from analise.dados import ARQUIVO_DADOS, COLUNA_DATA, carregar_dados, versao_dados
+from analise.limites import NORMA_PADRAO, excedencias, versao_limites
+
+# --- Conformidade com os limites: taxas, sequências e contingências ---
+# Tudo é calculado sobre duas matrizes (amostra × parâmetro): a de violações do
+# limite (analise.limites.excedencias) e a de valores medidos. Cada agregação é
+# uma única operação vetorizada para todos os parâmetros da norma.
+ROTULOS_LIMITE = {True: "Acima do limite", False: "Dentro do limite"}
+
+
+class ResultadoConformidade:
+    """Resultado de `avaliar` para uma norma."""
+
+    def __init__(self, norma, taxas, sequencias, contingencias):
+        self.norma = norma
+        self.taxas = taxas                  # {nível: DataFrame longo por grupo e parâmetro}
+        self.sequencias = sequencias        # DataFrame por estação e parâmetro
+        self.contingencias = contingencias  # {parâmetro: Categoria × (acima / dentro)}
+
+    @property
+    def parametros(self):
+        return list(self.contingencias)
+
+    def taxa(self, nivel="Categoria", parametro=None):
+        tabela = self.taxas[nivel]
+        return tabela if parametro is None else tabela[tabela["Parâmetro"] == parametro]
+
+
+def _medidos(df, parametros):
+    return pd.DataFrame(df[parametros].notna().to_numpy(), index=df.index, columns=parametros)
+
+
+def taxas(df, violacoes, chaves=()):
+    """Amostras medidas, violações e taxa por grupo (`chaves`) e parâmetro."""
+    parametros = list(violacoes.columns)
+    por = [df[c] for c in chaves] or [pd.Series(0, index=df.index, name="_todos")]
+    medidos = _medidos(df, parametros).groupby(por, observed=True).sum()
+    acima = violacoes.groupby(por, observed=True).sum()
+    for tabela in (medidos, acima):
+        tabela.columns.name = "Parâmetro"
+
+    resultado = pd.DataFrame({
+        "n medidos": medidos.stack(future_stack=True),
+        "Excedências": acima.stack(future_stack=True),
+    })
+    resultado["Taxa de excedência"] = resultado["Excedências"] / resultado["n medidos"].where(resultado["n medidos"] > 0)
+    resultado = resultado.reset_index()
+    return resultado.drop(columns="_todos") if not chaves else resultado
+
+
+def taxas_de_agregados(estatisticas, chaves=()):
+    """Mesma tabela de `taxas` a partir das estatísticas por grupo de `ingestao.agregar`.
+
+    As excedências dos agregados usam a norma padrão; serve ao modo particionado.
+    """
+    from analise.ingestao import reagrupar
+
+    chaves = list(chaves)
+    tabela = reagrupar(estatisticas.dropna(subset=chaves), chaves)
+    resultado = tabela[chaves + ["Metal", "n", "Excedências"]].rename(
+        columns={"Metal": "Parâmetro", "n": "n medidos"})
+    resultado["Taxa de excedência"] = resultado["Excedências"] / resultado["n medidos"].where(resultado["n medidos"] > 0)
+    return resultado
+
+
+def sequencias(df, violacoes, por="Estação", coluna_data=COLUNA_DATA):
+    """Maior sequência e sequência atual de violações consecutivas por grupo e parâmetro.
+
+    As amostras de cada grupo são ordenadas por data; amostras sem medição do
+    parâmetro não interrompem nem prolongam a sequência.
+    """
+    parametros = list(violacoes.columns)
+    codigos, rotulos = pd.factorize(df[por], sort=True)
+    ordem = np.lexsort((df[coluna_data].to_numpy(), codigos))
+    ordem = ordem[codigos[ordem] >= 0]
+    if not len(ordem) or not parametros:
+        return pd.DataFrame(columns=[por, "Parâmetro", "Última amostra", "n medidos", "Excedências",
+                                     "Maior sequência", "Sequência atual"])
+
+    grupo = codigos[ordem]
+    violou = violacoes.to_numpy()[ordem]
+    medido = _medidos(df, parametros).to_numpy()[ordem]
+    inicio = np.r_[True, grupo[1:] != grupo[:-1]]
+
+    # Comprimento da sequência em cada linha: violações acumuladas desde o último
+    # reinício (amostra medida dentro do limite ou início do grupo)
+    acumulado = np.cumsum(violou, axis=0)
+    reinicio = (medido & ~violou) | inicio[:, None]
+    linha_reinicio = np.maximum.accumulate(np.where(reinicio, np.arange(len(ordem))[:, None], 0), axis=0)
+    base = np.take_along_axis(acumulado - violou, linha_reinicio, axis=0)
+    corrida = acumulado - base
+
+    inicios = np.flatnonzero(inicio)
+    fins = np.r_[inicios[1:] - 1, len(ordem) - 1]
+    datas = df[coluna_data].to_numpy()[ordem]
+    n_grupos, n_parametros = len(inicios), len(parametros)
+    return pd.DataFrame({
+        por: np.repeat(rotulos[grupo[inicios]], n_parametros),
+        "Parâmetro": np.tile(parametros, n_grupos),
+        "Última amostra": np.repeat(datas[fins], n_parametros),
+        "n medidos": np.add.reduceat(medido, inicios, axis=0).ravel(),
+        "Excedências": np.add.reduceat(violou, inicios, axis=0).ravel(),
+        "Maior sequência": np.maximum.reduceat(corrida, inicios, axis=0).ravel(),
+        "Sequência atual": corrida[fins].ravel(),
+    })
+
+
+def contingencias(df, violacoes, por="Categoria"):
+    """Tabela grupo × (acima / dentro do limite) de cada parâmetro, só com valores medidos."""
+    medidos = _medidos(df, list(violacoes.columns)).groupby(df[por], observed=True).sum()
+    acima = violacoes.groupby(df[por], observed=True).sum()
+    tabelas = {}
+    for parametro in violacoes.columns:
+        tabela = pd.DataFrame({
+            ROTULOS_LIMITE[True]: acima[parametro],
+            ROTULOS_LIMITE[False]: medidos[parametro] - acima[parametro],
+        })
+        tabela = tabela[medidos[parametro] > 0]
+        tabela.index.name = por
+        tabela.columns.name = "Metal_cat"
+        tabelas[parametro] = tabela
+    return tabelas
+
+
+def avaliar(df, norma=NORMA_PADRAO, parametros=None):
+    violacoes = excedencias(df, parametros, norma)
+    return ResultadoConformidade(
+        norma,
+        {nivel: taxas(df, violacoes, chaves) for nivel, chaves in NIVEIS.items()},
+        sequencias(df, violacoes),
+        contingencias(df, violacoes),
+    )
+
+
+@compartilhado(max_itens=16, persistente=True)
+def _conformidade(caminho, versao, norma, versao_tabela):
+    # A versão da tabela de limites entra na chave: editar limites.csv invalida o resultado
+    return avaliar(carregar_dados(caminho), norma)
+
+
+def carregar_conformidade(norma=NORMA_PADRAO, caminho=ARQUIVO_DADOS):
+    """Conformidade de todos os parâmetros com a norma, em cache por versão dos dados e dos limites."""
+    caminho = str(caminho)
+    return _conformidade(caminho, versao_dados(caminho), norma, versao_limites())
@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+
+from analise.compartilhado import compartilhado
+from analise.dados import ARQUIVO_DADOS, METAIS, compactar
+from analise.estatisticas import ic_de_agregados
+from analise.ingestao import agregar, carregar_estatisticas, reagrupar, versao_estatisticas
+from analise.limites import NORMA_PADRAO, limites_da_norma
+
+# --- Cubo de estatísticas pré-calculadas (metal × categoria × estação) ---
+NIVEIS = {
+    "Geral": [],
+    "Categoria": ["Categoria"],
+    "Estação": ["Categoria", "Estação"],
+}
+QUANTIS = (0.25, 0.5, 0.75)
+
+
+def _momentos(estatisticas, chaves, alpha, limites):
+    tabela = reagrupar(estatisticas, chaves)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        variancia = tabela["M2"] / (tabela["n"] - 1).where(tabela["n"] > 1)
+    resultado = ic_de_agregados(tabela["n"], tabela["Média"], variancia, alpha)
+    nivel = pd.concat([tabela[chaves + ["Metal"]], resultado], axis=1)
+    nivel["Excedências"] = tabela["Excedências"]
+    nivel["Limite"] = nivel["Metal"].map(limites)
+    nivel["Taxa de excedência"] = nivel["Excedências"] / nivel["n"].where(nivel["n"] > 0)
+    return nivel
+
+
+def _quantis(df, chaves):
+    # Sem chaves (nível geral) agrupa por uma constante e descarta a coluna no final
+    por = [df[c] for c in chaves] or [pd.Series(0, index=df.index, name="_todos")]
+    nomes = chaves or ["_todos"]
+    grupos = df.groupby(por, observed=True)[METAIS]
+
+    quantis = grupos.quantile(list(QUANTIS))
+    quantis.index = quantis.index.set_names(nomes + ["q"])
+    quantis.columns.name = "Metal"
+    quantis = quantis.stack(future_stack=True).unstack("q")
+    quantis.columns = [f"Q{round(q * 100)}" for q in quantis.columns]
+
+    extremos = grupos.agg(["min", "max"])
+    extremos.columns = extremos.columns.set_names(["Metal", None])
+    extremos = extremos.stack(level="Metal", future_stack=True)
+    extremos.columns = ["Mínimo", "Máximo"]
+
+    tabela = quantis.join(extremos).reset_index()
+    return tabela.drop(columns="_todos") if not chaves else tabela
+
+
+def _juntar_niveis(partes):
+    cubo = pd.concat([parte.assign(Nível=nivel) for nivel, parte in partes.items()], ignore_index=True)
+    colunas = ["Nível", "Categoria", "Estação", "Metal"]
+    return cubo[colunas + [c for c in cubo.columns if c not in colunas]]
+
+
+def cubo_de_agregados(estatisticas, alpha=0.05):
+    """n, média, IC e excedências de todos os metais nos três níveis, a partir das
+    estatísticas por (Categoria, Estação, Metal) de `ingestao.agregar`.
+
+    Não lê as amostras: o cubo das páginas sai das estatísticas mantidas pela
+    ingestão. Quantis e extremos precisam dos valores e ficam em `montar_cubo`.
+    As excedências da ingestão são contadas pela norma padrão, e o limite do cubo
+    é o da mesma norma; outra norma exige reagregar as amostras (`montar_cubo`).
+    """
+    # Mesmos tipos do frame compartilhado: categorias na ordem usual nos resultados
+    estatisticas = compactar(estatisticas.copy())
+    limites = limites_da_norma(NORMA_PADRAO)
+    return _juntar_niveis({nivel: _momentos(estatisticas, chaves, alpha, limites)
+                           for nivel, chaves in NIVEIS.items()})
+
+
+def montar_cubo(df, alpha=0.05, norma=NORMA_PADRAO):
+    """Estatísticas de todos os metais nos níveis geral, por categoria e por estação,
+    com quantis e extremos (relatório e benchmarks, que já têm as amostras)."""
+    estatisticas = compactar(agregar(df, norma))
+    limites = limites_da_norma(norma)
+    partes = {}
+    for nivel, chaves in NIVEIS.items():
+        momentos = _momentos(estatisticas, chaves, alpha, limites)
+        extras = ["Excedências", "Limite", "Taxa de excedência"]
+        partes[nivel] = (momentos.drop(columns=extras)
+                         .merge(_quantis(df, chaves), on=chaves + ["Metal"], how="left")
+                         .join(momentos[extras]))
+    return _juntar_niveis(partes)
+
+
+@compartilhado(max_itens=4)
+def _cubo(caminho, versao_estatisticas, alpha, particionado):
+    # A versão das estatísticas cobre a planilha, os lotes e a tabela de limites
+    if particionado:
+        # Recalcular as estatísticas da ingestão leria a base inteira: usa os agregados
+        # do resumo, montados partição por partição
+        from analise.particionado import carregar_resumo
+
+        return cubo_de_agregados(carregar_resumo(caminho).grupos, alpha=alpha)
+    return cubo_de_agregados(carregar_estatisticas(caminho), alpha=alpha)
+
+
+def carregar_cubo(caminho=ARQUIVO_DADOS, alpha=0.05):
+    """Cubo (sem quantis) das estatísticas mantidas pela ingestão; não carrega as amostras."""
+    from analise.particionado import modo_particionado
+
+    caminho = str(caminho)
+    return _cubo(caminho, versao_estatisticas(caminho), alpha, modo_particionado(caminho))
+
+
+def consultar(cubo, metal, nivel):
+    """Linhas do cubo para um metal em um nível ("Geral", "Categoria" ou "Estação")."""
+    return cubo[(cubo["Nível"] == nivel) & (cubo["Metal"] == metal)]
+
+
+def por_estacao(cubo, metal, alpha=0.05):
+    """IC da média de `metal` por estação, com todas as categorias juntas (uma linha por estação).
+
+    O nível "Estação" do cubo é por (Categoria, Estação): uma estação que aparece em
+    duas categorias tem duas linhas, combinadas aqui pelas somas de n, média e M2.
+    """
+    linhas = consultar(cubo, metal, "Estação")
+    linhas = linhas[linhas["n"] > 0]
+    estacao = linhas["Estação"].astype(str)
+    por = linhas.groupby(estacao, sort=False)
+    n = por["n"].sum()
+    media = (linhas["n"] * linhas["Média"]).groupby(estacao, sort=False).sum() / n
+    m2 = (linhas["Variância"].fillna(0.0) * (linhas["n"] - 1)
+          + linhas["n"] * (linhas["Média"] - estacao.map(media)) ** 2).groupby(estacao, sort=False).sum()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        variancia = (m2 / (n - 1)).where(n > 1)
+    resultado = ic_de_agregados(n, media, variancia, alpha, indice=n.index)
+    resultado.index.name = "Estação"
+    return resultado
@@ -0,0 +1,130 @@
+import hashlib
+import os
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from analise.compartilhado import compartilhado
+
+# --- Caminhos e colunas padronizadas ---
+RAIZ = Path(__file__).resolve().parent.parent
+ARQUIVO_DADOS = RAIZ / "dados_metais_com_categoria.xlsx"
+
+METAIS = ["Arsênio total", "Ferro dissolvido", "Manganês total"]
+COLUNAS_TEXTO = ["Estação", "Categoria"]
+COLUNA_DATA = "Data de Amostragem"
+
+# Incrementar sempre que normalizar_colunas mudar (invalida o cache colunar)
+VERSAO_ESQUEMA = "2"
+
+# Rótulos canônicos das categorias (as páginas usavam variações como "INCIDENTE" e "MEDIOS")
+ORDEM_CATEGORIAS = ["Incidente", "Medio", "Longe"]
+_ROTULOS_CATEGORIA = {
+    "incidente": "Incidente",
+    "medio": "Medio", "médio": "Medio", "medios": "Medio", "médios": "Medio",
+    "longe": "Longe", "longes": "Longe",
+}
+
+# Nome canônico de cada coluna, indexado pela versão em minúsculas
+# (as páginas antigas usavam .str.title() e geravam "Arsênio Total" etc.)
+_NOMES_CANONICOS = {nome.lower(): nome for nome in METAIS + COLUNAS_TEXTO + [COLUNA_DATA]}
+
+
+def normalizar_colunas(df):
+    """Padroniza nomes e tipos das colunas do dataset de metais."""
+    df.columns = [_NOMES_CANONICOS.get(c.strip().lower(), c.strip()) for c in df.columns]
+
+    for coluna in COLUNAS_TEXTO:
+        if coluna in df.columns:
+            df[coluna] = df[coluna].astype("string").str.strip()
+    if "Estação" in df.columns:
+        df["Estação"] = df["Estação"].str.upper()
+    if "Categoria" in df.columns:
+        rotulos = df["Categoria"].str.lower().map(_ROTULOS_CATEGORIA)
+        df["Categoria"] = rotulos.fillna(df["Categoria"]).astype("string")
+
+    for metal in METAIS:
+        if metal in df.columns:
+            df[metal] = pd.to_numeric(df[metal], errors="coerce")
+
+    if COLUNA_DATA in df.columns:
+        df[COLUNA_DATA] = pd.to_datetime(df[COLUNA_DATA], errors="coerce")
+    return df
+
+
+def compactar(df):
+    """Tipos compactos para o frame compartilhado em memória.
+
+    Estação, categoria e hora viram `category` (códigos inteiros + dicionário) e os
+    metais passam a float32 quando a conversão preserva os valores com folga em
+    relação à precisão das medições (7 dígitos significativos).
+    """
+    if "Categoria" in df.columns:
+        extras = sorted(set(df["Categoria"].dropna()) - set(ORDEM_CATEGORIAS))
+        df["Categoria"] = pd.Categorical(df["Categoria"], categories=ORDEM_CATEGORIAS + extras)
+    for coluna in ["Estação", "Hora de Amostragem"]:
+        if coluna in df.columns:
+            df[coluna] = df[coluna].astype("category")
+
+    for metal in METAIS:
+        if metal in df.columns and df[metal].dtype == np.float64:
+            original = df[metal].to_numpy()
+            compacto = original.astype(np.float32)
+            if np.allclose(compacto, original, rtol=1e-6, atol=0, equal_nan=True):
+                df[metal] = compacto
+    return df
+
+
+def versao_dados(caminho=ARQUIVO_DADOS):
+    """Identificador da versão atual dos dados (planilha + lotes ingeridos), chave dos caches."""
+    from analise.ingestao import versao_lotes
+
+    info = os.stat(caminho)
+    return f"{info.st_mtime_ns}-{info.st_size}-{versao_lotes(caminho)}"
+
+
+@lru_cache(maxsize=16)
+def _hash_arquivo(caminho, mtime_ns, tamanho):
+    with open(caminho, "rb") as entrada:
+        return hashlib.blake2b(entrada.read(), digest_size=16).hexdigest()
+
+
+def versao_tabela(caminho):
+    """Hash do conteúdo de uma tabela de configuração (CSV), relido só quando o arquivo muda.
+
+    Depende só do conteúdo: um deploy que apenas toca o arquivo não invalida os
+    resultados persistentes que usam a tabela.
+    """
+    info = os.stat(caminho)
+    return _hash_arquivo(str(caminho), info.st_mtime_ns, info.st_size)
+
+
+def ler_dados(caminho=ARQUIVO_DADOS):
+    """Lê o dataset sem cache do Streamlit (uso em scripts e processos auxiliares)."""
+    # A leitura passa pelo cache colunar, que só chama o openpyxl se a planilha mudou.
+    # Com lotes de novas amostras (analise.ingestao), junta a planilha e as partições
+    # dos lotes numa única passada.
+    from analise import cache_colunar, ingestao
+
+    com_lotes = ingestao.ler_com_lotes(caminho)
+    if com_lotes is not None:
+        return com_lotes
+    return compactar(cache_colunar.ler(caminho, normalizar_colunas))
+
+
+@compartilhado(max_itens=4)
+def _ler_planilha(caminho, versao):
+    # A versão faz parte da chave: a planilha só é relida quando os dados mudam
+    return ler_dados(caminho)
+
+
+def carregar_dados(caminho=ARQUIVO_DADOS):
+    """Retorna o DataFrame compartilhado entre as páginas e sessões (não deve ser alterado).
+
+    Há uma única cópia por versão dos dados no processo; com o copy-on-write do
+    pandas, filtros e colunas derivadas nas páginas não duplicam os dados originais.
+    """
+    caminho = str(caminho)
+    return _ler_planilha(caminho, versao_dados(caminho))
@@ -0,0 +1,281 @@
+import numpy as np
+
+from analise.kde import kde, kde_ponderada
+
+# --- Esboços combináveis de distribuições ---
+# Resumos de tamanho limitado que podem ser calculados por partição ou por grupo e
+# depois somados: Histograma (faixas logarítmicas fixas) para densidades e contagens
+# e EsbocoKLL para quantis. Distribuicao junta os dois com n, média, M2, mínimo e
+# máximo e fornece o que boxplots e violinos precisam, sem os valores brutos.
+K_PADRAO = 200
+# Até este número de valores o esboço não compacta nada e os quantis são exatos
+EXATO_ATE = 2_000
+_FATOR_CAPACIDADE = 2 / 3
+# Limite de faixas do histograma aproximado (as páginas desenham até 200 barras)
+MAX_FAIXAS = 200
+
+
+class Histograma:
+    """Contagens em faixas logarítmicas fixas, iguais para qualquer partição (somáveis).
+
+    FAIXAS_POR_DECADA = 200 dá faixas de ~1,2% de largura relativa: quantis lidos do
+    histograma têm erro relativo de no máximo ~0,6% entre MINIMO e MAXIMO.
+    """
+
+    MINIMO, MAXIMO, FAIXAS_POR_DECADA = 1e-6, 1e4, 200
+    ARESTAS = np.geomspace(MINIMO, MAXIMO, int(np.log10(MAXIMO / MINIMO)) * FAIXAS_POR_DECADA + 1)
+    # Valor representativo de cada posição (centro geométrico da faixa; pontas nos extremos)
+    CENTROS = np.r_[MINIMO, np.sqrt(ARESTAS[:-1] * ARESTAS[1:]), MAXIMO]
+
+    def __init__(self, contagens=None):
+        # Posição 0: valores <= MINIMO; última posição: valores > MAXIMO
+        self.contagens = np.zeros(len(self.ARESTAS) + 1, dtype=np.int64) if contagens is None else contagens
+
+    def adicionar(self, valores):
+        valores = np.asarray(valores, dtype=float)
+        valores = valores[np.isfinite(valores)]
+        self.contagens += np.bincount(np.searchsorted(self.ARESTAS, valores), minlength=len(self.contagens))
+        return self
+
+    def __add__(self, outro):
+        return Histograma(self.contagens + outro.contagens)
+
+    @property
+    def n(self):
+        return int(self.contagens.sum())
+
+    def acumulada(self, x, minimo=-np.inf, maximo=np.inf):
+        """Número aproximado de valores <= x (interpolação em escala log dentro da faixa).
+
+        `minimo` e `maximo` (os extremos observados) tornam exatas as pontas da curva.
+        """
+        x = np.asarray(x, dtype=float)
+        acumulada = np.interp(np.log10(np.clip(x, self.MINIMO, None)), np.log10(self.ARESTAS),
+                              np.cumsum(self.contagens[:-1]), right=self.n)
+        return np.where(x >= maximo, self.n, np.where(x < minimo, 0, acumulada))
+
+    def contagens_em(self, arestas, minimo=-np.inf, maximo=np.inf):
+        """Contagens reagrupadas nas faixas `arestas` (ex.: os bins de um histograma linear)."""
+        return np.round(np.diff(self.acumulada(arestas, minimo, maximo))).astype(np.int64)
+
+    def quantis(self, qs, minimo=-np.inf, maximo=np.inf):
+        acumulada = np.r_[0, np.cumsum(self.contagens[:-1])]
+        log_arestas = np.log10(np.r_[self.MINIMO, self.ARESTAS])
+        # Só as arestas das faixas ocupadas: a interpolação não espalha a contagem
+        # de uma faixa pelas faixas vazias vizinhas
+        cresce = np.diff(acumulada) > 0
+        pontos = np.r_[True, cresce] | np.r_[cresce, True]
+        valores = 10 ** np.interp(np.asarray(qs) * self.n, acumulada[pontos], log_arestas[pontos])
+        return np.clip(valores, minimo, maximo)
+
+
+class EsbocoKLL:
+    """Esboço de quantis KLL: níveis de itens com peso 2^nível e capacidades decrescentes.
+
+    Quando um nível excede a capacidade, seus itens são ordenados e metade (as posições
+    pares ou ímpares, sorteadas) sobe para o nível seguinte com o dobro do peso. O erro
+    de posição é da ordem de 1/k do total, independentemente de n, e dois esboços se
+    combinam juntando os níveis. Até `exato_ate` valores nada é compactado e os
+    quantis são exatos. A semente fixa torna o resultado reprodutível para os mesmos
+    dados.
+    """
+
+    def __init__(self, k=K_PADRAO, exato_ate=EXATO_ATE, semente=0):
+        self.k = k
+        self.exato_ate = exato_ate
+        self.n = 0
+        self.niveis = [np.empty(0)]
+        self._rng = np.random.default_rng(semente)
+
+    def _capacidade(self, nivel):
+        return max(2, int(np.ceil(self.k * _FATOR_CAPACIDADE ** (len(self.niveis) - 1 - nivel))))
+
+    def _compactar(self):
+        if self.n <= self.exato_ate:
+            return
+        nivel = 0
+        while nivel < len(self.niveis):
+            itens = self.niveis[nivel]
+            if len(itens) <= self._capacidade(nivel):
+                nivel += 1
+                continue
+            itens = np.sort(itens)
+            # Com quantidade ímpar, o maior item fica no nível e os demais formam pares
+            sobra = len(itens) % 2
+            promovidos = itens[self._rng.integers(2):len(itens) - sobra:2]
+            self.niveis[nivel] = itens[len(itens) - sobra:]
+            if nivel + 1 == len(self.niveis):
+                self.niveis.append(np.empty(0))
+            self.niveis[nivel + 1] = np.concatenate([self.niveis[nivel + 1], promovidos])
+            # Um nível novo reduz a capacidade dos de baixo: recomeça a verificação
+            nivel = 0
+
+    def adicionar(self, valores):
+        valores = np.asarray(valores, dtype=float)
+        valores = valores[np.isfinite(valores)]
+        self.niveis[0] = np.concatenate([self.niveis[0], valores])
+        self.n += len(valores)
+        self._compactar()
+        return self
+
+    def combinar(self, outro):
+        for nivel, itens in enumerate(outro.niveis):
+            if nivel == len(self.niveis):
+                self.niveis.append(np.empty(0))
+            self.niveis[nivel] = np.concatenate([self.niveis[nivel], itens])
+        self.n += outro.n
+        self._compactar()
+        return self
+
+    @property
+    def exato(self):
+        return len(self.niveis) == 1
+
+    def itens(self):
+        """(valores, pesos) ordenados; os pesos somam n."""
+        valores = np.concatenate(self.niveis)
+        pesos = np.concatenate([np.full(len(itens), 2 ** nivel) for nivel, itens in enumerate(self.niveis)])
+        ordem = np.argsort(valores, kind="stable")
+        return valores[ordem], pesos[ordem]
+
+    def quantis(self, qs):
+        """Quantis com interpolação linear entre posições (igual a np.percentile quando exato)."""
+        valores, pesos = self.itens()
+        if not len(valores):
+            return np.full(np.shape(qs), np.nan)
+        # Cada item ocupa as posições [acumulado - peso, acumulado - 1] da amostra ordenada
+        acumulado = np.cumsum(pesos)
+        posicoes = np.column_stack([acumulado - pesos, acumulado - 1]).ravel()
+        return np.interp(np.asarray(qs) * (self.n - 1), posicoes, np.repeat(valores, 2))
+
+
+class Distribuicao:
+    """Resumo combinável dos valores de um grupo: momentos, extremos, quantis e densidade."""
+
+    def __init__(self, k=K_PADRAO):
+        self.n = 0
+        self.media = 0.0
+        self.m2 = 0.0
+        self.minimo = np.inf
+        self.maximo = -np.inf
+        self.esboco = EsbocoKLL(k)
+        self.histograma = Histograma()
+
+    def adicionar(self, valores):
+        valores = np.asarray(valores, dtype=float)
+        valores = valores[np.isfinite(valores)]
+        if not len(valores):
+            return self
+        parcial = Distribuicao(self.esboco.k)
+        parcial.n, parcial.media = len(valores), valores.mean()
+        parcial.m2 = ((valores - parcial.media) ** 2).sum()
+        parcial.minimo, parcial.maximo = valores.min(), valores.max()
+        parcial.esboco.adicionar(valores)
+        parcial.histograma.adicionar(valores)
+        return self.combinar(parcial)
+
+    def combinar(self, outra):
+        """Junta `outra` a esta distribuição (Chan para média e M2)."""
+        n = self.n + outra.n
+        if n:
+            delta = outra.media - self.media
+            self.m2 += outra.m2 + delta ** 2 * self.n * outra.n / n
+            self.media += delta * outra.n / n
+        self.n = n
+        self.minimo, self.maximo = min(self.minimo, outra.minimo), max(self.maximo, outra.maximo)
+        self.esboco.combinar(outra.esboco)
+        self.histograma = self.histograma + outra.histograma
+        return self
+
+    @classmethod
+    def juntar(cls, distribuicoes):
+        """Nova distribuição com a soma de várias (as originais não são alteradas)."""
+        total = cls()
+        for distribuicao in distribuicoes:
+            total.combinar(distribuicao)
+        return total
+
+    @property
+    def desvio(self):
+        return np.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else np.nan
+
+    def quantis(self, qs):
+        return np.clip(self.esboco.quantis(qs), self.minimo, self.maximo)
+
+    def caixa(self, rotulo=None, whis=1.5):
+        """Estatísticas de boxplot no formato de `Axes.bxp` (bigodes a `whis` × IQR)."""
+        q1, mediana, q3 = self.quantis([0.25, 0.5, 0.75])
+        baixo, alto = q1 - whis * (q3 - q1), q3 + whis * (q3 - q1)
+        # Os itens do esboço são valores observados: bigodes e pontos extremos saem deles
+        valores = np.r_[self.esboco.itens()[0], self.minimo, self.maximo]
+        dentro = valores[(valores >= baixo) & (valores <= alto)]
+        return {
+            "label": rotulo, "med": mediana, "q1": q1, "q3": q3, "mean": self.media,
+            "whislo": dentro.min() if len(dentro) else q1,
+            "whishi": dentro.max() if len(dentro) else q3,
+            "fliers": np.unique(valores[(valores < baixo) | (valores > alto)]),
+        }
+
+    def histograma_com_kde(self, bins="auto", pontos=200):
+        """(arestas, contagens, grade, curva) como `graficos.histograma_com_kde` sobre os valores.
+
+        Com o esboço exato, faixas e contagens são as do numpy; senão, o número de
+        faixas segue a mesma regra "auto" (máximo entre Sturges e Freedman-Diaconis,
+        com o IQR do esboço) e as contagens vêm do histograma de faixas fixas.
+        """
+        if self.esboco.exato:
+            valores = self.esboco.niveis[0]
+            arestas = np.histogram_bin_edges(valores, bins)
+            if len(arestas) > MAX_FAIXAS + 1:
+                arestas = np.histogram_bin_edges(valores, MAX_FAIXAS)
+            contagens, arestas = np.histogram(valores, arestas)
+        else:
+            q1, q3 = self.quantis([0.25, 0.5, 0.75])[[0, 2]]
+            largura = 2 * (q3 - q1) * self.n ** (-1 / 3)
+            faixas = np.log2(self.n) + 1
+            if largura > 0:
+                faixas = max(faixas, (self.maximo - self.minimo) / largura)
+            arestas = np.linspace(self.minimo, self.maximo, min(int(np.ceil(faixas)), MAX_FAIXAS) + 1)
+            contagens = self.histograma.contagens_em(arestas, self.minimo, self.maximo)
+        if self.n < 2 or not self.minimo < self.maximo:
+            return arestas, contagens, None, None
+        grade = np.linspace(self.minimo, self.maximo, pontos)
+        if self.esboco.exato:
+            densidade = kde(self.esboco.niveis[0], grade)
+        else:
+            densidade = kde_ponderada(Histograma.CENTROS, self.histograma.contagens, grade,
+                                      self.desvio * self.n ** (-1 / 5))
+        return arestas, contagens, grade, densidade * self.n * (arestas[1] - arestas[0])
+
+    def violino(self, pontos=100, corte=2):
+        """Densidade KDE (regra de Scott) no formato de `Axes.violin`, como o violinplot do seaborn.
+
+        Com o esboço exato a KDE usa os próprios valores; senão, as contagens do
+        histograma de faixas fixas.
+        """
+        h = self.desvio * self.n ** (-1 / 5) if self.n > 1 else np.nan
+        if not np.isfinite(h) or h <= 0:
+            grade, densidade = np.array([self.minimo]), np.array([1.0])
+        else:
+            grade = np.linspace(self.minimo - corte * h, self.maximo + corte * h, pontos)
+            if self.esboco.exato:
+                densidade = kde(self.esboco.niveis[0], grade)
+            else:
+                densidade = kde_ponderada(Histograma.CENTROS, self.histograma.contagens, grade, h)
+        q1, mediana, q3 = self.quantis([0.25, 0.5, 0.75])
+        return {"coords": grade, "vals": densidade, "mean": self.media, "median": mediana,
+                "min": self.minimo, "max": self.maximo, "quartis": (q1, q3)}
+
+
+def distribuicoes_por_grupo(df, metais, chaves=("Categoria", "Estação")):
+    """{(*grupo, metal): Distribuicao} de cada grupo de `chaves` com valores do metal."""
+    indices = df.groupby(list(chaves), observed=True).indices
+    distribuicoes = {}
+    for metal in metais:
+        valores = df[metal].to_numpy(dtype=float)
+        for grupo, posicoes in indices.items():
+            grupo = grupo if isinstance(grupo, tuple) else (grupo,)
+            distribuicao = Distribuicao().adicionar(valores[posicoes])
+            if distribuicao.n:
+                distribuicoes[(*grupo, metal)] = distribuicao
+    return distribuicoes
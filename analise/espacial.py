@@ -0,0 +1,215 @@
+import numpy as np
+import pandas as pd
+
+from analise.compartilhado import compartilhado
+from analise.cubo import carregar_cubo, por_estacao
+from analise.dados import ARQUIVO_DADOS, METAIS, versao_dados
+from analise.estacoes import carregar_indice, versao_estacoes
+from analise.estatisticas import ic_de_agregados
+from analise.ingestao import carregar_estatisticas, reagrupar
+from analise.limites import versao_limites
+
+# --- Análise espacial ao longo do caminho da pluma ---
+# As estações são posicionadas pelo quilômetro no rio (analise.estacoes). O perfil
+# por estação vem do cubo de estatísticas e os trechos das estatísticas da ingestão
+# por (Categoria, Estação, Metal), sem ler as amostras; gradientes e comparações
+# entre vizinhas são operações vetorizadas por metal.
+TRECHOS_KM = (0, 100, 200, 350, 500, np.inf)
+
+
+def rotulos_trechos(arestas=TRECHOS_KM):
+    return [f"{a:g}+ km" if np.isinf(b) else f"{a:g}–{b:g} km" for a, b in zip(arestas[:-1], arestas[1:])]
+
+
+def trecho_do_km(km, arestas=TRECHOS_KM):
+    return pd.cut(np.asarray(km, dtype=float), list(arestas), right=False, labels=rotulos_trechos(arestas))
+
+
+class ResultadoEspacial:
+    """Resultado de `avaliar`: perfil por estação, gradientes, trechos e vizinhas."""
+
+    def __init__(self, perfil, gradientes, trechos, vizinhas, sem_localizacao):
+        self.perfil = perfil                    # por metal e estação, ordenado pelo km
+        self.gradientes = gradientes            # uma linha por metal
+        self.trechos = trechos                  # por trecho do rio e metal
+        self.vizinhas = vizinhas                # pares montante → jusante consecutivos
+        self.sem_localizacao = sem_localizacao  # estações do dataset fora de estacoes.csv
+
+    @staticmethod
+    def _do_metal(tabela, metal):
+        return tabela if metal is None else tabela[tabela["Metal"] == metal]
+
+    def do_metal(self, metal):
+        """(perfil, gradiente, trechos, vizinhas) de um metal."""
+        return tuple(self._do_metal(t, metal) for t in (self.perfil, self.gradientes, self.trechos, self.vizinhas))
+
+
+def _trecho_das_estacoes(estacoes, indice, arestas):
+    """Trecho de cada estação, pelas estações do índice em cada faixa de km (NaN fora da tabela)."""
+    rotulos = rotulos_trechos(arestas)
+    mapa = {estacao: rotulo for rotulo, inicio, fim in zip(rotulos, arestas[:-1], arestas[1:])
+            for estacao in indice.trecho(inicio, fim)}
+    return pd.Categorical(pd.Series(estacoes, dtype=object).map(mapa), categories=rotulos, ordered=True)
+
+
+def perfil(cubo, indice, arestas=TRECHOS_KM, metais=None):
+    """Estatísticas por estação (todas as categorias juntas) com km e trecho, ordenadas rio abaixo."""
+    partes = [por_estacao(cubo, metal).reset_index().assign(Metal=metal)
+              for metal in (METAIS if metais is None else metais)]
+    tabela = pd.concat(partes, ignore_index=True)
+    tabela = tabela.assign(Km=indice.km_de(tabela["Estação"]))
+    tabela = tabela[tabela["Km"].notna()]
+    tabela.insert(1, "Metal", tabela.pop("Metal"))
+    tabela.insert(2, "Km", tabela.pop("Km"))
+    tabela.insert(3, "Trecho", _trecho_das_estacoes(tabela["Estação"], indice, arestas))
+    # Mesma ordem do índice (km e nome), para as vizinhas coincidirem com as consultas dele
+    ordem = tabela["Estação"].map(indice.posicao)
+    return (tabela.assign(_ordem=ordem).sort_values(["Metal", "_ordem"], kind="stable")
+            .drop(columns="_ordem").reset_index(drop=True))
+
+
+def _regressao(x, y, pesos, grupos):
+    """Mínimos quadrados ponderados de y em x para cada grupo, a partir de somas agregadas."""
+    somas = pd.DataFrame({
+        "w": pesos, "wx": pesos * x, "wy": pesos * y,
+        "wxx": pesos * x * x, "wxy": pesos * x * y, "wyy": pesos * y * y, "pontos": 1,
+    }).groupby(grupos, observed=True, sort=False).sum()
+    sxx = somas["wxx"] - somas["wx"] ** 2 / somas["w"]
+    sxy = somas["wxy"] - somas["wx"] * somas["wy"] / somas["w"]
+    syy = somas["wyy"] - somas["wy"] ** 2 / somas["w"]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        inclinacao = (sxy / sxx).where(somas["pontos"] > 1)
+        r = sxy / np.sqrt(sxx * syy)
+    intercepto = (somas["wy"] - inclinacao * somas["wx"]) / somas["w"]
+    return somas["pontos"], inclinacao, intercepto, r
+
+
+def gradientes(perfil):
+    """Gradiente da concentração média com a distância, por metal.
+
+    Regressão das médias das estações no km, ponderada pelo número de amostras: em
+    escala linear (mg/L a cada 100 km) e em escala log (variação % a cada 100 km,
+    adequada a uma pluma que se dilui multiplicativamente rio abaixo).
+    """
+    x, y, pesos = perfil["Km"].to_numpy(), perfil["Média"].to_numpy(dtype=float), perfil["n"].to_numpy(dtype=float)
+    estacoes, inclinacao, intercepto, r = _regressao(x, y, pesos, perfil["Metal"].to_numpy())
+
+    positivos = y > 0
+    _, inclinacao_log, _, r_log = _regressao(x[positivos], np.log(y[positivos]), pesos[positivos],
+                                             perfil["Metal"].to_numpy()[positivos])
+    resultado = pd.DataFrame({
+        "Estações": estacoes,
+        "Gradiente (mg/L por 100 km)": inclinacao * 100,
+        "Média no km 0 (mg/L)": intercepto,
+        "r": r,
+        "Variação por 100 km (%)": np.expm1(inclinacao_log * 100) * 100,
+        "r (log)": r_log,
+    })
+    resultado.index.name = "Metal"
+    return resultado.reset_index()
+
+
+def trechos(estatisticas, indice, metais=None, arestas=TRECHOS_KM, alpha=0.05):
+    """IC da média e taxa de excedência por trecho do rio, a partir das estatísticas por
+    (Categoria, Estação, Metal) de `ingestao.agregar`."""
+    metais = list(METAIS if metais is None else metais)
+    estatisticas = estatisticas[estatisticas["Metal"].isin(metais)]
+    estatisticas = estatisticas.assign(Trecho=_trecho_das_estacoes(estatisticas["Estação"].astype(object),
+                                                                   indice, arestas))
+    estatisticas = estatisticas[estatisticas["Trecho"].notna()]
+
+    tabela = reagrupar(estatisticas, ["Trecho"])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        variancia = tabela["M2"] / (tabela["n"] - 1).where(tabela["n"] > 1)
+    resumo = pd.concat([tabela[["Trecho", "Metal"]], ic_de_agregados(tabela["n"], tabela["Média"], variancia, alpha)],
+                       axis=1)
+    resumo["Excedências"] = tabela["Excedências"]
+    resumo["Taxa de excedência"] = resumo["Excedências"] / resumo["n"].where(resumo["n"] > 0)
+
+    estacoes = estatisticas.groupby("Trecho", observed=True)["Estação"].nunique().rename("Estações")
+    return resumo.join(estacoes, on="Trecho")
+
+
+def vizinhas(perfil, indice):
+    """Comparação de cada estação com a próxima rio abaixo que mediu o mesmo metal.
+
+    A vizinha de jusante vem do índice espacial, restrito às estações do perfil do
+    metal. Diferença das médias (jusante − montante), razão e teste t de Welch
+    calculado a partir das médias, erros padrão e contagens do cubo.
+    """
+    # scipy.stats só é importado quando a análise é calculada
+    from scipy.stats import t
+
+    atual = perfil.reset_index(drop=True)
+    jusante = np.empty(len(atual), dtype=object)
+    for linhas in atual.groupby("Metal", observed=True, sort=False).indices.values():
+        estacoes = atual["Estação"].to_numpy()[linhas]
+        jusante[linhas] = indice.vizinhas(estacoes, entre=estacoes)[1]
+    # Linhas do mesmo metal, pela estação de jusante (o perfil tem uma linha por metal e estação)
+    chaves = pd.MultiIndex.from_arrays([atual["Metal"], jusante])
+    proxima = (atual.set_index(["Metal", "Estação"])[["Km", "n", "Média", "SEM"]].reindex(chaves)
+               .reset_index(drop=True).assign(Estação=jusante))
+    pares = pd.notna(jusante)
+    atual, proxima = atual[pares], proxima[pares]
+
+    diferenca = proxima["Média"] - atual["Média"]
+    variancias = atual["SEM"] ** 2, proxima["SEM"] ** 2
+    with np.errstate(invalid="ignore", divide="ignore"):
+        erro = np.sqrt(variancias[0] + variancias[1])
+        estatistica = diferenca / erro
+        graus = erro ** 4 / (variancias[0] ** 2 / (atual["n"] - 1) + variancias[1] ** 2 / (proxima["n"] - 1))
+        razao = proxima["Média"] / atual["Média"]
+    return pd.DataFrame({
+        "Metal": atual["Metal"],
+        "Montante": atual["Estação"],
+        "Jusante": proxima["Estação"],
+        "Km montante": atual["Km"],
+        "Km jusante": proxima["Km"],
+        "Distância (km)": proxima["Km"] - atual["Km"],
+        "Média montante": atual["Média"],
+        "Média jusante": proxima["Média"],
+        "Diferença": diferenca,
+        "Razão": razao,
+        "t (Welch)": estatistica,
+        "gl": graus,
+        "p-valor": 2 * t.sf(np.abs(estatistica), graus),
+    }).reset_index(drop=True)
+
+
+def avaliar(estatisticas, cubo, indice, arestas=TRECHOS_KM):
+    """Perfil, gradientes, trechos e vizinhas a partir das estatísticas agregadas e do cubo."""
+    tabela = perfil(cubo, indice, arestas)
+    estacoes = pd.unique(estatisticas["Estação"].dropna().astype(str))
+    return ResultadoEspacial(
+        tabela,
+        gradientes(tabela),
+        trechos(estatisticas, indice, arestas=arestas),
+        vizinhas(tabela, indice),
+        sorted(e for e in estacoes if e not in indice),
+    )
+
+
+@compartilhado(max_itens=4, persistente=True)
+def _espacial(caminho, versao, versao_tabela, particionado):
+    # As versões de estacoes.csv e limites.csv entram na chave: corrigir um km ou um
+    # limite invalida o resultado
+    if particionado:
+        # Mesmos agregados do cubo no modo particionado (montados partição por partição)
+        from analise.particionado import carregar_resumo
+
+        estatisticas = carregar_resumo(caminho).grupos
+    else:
+        estatisticas = carregar_estatisticas(caminho)
+    return avaliar(estatisticas, carregar_cubo(caminho), carregar_indice())
+
+
+def carregar_espacial(caminho=ARQUIVO_DADOS):
+    """Análise espacial em cache por versão dos dados e das tabelas de estações e limites.
+
+    Usa só agregados (estatísticas da ingestão e cubo); não carrega as amostras.
+    """
+    from analise.particionado import modo_particionado
+
+    caminho = str(caminho)
+    return _espacial(caminho, versao_dados(caminho), (versao_estacoes(), versao_limites()),
+                     modo_particionado(caminho))
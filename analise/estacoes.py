@@ -0,0 +1,99 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from analise.dados import RAIZ, versao_tabela
+
+# --- Metadados espaciais das estações ---
+# estacoes.csv traz, para cada estação, o quilômetro ao longo do caminho da pluma
+# (distância pelo curso d'água a partir da barragem de Fundão); as coordenadas ficam
+# no arquivo como referência, mas as análises só usam o km. Os valores marcados com
+# Precisão "aproximada" foram estimados a partir do trecho do rio em que a estação
+# fica e devem ser substituídos pelos do cadastro oficial (IGAM) quando disponíveis;
+# a tabela pode ganhar linhas sem mudar o código.
+ARQUIVO_ESTACOES = RAIZ / "estacoes.csv"
+_COLUNAS = ["Estação", "Km", "Rio", "Precisão"]
+
+
+@lru_cache(maxsize=4)
+def _ler_tabela(caminho, versao):
+    tabela = pd.read_csv(caminho, dtype={"Km": float})
+    faltando = set(_COLUNAS) - set(tabela.columns)
+    if faltando:
+        raise ValueError(f"{caminho}: colunas ausentes na tabela de estações: {sorted(faltando)}")
+    tabela["Estação"] = tabela["Estação"].str.strip().str.upper()
+    if tabela["Estação"].duplicated().any():
+        raise ValueError(f"{caminho}: estação repetida na tabela de estações")
+    if tabela["Km"].isna().any():
+        raise ValueError(f"{caminho}: toda estação precisa do quilômetro no rio")
+    return tabela[_COLUNAS]
+
+
+def versao_estacoes(caminho=ARQUIVO_ESTACOES):
+    return versao_tabela(caminho)
+
+
+def tabela_estacoes(caminho=ARQUIVO_ESTACOES):
+    """Tabela de estações (relida quando o arquivo muda); não deve ser alterada."""
+    return _ler_tabela(str(caminho), versao_estacoes(caminho))
+
+
+class IndiceEspacial:
+    """Estações ordenadas pelo quilômetro no rio, para consultas por busca binária.
+
+    Quilômetro, trechos e vizinhas de montante/jusante são resolvidos sobre arrays
+    ordenados, sem filtrar a tabela estação por estação.
+    """
+
+    def __init__(self, tabela):
+        tabela = tabela.sort_values(["Km", "Estação"], kind="stable").reset_index(drop=True)
+        self.tabela = tabela
+        self.estacoes = tabela["Estação"].to_numpy()
+        self.km = tabela["Km"].to_numpy()
+        self.posicao = {estacao: i for i, estacao in enumerate(self.estacoes)}
+        self._indice = pd.Index(self.estacoes, dtype=object)
+
+    def __len__(self):
+        return len(self.estacoes)
+
+    def __contains__(self, estacao):
+        return estacao in self.posicao
+
+    def km_de(self, estacoes):
+        """Quilômetro de cada estação (NaN para as que não estão na tabela), vetorizado."""
+        posicoes = self._indice.get_indexer(pd.Index(estacoes, dtype=object))
+        if not len(self):
+            return np.full(len(posicoes), np.nan)
+        return np.where(posicoes >= 0, self.km[posicoes], np.nan)
+
+    def trecho(self, km_inicio, km_fim):
+        """Estações com km_inicio <= km < km_fim, de montante para jusante."""
+        inicio, fim = np.searchsorted(self.km, [km_inicio, km_fim], side="left")
+        return list(self.estacoes[inicio:fim])
+
+    def vizinhas(self, estacoes, entre=None):
+        """(montante, jusante) mais próximas de cada estação ao longo do rio (None nas pontas).
+
+        `entre` limita as vizinhas a um subconjunto (por exemplo, as estações que
+        mediram um metal); as estações consultadas devem estar na tabela.
+        """
+        posicoes = self._indice.get_indexer(pd.Index(estacoes, dtype=object))
+        candidatas = self._indice if entre is None else pd.Index(entre, dtype=object)
+        candidatas = np.unique(self._indice.get_indexer(candidatas))
+        candidatas = np.r_[-1, candidatas[candidatas >= 0], -1]
+        # Com sentinelas nas pontas, a busca sempre cai dentro do array
+        antes = np.searchsorted(candidatas[1:-1], posicoes, side="left")
+        depois = np.searchsorted(candidatas[1:-1], posicoes, side="right") + 1
+        nomes = np.r_[self.estacoes, None].astype(object)
+        return nomes[candidatas[antes]], nomes[candidatas[depois]]
+
+
+@lru_cache(maxsize=4)
+def _indice(caminho, versao):
+    return IndiceEspacial(_ler_tabela(caminho, versao))
+
+
+def carregar_indice(caminho=ARQUIVO_ESTACOES):
+    """Índice espacial da versão atual de estacoes.csv."""
+    return _indice(str(caminho), versao_estacoes(caminho))
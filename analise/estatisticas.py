@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+from analise.dados import METAIS
+
+
+def ic_de_agregados(n, media, variancia, alpha=0.05, indice=None):
+    """IC t-Student a partir de contagens, médias e variâncias já agregadas (vetorizado)."""
+    # scipy.stats é pesado: importado só quando algum IC é de fato calculado
+    from scipy.stats import t
+
+    n = np.asarray(n, dtype=float)
+    media = np.asarray(media, dtype=float)
+    variancia = np.asarray(variancia, dtype=float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sem = np.sqrt(variancia / n)
+        t_critico = t.ppf(1 - alpha / 2, np.where(n > 1, n - 1, np.nan))
+    margem = t_critico * sem
+
+    return pd.DataFrame({
+        "n": n.astype(int),
+        "Média": media,
+        "Variância": variancia,
+        "SEM": sem,
+        "t": t_critico,
+        "IC": margem,
+        "IC inferior": media - margem,
+        "IC superior": media + margem,
+    }, index=indice)
+
+
+def intervalo_confianca(df, por, metais=None, alpha=0.05):
+    """IC t-Student da média para cada combinação de grupo e metal, em uma única agregação.
+
+    `por` aceita o mesmo que `DataFrame.groupby` (coluna, lista de colunas, `pd.Grouper`).
+    Retorna uma linha por (grupo, metal) com n, Média, Variância, SEM, t crítico e limites do IC.
+    Grupos com menos de duas observações ficam com IC indefinido (NaN).
+    """
+    metais = list(METAIS if metais is None else metais)
+    # Metais guardados em float32 (analise.dados.compactar) são acumulados em float64:
+    # as médias móveis reconstroem somas de quadrados a partir de média e variância
+    df = df.astype({m: "float64" for m in metais if df[m].dtype != "float64"})
+    agregado = df.groupby(por, observed=True)[metais].agg(["count", "mean", "var"])
+    agregado.columns = agregado.columns.set_names(["Metal", None])
+    longo = agregado.stack(level="Metal", future_stack=True)
+
+    resultado = ic_de_agregados(longo["count"], longo["mean"], longo["var"], alpha, indice=longo.index)
+    return resultado.reset_index()
@@ -0,0 +1,19 @@
+import functools
+from pathlib import Path
+
+import streamlit as st
+
+# --- Estilo compartilhado ---
+# O CSS comum fica em style.css, lido do disco uma vez por processo; cada página
+# só acrescenta as regras próprias dela.
+ARQUIVO_ESTILO = Path(__file__).resolve().parent.parent / "style.css"
+
+
+@functools.lru_cache(maxsize=1)
+def _css():
+    return ARQUIVO_ESTILO.read_text(encoding="utf-8")
+
+
+def aplicar_estilo(extra=""):
+    """Injeta o CSS comum (mais `extra`, específico da página)."""
+    st.markdown(f"<style>\n{_css()}{extra}</style>", unsafe_allow_html=True)
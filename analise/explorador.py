@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+
+from analise.compartilhado import compartilhado
+from analise.dados import ARQUIVO_DADOS, COLUNA_DATA, carregar_dados, versao_dados
+
+# --- Explorador dos dados brutos (filtro, ordenação e paginação no servidor) ---
+# O navegador recebe só a página visível. O índice é montado uma vez por versão dos
+# dados: códigos inteiros de estação e categoria (filtro por tabela de consulta) e,
+# na primeira vez que uma coluna é usada para ordenar, a permutação que a ordena.
+# Ordenar o resultado filtrado é então selecionar posições de uma ordem pronta, em
+# O(n) e sem sort por consulta.
+POR_PAGINA = 50
+COLUNAS_CODIFICADAS = ["Estação", "Categoria"]
+
+
+class IndiceExplorador:
+    """Cópia indexada do dataset para consultas paginadas."""
+
+    def __init__(self, df):
+        self.df = df
+        self._codigos = {}
+        for coluna in COLUNAS_CODIFICADAS:
+            valores = df[coluna]
+            if not isinstance(valores.dtype, pd.CategoricalDtype):
+                valores = valores.astype("category")
+            self._codigos[coluna] = (valores.cat.codes.to_numpy(), valores.cat.categories)
+        self._ordens = {}
+
+    def __len__(self):
+        return len(self.df)
+
+    def limites(self, coluna):
+        """(mínimo, máximo) dos valores presentes, para os controles de faixa."""
+        valores = self.df[coluna].dropna()
+        return valores.min(), valores.max()
+
+    def ordem(self, coluna):
+        """(posições que ordenam `coluna` com ausentes no fim, número de valores presentes)."""
+        if coluna not in self._ordens:
+            valores = self.df[coluna]
+            if isinstance(valores.dtype, pd.CategoricalDtype):
+                # Ordem das categorias (ex.: Incidente, Medio, Longe); código -1 (ausente) por último
+                codigos = valores.cat.codes.to_numpy()
+                chave = np.where(codigos < 0, len(valores.cat.categories), codigos)
+            else:
+                # O sort do numpy já coloca NaN e NaT no fim
+                chave = valores.to_numpy()
+            self._ordens[coluna] = (np.argsort(chave, kind="stable"), int(valores.notna().sum()))
+        return self._ordens[coluna]
+
+    def mascara(self, estacoes=None, categorias=None, datas=None, metal=None, faixa=None):
+        """Linhas que passam nos filtros (None ou lista vazia = sem filtro)."""
+        mascara = np.ones(len(self), dtype=bool)
+        for coluna, escolhidos in zip(COLUNAS_CODIFICADAS, (estacoes, categorias)):
+            if escolhidos:
+                codigos, rotulos = self._codigos[coluna]
+                # Tabela de consulta por código; a posição extra (código -1) fica False
+                aceitos = np.zeros(len(rotulos) + 1, dtype=bool)
+                indices = rotulos.get_indexer(list(escolhidos))
+                aceitos[indices[indices >= 0]] = True
+                mascara &= aceitos[codigos]
+        if datas is not None:
+            inicio, fim = pd.Timestamp(datas[0]), pd.Timestamp(datas[1]) + pd.Timedelta(days=1)
+            valores = self.df[COLUNA_DATA]
+            mascara &= ((valores >= inicio) & (valores < fim)).to_numpy(dtype=bool, na_value=False)
+        if metal is not None and faixa is not None:
+            valores = self.df[metal].to_numpy()
+            mascara &= (valores >= faixa[0]) & (valores <= faixa[1])
+        return mascara
+
+    def filtrar(self, ordenar_por=None, crescente=True, **filtros):
+        """Posições das linhas filtradas, na ordem de exibição."""
+        mascara = self.mascara(**filtros)
+        if ordenar_por is None:
+            return np.flatnonzero(mascara)
+        ordem, presentes = self.ordem(ordenar_por)
+        posicoes = ordem[mascara[ordem]]
+        if not crescente:
+            # Inverte só os valores presentes: ausentes continuam no fim
+            validos = int(mascara[ordem[:presentes]].sum())
+            posicoes = np.concatenate([posicoes[:validos][::-1], posicoes[validos:]])
+        return posicoes
+
+    def pagina(self, posicoes, numero=1, por_pagina=POR_PAGINA):
+        """Linhas da página `numero` (a partir de 1) do resultado de `filtrar`."""
+        inicio = (numero - 1) * por_pagina
+        return self.df.iloc[posicoes[inicio:inicio + por_pagina]]
+
+
+@compartilhado(max_itens=4)
+def _explorador(caminho, versao):
+    return IndiceExplorador(carregar_dados(caminho))
+
+
+def carregar_explorador(caminho=ARQUIVO_DADOS):
+    """Índice do explorador para a versão atual dos dados (compartilhado entre sessões)."""
+    caminho = str(caminho)
+    return _explorador(caminho, versao_dados(caminho))
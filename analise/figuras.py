@@ -0,0 +1,89 @@
+import functools
+import io
+import threading
+
+import streamlit as st
+
+from analise import persistencia
+from analise.compartilhado import obter
+from analise.dados import ARQUIVO_DADOS, versao_dados
+from analise.graficos import bibliotecas
+from analise.instrumentacao import etapa
+
+FORMATO_INTERATIVO = "plotly"
+BACKENDS = ["Interativo", "Estático (PNG)"]
+MAX_FIGURAS = 256
+
+# O pyplot mantém estado global: uma renderização por vez
+_trava_render = threading.Lock()
+
+
+def _converter(construtor, formato):
+    """Bytes PNG/SVG da figura matplotlib, ou a própria figura Plotly."""
+    if formato == FORMATO_INTERATIVO:
+        # Figuras Plotly não têm estado global: dispensam a trava de renderização
+        return construtor()
+    # Backend sem interface gráfica: as figuras só são convertidas em bytes
+    plt, _ = bibliotecas()
+    with _trava_render:
+        fig = construtor()
+        try:
+            buffer = io.BytesIO()
+            fig.savefig(buffer, format=formato, bbox_inches="tight")
+        finally:
+            # Fecha explicitamente para não acumular figuras no processo do servidor
+            plt.close(fig)
+    return buffer.getvalue()
+
+
+def _persistir(chave, calcular):
+    # Em disco, a versão dos dados dá lugar ao hash do conteúdo da planilha
+    versao, *parametros = chave
+    chave_persistente = persistencia.chave_dos_dados(ARQUIVO_DADOS, versao, tuple(parametros))
+    return persistencia.memorizar("figuras", chave_persistente, calcular)
+
+
+def renderizar(tipo, construtor, metal=None, formato="png", versao=None, **parametros):
+    """Bytes da figura identificada por (versão dos dados, metal, tipo, parâmetros).
+
+    `construtor` só é chamado quando a figura não está no cache.
+    """
+    versao = versao_dados() if versao is None else versao
+    chave = (versao, metal, tipo, tuple(sorted(parametros.items())), formato)
+
+    # Resultados compartilhados: sessões que pedem a mesma figura ao mesmo tempo
+    # esperam uma única renderização; depois de um reinício, a figura vem do disco
+    calcular = functools.partial(_persistir, chave, functools.partial(_converter, construtor, formato))
+    with etapa(f"gráfico: {tipo}", cache=True):
+        return obter("figuras", chave, calcular, MAX_FIGURAS)
+
+
+def interativo(nome, *args, **kwargs):
+    """Construtor que monta a figura `nome` de analise.graficos_interativos.
+
+    O módulo (e com ele o Plotly) só é importado quando a figura interativa é
+    realmente montada, como o matplotlib em analise.graficos.
+    """
+    def construir():
+        from analise import graficos_interativos
+
+        return getattr(graficos_interativos, nome)(*args, **kwargs)
+    return construir
+
+
+def escolher_backend():
+    """Seletor do tipo de gráfico na barra lateral (interativo por padrão)."""
+    return st.sidebar.radio("Gráficos:", BACKENDS, key="backend_graficos")
+
+
+def exibir(tipo, estatico, figura_interativa=None, metal=None, **parametros):
+    """Mostra a figura no backend escolhido em `escolher_backend`.
+
+    `estatico` monta a figura matplotlib e `figura_interativa` a Plotly; sem versão
+    interativa, o PNG é usado em qualquer caso. As duas ficam no mesmo cache.
+    """
+    if figura_interativa is not None and st.session_state.get("backend_graficos", BACKENDS[0]) == BACKENDS[0]:
+        fig = renderizar(tipo, figura_interativa, metal=metal, formato=FORMATO_INTERATIVO, **parametros)
+        st.plotly_chart(fig, config={"displaylogo": False})
+    else:
+        st.image(renderizar(tipo, estatico, metal=metal, **parametros), use_container_width=True)
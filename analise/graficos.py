@@ -0,0 +1,254 @@
+import numpy as np
+
+from analise.kde import LIMIAR_KDE_RAPIDO, kde
+
+# --- Construtores das figuras usadas nas páginas ---
+# Cada função apenas monta e devolve a figura; a renderização e o fechamento
+# ficam a cargo de analise.figuras. matplotlib e seaborn só são importados no
+# primeiro gráfico desenhado (páginas servidas do cache não pagam a importação).
+
+
+def bibliotecas():
+    """(pyplot, seaborn), com o backend sem interface gráfica."""
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    return plt, sns
+
+
+def histograma_com_kde(valores, ax, bins="auto", color=None):
+    """Equivalente a sns.histplot(kde=True), trocando a KDE exata pela binada em amostras grandes."""
+    _, sns = bibliotecas()
+    if len(valores) < LIMIAR_KDE_RAPIDO:
+        sns.histplot(valores, kde=True, bins=bins, ax=ax, color=color)
+        return
+
+    dados = np.asarray(valores, dtype=float)
+    dados = dados[np.isfinite(dados)]
+    arestas = np.histogram_bin_edges(dados, bins)
+    sns.histplot(dados, bins=arestas, ax=ax, color=color)
+
+    # Mesma escala do seaborn: densidade × n × largura do bin, grade sem extrapolação (cut=0)
+    grade = np.linspace(dados.min(), dados.max(), 200)
+    densidade = kde(dados, grade)
+    cor = ax.patches[-1].get_facecolor()[:3]
+    ax.plot(grade, densidade * len(dados) * (arestas[1] - arestas[0]), color=cor)
+
+
+def grafico_ic_categorias(estat, metal, limite):
+    plt, _ = bibliotecas()
+    fig, ax = plt.subplots(figsize=(8, 5))
+    x = range(len(estat))
+    # Barras assimétricas: servem tanto ao IC t-Student quanto ao IC bootstrap
+    yerr = [estat['Média'] - estat['IC inferior'], estat['IC superior'] - estat['Média']]
+    ax.errorbar(x, estat['Média'], yerr=yerr, fmt='o',
+                color='black', capsize=6, markersize=6, linewidth=1.5)
+    ax.set_xticks(x)
+    ax.set_xticklabels(estat['Categoria'])
+    ax.set_ylabel(f'Concentração de {metal} (mg/L)')
+    ax.axhline(limite, color='red', linestyle='--', label=f'Limite Máx. ({limite} mg/L)')
+    ax.set_title(f'{metal} – Intervalo de Confiança 95% por Categoria')
+    ax.grid(axis='y', linestyle='--', alpha=0.3)
+    ax.legend()
+    return fig
+
+
+def _barras_contadas(ax, arestas, contagens, grade, curva, color=None):
+    """Histograma de contagens já calculadas, com a mesma aparência de `histograma_com_kde`."""
+    _, sns = bibliotecas()
+    # Arestas em lista: com pesos, o seaborn compara `bins` com "auto"
+    sns.histplot(x=(arestas[:-1] + arestas[1:]) / 2, weights=contagens, bins=list(arestas), ax=ax, color=color)
+    if curva is not None:
+        ax.plot(grade, curva, color=ax.patches[-1].get_facecolor()[:3])
+
+
+def histograma_ic(valores, media, ic_min, ic_max, titulo, cor):
+    plt, _ = bibliotecas()
+    fig, ax = plt.subplots()
+    histograma_com_kde(valores, ax, color=cor)
+    _linhas_ic(ax, media, ic_min, ic_max, titulo)
+    return fig
+
+
+def histograma_ic_contado(contado, media, ic_min, ic_max, titulo, cor):
+    """`histograma_ic` a partir de (arestas, contagens, grade, curva) de um esboço."""
+    plt, _ = bibliotecas()
+    fig, ax = plt.subplots()
+    _barras_contadas(ax, *contado, color=cor)
+    _linhas_ic(ax, media, ic_min, ic_max, titulo)
+    return fig
+
+
+def _linhas_ic(ax, media, ic_min, ic_max, titulo):
+    ax.axvline(ic_min, color='red', linestyle='--', label='IC Min')
+    ax.axvline(ic_max, color='red', linestyle='--', label='IC Max')
+    ax.axvline(media, color='green', linestyle='-', label='Média')
+    ax.set_title(titulo)
+    ax.legend()
+
+
+# Mesma aparência do seaborn (cores dessaturadas a 75%, linhas em cinza derivado da
+# paleta), mas caixas e violinos são desenhados a partir de esbocos.Distribuicao por
+# grupo, que valem tanto para os dados em memória quanto para resumos particionados.
+SATURACAO = 0.75
+LARGURA_GRUPO = 0.8
+
+
+def _cores(paleta, n):
+    """(cores das figuras, cor das linhas) como no seaborn."""
+    from colorsys import rgb_to_hls
+
+    _, sns = bibliotecas()
+    cores = sns.color_palette(paleta, n) if paleta else [sns.color_palette()[0]] * n
+    cores = [sns.desaturate(cor, SATURACAO) for cor in cores]
+    cinza = min(rgb_to_hls(*cor)[1] for cor in cores) * 0.6 if cores else 0.0
+    return cores, (cinza, cinza, cinza)
+
+
+def _eixo_grupos(ax, grupos, titulo, xlabel, ylabel):
+    ax.set_xticks(range(len(grupos)))
+    ax.set_xticklabels([str(g) for g in grupos])
+    ax.set_xlim(-0.5, len(grupos) - 0.5)
+    ax.set_title(titulo)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+
+
+def caixas(ax, distribuicoes, paleta=None):
+    """Boxplot de {grupo: Distribuicao}, como sns.boxplot (bigodes a 1,5 × IQR)."""
+    estatisticas = [d.caixa(str(g)) for g, d in distribuicoes.items()]
+    cores, cor_linhas = _cores(paleta, len(estatisticas))
+    linhas = {"color": cor_linhas}
+    desenho = ax.bxp(estatisticas, positions=range(len(estatisticas)), widths=LARGURA_GRUPO,
+                     patch_artist=True, medianprops=linhas, whiskerprops=linhas, capprops=linhas,
+                     flierprops={"markeredgecolor": cor_linhas}, boxprops={"edgecolor": cor_linhas})
+    for caixa, cor in zip(desenho["boxes"], cores):
+        caixa.set_facecolor(cor)
+
+
+def violinos(ax, distribuicoes, paleta=None):
+    """Violinos de {grupo: Distribuicao}, como sns.violinplot com caixa interna.
+
+    Cada violino é escalado pelo próprio pico, como o seaborn faz quando cada
+    categoria recebe uma cor da paleta.
+    """
+    plt, _ = bibliotecas()
+    espessura = 1.25 * plt.rcParams["patch.linewidth"]
+    largura_caixa = espessura * 4.5
+    cores, cor_linhas = _cores(paleta, len(distribuicoes))
+    for x, (distribuicao, cor) in enumerate(zip(distribuicoes.values(), cores)):
+        forma, caixa = distribuicao.violino(), distribuicao.caixa()
+        meia = np.nan_to_num(forma["vals"]) / np.nanmax(forma["vals"]) * LARGURA_GRUPO / 2
+        ax.fill_betweenx(forma["coords"], x - meia, x + meia, facecolor=cor,
+                         edgecolor=cor_linhas, linewidth=espessura)
+        ax.plot([x, x], [caixa["whislo"], caixa["whishi"]], color=cor_linhas, linewidth=largura_caixa / 3)
+        ax.plot([x, x], [caixa["q1"], caixa["q3"]], color=cor_linhas, linewidth=largura_caixa)
+        ax.plot([x], [caixa["med"]], marker="_", markersize=largura_caixa / 1.2,
+                markeredgewidth=largura_caixa / 5, color="w")
+
+
+def boxplot_violin(distribuicoes, metal):
+    """Boxplot e violino de `metal` por categoria, de {Categoria: Distribuicao}."""
+    plt, _ = bibliotecas()
+    fig, axs = plt.subplots(1, 2, figsize=(14, 6))
+    caixas(axs[0], distribuicoes, 'Pastel1')
+    _eixo_grupos(axs[0], list(distribuicoes), f'Boxplot - {metal.title()} por Categoria',
+                 'Categoria', metal.upper())
+
+    violinos(axs[1], distribuicoes, 'Pastel2')
+    _eixo_grupos(axs[1], list(distribuicoes), f'Violin Plot - {metal.title()} por Categoria',
+                 'Categoria', metal.upper())
+
+    fig.tight_layout()
+    return fig
+
+
+def boxplot_categorias(distribuicoes, metal):
+    plt, _ = bibliotecas()
+    fig, ax = plt.subplots()
+    caixas(ax, distribuicoes)
+    _eixo_grupos(ax, list(distribuicoes), "", "Categoria", metal)
+    return fig
+
+
+def barras_incidentes(freq_incidentes):
+    plt, sns = bibliotecas()
+    # Com Estação categórica, value_counts lista também as estações sem incidentes
+    freq_incidentes = freq_incidentes[freq_incidentes > 0]
+    freq_incidentes.index = freq_incidentes.index.astype(str)
+    fig, ax = plt.subplots()
+    sns.barplot(x=freq_incidentes.index, y=freq_incidentes.values, ax=ax)
+    ax.set_ylabel("Número de Incidentes")
+    ax.set_xlabel("Estação")
+    ax.set_title("Incidentes por Estação")
+    return fig
+
+
+def histograma_metal(valores, metal):
+    plt, _ = bibliotecas()
+    fig, ax = plt.subplots()
+    histograma_com_kde(valores, ax, bins=30)
+    ax.set_xlabel(metal)
+    ax.set_ylabel("Frequência")
+    return fig
+
+
+def histograma_contado(arestas, contagens, grade, curva, metal):
+    """Mesmo gráfico de `histograma_metal` a partir de contagens já calculadas (Resumo.histograma_com_kde)."""
+    plt, _ = bibliotecas()
+    fig, ax = plt.subplots()
+    _barras_contadas(ax, arestas, contagens, grade, curva)
+    ax.set_xlabel(metal)
+    ax.set_ylabel("Frequência")
+    return fig
+
+
+def grafico_serie_temporal(serie, metal, limite, grupo, coluna_data):
+    plt, _ = bibliotecas()
+    fig, ax = plt.subplots(figsize=(10, 5))
+    for nome, dados in serie.groupby(grupo, observed=True, sort=False):
+        dados = dados[dados['n'] > 0]
+        linha, = ax.plot(dados[coluna_data], dados['Média (móvel)'], label=f'{nome} (média móvel)')
+        ax.fill_between(dados[coluna_data], dados['IC inferior (móvel)'], dados['IC superior (móvel)'],
+                        color=linha.get_color(), alpha=0.2)
+        ax.scatter(dados[coluna_data], dados['Média'], color=linha.get_color(), s=12, alpha=0.6)
+    ax.axhline(limite, color='red', linestyle='--', label=f'Limite Máx. ({limite} mg/L)')
+    ax.set_ylabel(f'Concentração de {metal} (mg/L)')
+    ax.set_title(f'{metal} – Evolução temporal por {grupo}')
+    ax.grid(axis='y', linestyle='--', alpha=0.3)
+    ax.legend()
+    return fig
+
+
+def perfil_espacial(perfil, gradiente, metal, limite, arestas):
+    """Média e IC 95% de cada estação pelo km no rio, com a reta do gradiente e os trechos."""
+    plt, _ = bibliotecas()
+    fig, ax = plt.subplots(figsize=(10, 5))
+    km = perfil['Km'].to_numpy()
+    if len(km):
+        # Trechos alternados ao fundo, só na faixa de km com estações
+        for i, (inicio, fim) in enumerate(zip(arestas[:-1], arestas[1:])):
+            inicio, fim = max(inicio, km.min() - 20), min(fim, km.max() + 20)
+            if inicio < fim and i % 2 == 0:
+                ax.axvspan(inicio, fim, color='#ede6fa', alpha=0.6, zorder=0)
+
+    yerr = [perfil['Média'] - perfil['IC inferior'], perfil['IC superior'] - perfil['Média']]
+    ax.errorbar(km, perfil['Média'], yerr=yerr, fmt='o', color='black', capsize=5, markersize=6, linewidth=1.2)
+    for estacao, x, y in zip(perfil['Estação'], km, perfil['Média']):
+        ax.annotate(estacao, (x, y), textcoords='offset points', xytext=(5, 5), fontsize=8)
+
+    if len(gradiente) and len(km) > 1:
+        linha = gradiente.iloc[0]
+        grade = np.array([km.min(), km.max()])
+        ax.plot(grade, linha['Média no km 0 (mg/L)'] + linha['Gradiente (mg/L por 100 km)'] * grade / 100,
+                color='mediumpurple', linestyle='-', label=f"Gradiente ({linha['Gradiente (mg/L por 100 km)']:.3g} mg/L por 100 km)")
+    ax.axhline(limite, color='red', linestyle='--', label=f'Limite Máx. ({limite} mg/L)')
+    ax.set_xlabel('Distância de Fundão pelo rio (km, aproximada)')
+    ax.set_ylabel(f'Concentração de {metal} (mg/L)')
+    ax.set_title(f'{metal} – Perfil ao longo do rio')
+    ax.grid(axis='y', linestyle='--', alpha=0.3)
+    ax.legend()
+    return fig
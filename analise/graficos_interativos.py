@@ -0,0 +1,154 @@
+import numpy as np
+import plotly.graph_objects as go
+from plotly.colors import hex_to_rgb, qualitative
+
+from analise.kde import kde
+from analise.reducao import lttb, min_max
+
+# --- Versões interativas (Plotly) dos gráficos de distribuição e de séries ---
+# Linhas e pontos usam traços WebGL (Scattergl). Nada é enviado ao navegador em
+# proporção ao tamanho da base: histogramas chegam já contados em no máximo
+# MAX_BINS barras e as séries passam por analise.reducao antes de virar traço.
+MAX_BINS = 200
+CORES = qualitative.Plotly
+_LAYOUT = dict(template="plotly_white", margin=dict(l=10, r=10, t=50, b=10), hovermode="closest")
+
+
+def _transparente(cor, alpha):
+    r, g, b = hex_to_rgb(cor)
+    return f"rgba({r},{g},{b},{alpha})"
+
+
+def _histograma_com_kde(fig, valores, bins="auto", cor=None):
+    """Barras pré-contadas no servidor e curva de densidade na mesma escala (contagens)."""
+    dados = np.asarray(valores, dtype=float)
+    dados = dados[np.isfinite(dados)]
+    if dados.size == 0:
+        return
+    arestas = np.histogram_bin_edges(dados, bins)
+    if len(arestas) > MAX_BINS + 1:
+        arestas = np.histogram_bin_edges(dados, MAX_BINS)
+    contagens, arestas = np.histogram(dados, arestas)
+    grade = densidade = None
+    if dados.size > 1 and dados.min() < dados.max():
+        grade = np.linspace(dados.min(), dados.max(), 200)
+        densidade = kde(dados, grade) * dados.size * (arestas[1] - arestas[0])
+    _barras_com_curva(fig, arestas, contagens, grade, densidade, cor)
+
+
+def _barras_com_curva(fig, arestas, contagens, grade, curva, cor=None):
+    fig.add_trace(go.Bar(x=(arestas[:-1] + arestas[1:]) / 2, y=contagens, width=np.diff(arestas),
+                         marker_color=cor, opacity=0.6, name="Frequência"))
+    if curva is not None:
+        fig.add_trace(go.Scattergl(x=grade, y=curva, mode="lines", line=dict(color=cor), name="KDE"))
+
+
+def histograma_ic(valores, media, ic_min, ic_max, titulo, cor):
+    fig = go.Figure()
+    _histograma_com_kde(fig, valores, cor=cor)
+    return _linhas_ic(fig, media, ic_min, ic_max, titulo)
+
+
+def histograma_ic_contado(contado, media, ic_min, ic_max, titulo, cor):
+    """`histograma_ic` a partir de (arestas, contagens, grade, curva) de um esboço."""
+    fig = go.Figure()
+    _barras_com_curva(fig, *contado, cor=cor)
+    return _linhas_ic(fig, media, ic_min, ic_max, titulo)
+
+
+def _linhas_ic(fig, media, ic_min, ic_max, titulo):
+    fig.add_vline(ic_min, line=dict(color="red", dash="dash"), annotation_text="IC Min")
+    fig.add_vline(ic_max, line=dict(color="red", dash="dash"), annotation_text="IC Max")
+    fig.add_vline(media, line=dict(color="green"), annotation_text="Média")
+    fig.update_layout(title=titulo, showlegend=False, bargap=0, **_LAYOUT)
+    return fig
+
+
+def histograma_metal(valores, metal):
+    fig = go.Figure()
+    _histograma_com_kde(fig, valores, bins=30, cor=CORES[0])
+    fig.update_layout(xaxis_title=metal, yaxis_title="Frequência", showlegend=False, bargap=0, **_LAYOUT)
+    return fig
+
+
+def histograma_contado(arestas, contagens, grade, curva, metal):
+    """Mesmo gráfico de `histograma_metal` a partir de contagens já calculadas (Resumo.histograma_com_kde)."""
+    fig = go.Figure()
+    _barras_com_curva(fig, arestas, contagens, grade, curva, cor=CORES[0])
+    fig.update_layout(xaxis_title=metal, yaxis_title="Frequência", showlegend=False, bargap=0, **_LAYOUT)
+    return fig
+
+
+def grafico_serie_temporal(serie, metal, limite, grupo, coluna_data, amostras=None):
+    """Média móvel com faixa do IC por grupo; `amostras` (opcional) sobrepõe as medições individuais."""
+    fig = go.Figure()
+    # Amostras separadas por grupo numa única passada (não uma máscara por grupo)
+    amostras_por_grupo = {} if amostras is None else dict(
+        tuple(amostras.dropna(subset=[coluna_data, metal]).groupby(grupo, observed=True, sort=False)))
+    for i, (nome, dados) in enumerate(serie.groupby(grupo, observed=True, sort=False)):
+        cor = CORES[i % len(CORES)]
+        dados = dados[(dados["n"] > 0) & dados["Média (móvel)"].notna()].sort_values(coluna_data)
+        dados = dados.iloc[lttb(dados[coluna_data], dados["Média (móvel)"])]
+
+        # Faixa do IC: limite inferior seguido do superior preenchendo até o anterior
+        fig.add_trace(go.Scattergl(x=dados[coluna_data], y=dados["IC inferior (móvel)"], mode="lines",
+                                   line=dict(width=0), legendgroup=str(nome), showlegend=False,
+                                   hoverinfo="skip"))
+        fig.add_trace(go.Scattergl(x=dados[coluna_data], y=dados["IC superior (móvel)"], mode="lines",
+                                   line=dict(width=0), fill="tonexty", fillcolor=_transparente(cor, 0.2),
+                                   legendgroup=str(nome), showlegend=False, hoverinfo="skip"))
+        fig.add_trace(go.Scattergl(x=dados[coluna_data], y=dados["Média (móvel)"], mode="lines",
+                                   line=dict(color=cor), legendgroup=str(nome),
+                                   name=f"{nome} (média móvel)"))
+        fig.add_trace(go.Scattergl(x=dados[coluna_data], y=dados["Média"], mode="markers",
+                                   marker=dict(color=cor, size=5, opacity=0.6), legendgroup=str(nome),
+                                   name=f"{nome} (média do período)"))
+
+        if nome in amostras_por_grupo:
+            pontos = amostras_por_grupo[nome].sort_values(coluna_data)
+            pontos = pontos.iloc[min_max(pontos[coluna_data], pontos[metal])]
+            fig.add_trace(go.Scattergl(x=pontos[coluna_data], y=pontos[metal], mode="markers",
+                                       marker=dict(color=cor, size=3, opacity=0.35), legendgroup=str(nome),
+                                       name=f"{nome} (amostras)"))
+
+    fig.add_hline(limite, line=dict(color="red", dash="dash"), annotation_text=f"Limite Máx. ({limite} mg/L)")
+    fig.update_layout(title=f"{metal} – Evolução temporal por {grupo}",
+                      yaxis_title=f"Concentração de {metal} (mg/L)", **_LAYOUT)
+    return fig
+
+
+def pontos_enviados(fig):
+    """Total de pontos nos traços da figura (o que o navegador recebe)."""
+    return sum(len(traco.x) for traco in fig.data if traco.x is not None)
+
+
+def perfil_espacial(perfil, gradiente, metal, limite, arestas):
+    """Média e IC por estação ao longo do rio, com a reta do gradiente e os trechos ao fundo."""
+    fig = go.Figure()
+    km = perfil["Km"].to_numpy()
+    if len(km):
+        for i, (inicio, fim) in enumerate(zip(arestas[:-1], arestas[1:])):
+            inicio, fim = max(inicio, km.min() - 20), min(fim, km.max() + 20)
+            if inicio < fim and i % 2 == 0:
+                fig.add_vrect(inicio, fim, fillcolor="#ede6fa", opacity=0.6, line_width=0, layer="below")
+
+    fig.add_trace(go.Scattergl(
+        x=km, y=perfil["Média"], mode="markers+text", text=perfil["Estação"], textposition="top right",
+        marker=dict(color="black", size=8), name="Média por estação",
+        error_y=dict(type="data", symmetric=False, array=perfil["IC superior"] - perfil["Média"],
+                     arrayminus=perfil["Média"] - perfil["IC inferior"]),
+        customdata=np.column_stack([perfil["n"], perfil["Trecho"].astype(str)]),
+        hovertemplate="%{text}<br>km %{x:g} (%{customdata[1]})<br>Média %{y:.4g} mg/L<br>n = %{customdata[0]}",
+    ))
+    if len(gradiente) and len(km) > 1:
+        linha = gradiente.iloc[0]
+        grade = np.array([km.min(), km.max()])
+        fig.add_trace(go.Scattergl(
+            x=grade, y=linha["Média no km 0 (mg/L)"] + linha["Gradiente (mg/L por 100 km)"] * grade / 100,
+            mode="lines", line=dict(color=CORES[0]),
+            name=f"Gradiente ({linha['Gradiente (mg/L por 100 km)']:.3g} mg/L por 100 km)",
+        ))
+    fig.add_hline(limite, line=dict(color="red", dash="dash"), annotation_text=f"Limite Máx. ({limite} mg/L)")
+    fig.update_layout(title=f"{metal} – Perfil ao longo do rio", xaxis_title="Distância de Fundão pelo rio (km, aproximada)",
+                      yaxis_title=f"Concentração de {metal} (mg/L)", **_LAYOUT)
+    return fig
@@ -0,0 +1,65 @@
+import functools
+import os
+import tempfile
+from pathlib import Path
+
+from PIL import Image
+
+from analise.dados import RAIZ
+
+# --- Miniaturas pré-redimensionadas das imagens das páginas ---
+# As fotos são exibidas com largura fixa; enviar o arquivo original faz o servidor
+# ler e o navegador baixar e reduzir a imagem inteira a cada visita. A miniatura
+# é gerada uma vez em .cache/imagens (ou no build, com `python -m analise.imagens`)
+# e refeita só quando a imagem original muda.
+DIRETORIO_IMAGENS = RAIZ / "images"
+DIRETORIO_MINIATURAS = RAIZ / ".cache" / "imagens"
+LARGURA_PADRAO = 300
+DENSIDADE = 2  # pixels por pixel de tela, para telas de alta resolução
+QUALIDADE_JPEG = 85
+
+
+def caminho_miniatura(origem, largura=LARGURA_PADRAO):
+    return DIRETORIO_MINIATURAS / f"{Path(origem).stem}-{largura}.jpg"
+
+
+def gerar_miniatura(origem, largura=LARGURA_PADRAO, forcar=False):
+    """Grava a miniatura de `origem` (se a atual estiver ausente ou desatualizada) e devolve o caminho."""
+    origem = RAIZ / origem
+    destino = caminho_miniatura(origem, largura)
+    if not forcar and destino.exists() and destino.stat().st_mtime_ns >= origem.stat().st_mtime_ns:
+        return destino
+
+    with Image.open(origem) as imagem:
+        if imagem.width <= largura * DENSIDADE:
+            # Já cabe na largura exibida: recodificar só aumentaria o arquivo
+            return origem
+        imagem = imagem.convert("RGB")
+        imagem.thumbnail((largura * DENSIDADE, imagem.height), Image.LANCZOS)
+
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        fd, temporario = tempfile.mkstemp(dir=destino.parent, suffix=".tmp")
+        os.close(fd)
+        try:
+            imagem.save(temporario, "JPEG", quality=QUALIDADE_JPEG, optimize=True, progressive=True)
+            os.replace(temporario, destino)
+        finally:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+    return destino
+
+
+@functools.lru_cache(maxsize=32)
+def _bytes(origem, largura, mtime):
+    return gerar_miniatura(origem, largura).read_bytes()
+
+
+def miniatura(origem, largura=LARGURA_PADRAO):
+    """Bytes JPEG da miniatura, guardados em memória enquanto a imagem original não mudar."""
+    return _bytes(str(origem), largura, (RAIZ / origem).stat().st_mtime_ns)
+
+
+if __name__ == "__main__":
+    for imagem in sorted(DIRETORIO_IMAGENS.glob("*.jpg")):
+        destino = gerar_miniatura(imagem, forcar=True)
+        print(f"{imagem.name} ({imagem.stat().st_size} B) -> {destino} ({destino.stat().st_size} B)")
@@ -0,0 +1,313 @@
+import argparse
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from analise import cache_colunar
+from analise.dados import (ARQUIVO_DADOS, COLUNA_DATA, COLUNAS_TEXTO, METAIS, RAIZ, compactar,
+                           normalizar_colunas)
+from analise.limites import NORMA_PADRAO, excedencias, versao_limites
+
+# --- Ingestão incremental de novas amostras ---
+# Arquivos CSV/Excel colocados em DIRETORIO_ENTRADA são convertidos em lotes Feather,
+# cada um uma partição própria gravada uma única vez: o custo de ingerir depende só do
+# tamanho do lote. As estatísticas por grupo (n, média, M2 de Welford e excedências)
+# são combinadas com as do lote, sem reprocessar o histórico. Os leitores juntam a
+# planilha e as partições mapeadas em memória (`ler_com_lotes`). O arquivo de
+# estatísticas guarda nos metadados o estado (planilha base, lotes e tabela de limites)
+# de que foi gerado; se a planilha base ou os limites mudarem, é refeito uma vez.
+DIRETORIO_ENTRADA = RAIZ / "dados" / "novos"
+EXTENSOES = {".csv", ".xlsx", ".xls"}
+CHAVES = ["Categoria", "Estação", "Metal"]
+COLUNAS_OBRIGATORIAS = COLUNAS_TEXTO + [COLUNA_DATA] + METAIS
+_CHAVE_ESTADO = b"estado"
+
+_trava = threading.Lock()
+
+
+def diretorio_lotes(origem=ARQUIVO_DADOS):
+    return cache_colunar.DIRETORIO_CACHE / "lotes" / Path(origem).stem
+
+
+def _caminho_manifesto(origem):
+    return diretorio_lotes(origem) / "manifesto.json"
+
+
+def _caminho_estatisticas(origem):
+    return diretorio_lotes(origem) / "estatisticas.feather"
+
+
+def _assinatura(caminho):
+    info = os.stat(caminho)
+    return f"{info.st_mtime_ns}:{info.st_size}"
+
+
+def _ler_manifesto(origem):
+    caminho = _caminho_manifesto(origem)
+    if not caminho.exists():
+        return {"arquivos": {}}
+    return json.loads(caminho.read_text(encoding="utf-8"))
+
+
+def _gravar_manifesto(origem, manifesto):
+    caminho = _caminho_manifesto(origem)
+    temporario = caminho.with_suffix(".tmp")
+    temporario.write_text(json.dumps(manifesto, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(temporario, caminho)
+
+
+def versao_lotes(origem=ARQUIVO_DADOS):
+    """Parte da versão dos dados que muda a cada lote ingerido ('' se não houver lotes)."""
+    caminho = _caminho_manifesto(origem)
+    return _assinatura(caminho) if caminho.exists() else ""
+
+
+def caminhos_lotes(origem=ARQUIVO_DADOS):
+    """Arquivos Feather dos lotes já ingeridos, na ordem de chegada."""
+    pasta = diretorio_lotes(origem)
+    return [pasta / item["lote"] for item in _ler_manifesto(origem)["arquivos"].values()]
+
+
+def ler_lotes(origem=ARQUIVO_DADOS, manifesto=None):
+    """Lotes já ingeridos, na ordem de chegada, lidos por mapeamento de memória."""
+    manifesto = _ler_manifesto(origem) if manifesto is None else manifesto
+    pasta = diretorio_lotes(origem)
+    return [
+        feather.read_table(pasta / item["lote"], memory_map=True).to_pandas()
+        for item in manifesto["arquivos"].values()
+    ]
+
+
+def _estado_estatisticas(origem, manifesto):
+    # Planilha base, lotes (na ordem de chegada) e limites de que as estatísticas foram geradas
+    return json.dumps([_assinatura(origem), manifesto["arquivos"], versao_limites()], ensure_ascii=False).encode()
+
+
+def _ler_derivado(caminho, estado):
+    """Conteúdo de um arquivo derivado de `estado`, ou None se faltar ou estiver velho."""
+    try:
+        tabela = feather.read_table(caminho, memory_map=True)
+    except (OSError, pa.ArrowInvalid):
+        return None
+    if (tabela.schema.metadata or {}).get(_CHAVE_ESTADO) != estado:
+        return None
+    return tabela.to_pandas()
+
+
+def ler_com_lotes(origem=ARQUIVO_DADOS):
+    """Planilha + lotes ingeridos num só DataFrame compactado, ou None se não houver lotes.
+
+    As partições (cache colunar da planilha e um Feather por lote) são lidas por
+    mapeamento de memória e juntadas só na leitura, uma vez por versão dos dados
+    (`dados.carregar_dados` guarda o resultado).
+    """
+    manifesto = _ler_manifesto(origem)
+    if not manifesto["arquivos"]:
+        return None
+    partes = [cache_colunar.ler(origem, normalizar_colunas), *ler_lotes(origem, manifesto)]
+    # Compacta depois de juntar: categorias diferentes em cada parte fariam o concat voltar para object
+    return compactar(pd.concat(partes, ignore_index=True))
+
+
+# ---------------------
+# Estatísticas incrementais
+# ---------------------
+def agregar(df, norma=NORMA_PADRAO):
+    """n, média, M2 e excedências por (Categoria, Estação, Metal) de um bloco de linhas.
+
+    Linhas sem categoria ou estação formam grupos próprios (chave ausente): entram no
+    total geral, como no cubo de estatísticas.
+    """
+    metais = [m for m in METAIS if m in df.columns]
+    # Momentos acumulados em float64 (metais compactados em float32); as excedências
+    # comparam no tipo original da coluna, como em analise.limites.excedencias
+    valores = df.astype({m: "float64" for m in metais if df[m].dtype != "float64"})
+    grupos = valores.groupby(["Categoria", "Estação"], observed=True, dropna=False)
+    agregado = grupos[metais].agg(["count", "mean", "var"])
+    agregado.columns = agregado.columns.set_names(["Metal", None])
+    longo = agregado.stack(level="Metal", future_stack=True)
+
+    acima = excedencias(df, metais, norma).groupby([df["Categoria"], df["Estação"]], observed=True, dropna=False).sum()
+    acima.columns.name = "Metal"
+
+    n = longo["count"].astype("int64")
+    return pd.DataFrame({
+        "n": n,
+        "Média": longo["mean"].fillna(0.0),
+        "M2": (longo["var"] * (n - 1)).fillna(0.0),
+        "Excedências": acima.stack(future_stack=True).astype("int64"),
+    }).reset_index()
+
+
+def combinar(atual, novo, chaves=CHAVES):
+    """Combina estatísticas de dois blocos (fórmula de Chan para média e M2)."""
+    a = atual.set_index(chaves)
+    b = novo.set_index(chaves)
+    indice = a.index.union(b.index)
+    a = a.reindex(indice, fill_value=0)
+    b = b.reindex(indice, fill_value=0)
+
+    n = a["n"] + b["n"]
+    delta = b["Média"] - a["Média"]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        peso = (b["n"] / n).fillna(0.0)
+        media = a["Média"] + delta * peso
+        m2 = a["M2"] + b["M2"] + (delta ** 2 * a["n"] * peso).fillna(0.0)
+    return pd.DataFrame({
+        "n": n,
+        "Média": media,
+        "M2": m2,
+        "Excedências": a["Excedências"] + b["Excedências"],
+    }).reset_index()
+
+
+def reagrupar(estatisticas, chaves):
+    """n, Média, M2 e Excedências por `chaves` + Metal, juntando os grupos de `agregar`.
+
+    Chan para vários grupos: M2 = Σ M2 do grupo + Σ n (média do grupo − média total)².
+    Grupos sem valores (n = 0) ficam com média NaN.
+    """
+    por = chaves + ["Metal"]
+    grupos = estatisticas.assign(_soma=estatisticas["n"] * estatisticas["Média"])
+    somas = grupos.groupby(por, observed=True)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        media = (somas["_soma"].transform("sum") / somas["n"].transform("sum")).fillna(0.0)
+    grupos["M2"] = grupos["M2"] + grupos["n"] * (grupos["Média"] - media) ** 2
+    tabela = grupos.groupby(por, observed=True)[["n", "_soma", "M2", "Excedências"]].sum().reset_index()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        tabela["Média"] = tabela["_soma"] / tabela["n"].where(tabela["n"] > 0)
+    return tabela[por + ["n", "Média", "M2", "Excedências"]]
+
+
+def versao_estatisticas(origem=ARQUIVO_DADOS):
+    """Identifica as estatísticas atuais (planilha base, lotes e tabela de limites)."""
+    return _estado_estatisticas(origem, _ler_manifesto(origem)).decode()
+
+
+def carregar_estatisticas(origem=ARQUIVO_DADOS):
+    """Estatísticas por (Categoria, Estação, Metal) da planilha + lotes, com a Variância amostral.
+
+    Lidas do arquivo mantido pela ingestão; só são recalculadas (e regravadas) se a
+    planilha base, os lotes ou a tabela de limites mudaram desde a última gravação.
+    """
+    with _trava:
+        manifesto = _ler_manifesto(origem)
+        estado = _estado_estatisticas(origem, manifesto)
+        estat = _ler_derivado(_caminho_estatisticas(origem), estado)
+        if estat is None:
+            estat = _recalcular(origem, manifesto)
+            _gravar_estatisticas(origem, estat, estado)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        estat["Variância"] = estat["M2"] / (estat["n"] - 1).where(estat["n"] > 1)
+    return estat
+
+
+def _gravar_estatisticas(origem, estatisticas, estado):
+    cache_colunar.gravar(estatisticas[CHAVES + ["n", "Média", "M2", "Excedências"]],
+                         _caminho_estatisticas(origem), {_CHAVE_ESTADO: estado})
+
+
+# ---------------------
+# Ingestão
+# ---------------------
+def _ler_arquivo(caminho):
+    if caminho.suffix.lower() == ".csv":
+        return pd.read_csv(caminho, sep=None, engine="python")
+    return pd.read_excel(caminho)
+
+
+def validar_lote(df, nome):
+    """Erro se faltar no lote (já normalizado) alguma coluna do dataset."""
+    faltando = [coluna for coluna in COLUNAS_OBRIGATORIAS if coluna not in df.columns]
+    if faltando:
+        raise ValueError(f"{nome}: colunas ausentes no lote: {faltando}")
+
+
+def novos_arquivos(origem=ARQUIVO_DADOS, entrada=DIRETORIO_ENTRADA):
+    """Arquivos do diretório de entrada ainda não ingeridos (ou alterados desde a ingestão)."""
+    entrada = Path(entrada)
+    if not entrada.is_dir():
+        return []
+    processados = _ler_manifesto(origem)["arquivos"]
+    return sorted(
+        caminho for caminho in entrada.iterdir()
+        if caminho.suffix.lower() in EXTENSOES
+        and processados.get(caminho.name, {}).get("assinatura") != _assinatura(caminho)
+    )
+
+
+def _recalcular(origem, manifesto):
+    estatisticas = agregar(cache_colunar.ler(origem, normalizar_colunas))
+    for lote in ler_lotes(origem, manifesto):
+        estatisticas = combinar(estatisticas, agregar(lote))
+    return estatisticas
+
+
+def ingerir(origem=ARQUIVO_DADOS, entrada=DIRETORIO_ENTRADA):
+    """Anexa os arquivos novos ao dataset e atualiza as estatísticas. Retorna as linhas ingeridas.
+
+    Todos os arquivos são validados antes de qualquer gravação: um arquivo sem as
+    colunas do dataset interrompe a ingestão (ValueError) sem alterar o manifesto.
+    """
+    with _trava:
+        arquivos = novos_arquivos(origem, entrada)
+        if not arquivos:
+            return 0
+        lotes = []
+        for arquivo in arquivos:
+            df = normalizar_colunas(_ler_arquivo(arquivo))
+            validar_lote(df, arquivo.name)
+            lotes.append((arquivo, df))
+
+        # Estatísticas do estado anterior: o lote é combinado a elas sem reler o histórico
+        manifesto = _ler_manifesto(origem)
+        estatisticas = _ler_derivado(_caminho_estatisticas(origem), _estado_estatisticas(origem, manifesto))
+
+        pasta = diretorio_lotes(origem)
+        for arquivo, df in lotes:
+            nome_lote = f"{arquivo.name}.feather"
+            cache_colunar.gravar(df, pasta / nome_lote)
+
+            # Arquivo reenviado com alterações substitui o lote anterior: refaz as estatísticas
+            if manifesto["arquivos"].pop(arquivo.name, None) is not None:
+                estatisticas = None
+            manifesto["arquivos"][arquivo.name] = {
+                "assinatura": _assinatura(arquivo), "lote": nome_lote, "linhas": len(df),
+            }
+            if estatisticas is not None:
+                estatisticas = combinar(estatisticas, agregar(df))
+
+        if estatisticas is None:
+            estatisticas = _recalcular(origem, manifesto)
+        # As estatísticas já levam o estado novo; até o manifesto ser gravado, os leitores as refazem
+        _gravar_estatisticas(origem, estatisticas, _estado_estatisticas(origem, manifesto))
+        _gravar_manifesto(origem, manifesto)
+        return sum(len(df) for _, df in lotes)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingestão incremental de novas amostras.")
+    parser.add_argument("--entrada", default=DIRETORIO_ENTRADA, type=Path)
+    parser.add_argument("--observar", type=float, metavar="SEGUNDOS",
+                        help="verifica o diretório de entrada periodicamente")
+    args = parser.parse_args()
+
+    while True:
+        try:
+            total = ingerir(entrada=args.entrada)
+        except ValueError as erro:
+            # Arquivo inválido: nada é ingerido até ele ser corrigido ou removido
+            print(erro)
+            total = 0
+        if total:
+            print(f"{total} linhas ingeridas de {args.entrada}")
+        if not args.observar:
+            break
+        time.sleep(args.observar)
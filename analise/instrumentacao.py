@@ -0,0 +1,98 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+
+# --- Medição de tempo das etapas de cada execução das páginas ---
+# Cada etapa registra duração, linhas processadas e se aproveitou o cache.
+# Os registros vão para o painel opcional na barra lateral e, se a variável
+# DASHBOARD_LOG_DESEMPENHO estiver definida, para um log JSON Lines ("1" usa o
+# arquivo padrão em .cache/; outro valor é o caminho). Ao passar de LIMITE_LOG_BYTES
+# o log vira <arquivo>.1 (substituindo o anterior) e recomeça vazio.
+_PADRAO_LOG = Path(__file__).resolve().parent.parent / ".cache" / "desempenho.jsonl"
+_VARIAVEL_LOG = os.environ.get("DASHBOARD_LOG_DESEMPENHO", "")
+ARQUIVO_LOG = str(_PADRAO_LOG) if _VARIAVEL_LOG == "1" else _VARIAVEL_LOG
+LIMITE_LOG_BYTES = 50 * 2 ** 20
+
+_local = threading.local()
+_trava_log = threading.Lock()
+
+
+def _estado():
+    if not hasattr(_local, "registros"):
+        _local.pagina = None
+        _local.execucao = None
+        _local.registros = []
+        _local.pilha = []
+    return _local
+
+
+def iniciar(pagina):
+    """Começa uma nova execução da página (chamar no topo do script)."""
+    estado = _estado()
+    estado.pagina = pagina
+    estado.execucao = f"{time.time_ns():x}"
+    estado.registros = []
+    estado.pilha = []
+
+
+def registros():
+    return list(_estado().registros)
+
+
+def _gravar(registro):
+    if not ARQUIVO_LOG:
+        return
+    linha = json.dumps(registro, ensure_ascii=False, default=str)
+    with _trava_log:
+        arquivo_log = Path(ARQUIVO_LOG)
+        arquivo_log.parent.mkdir(parents=True, exist_ok=True)
+        if arquivo_log.exists() and arquivo_log.stat().st_size > LIMITE_LOG_BYTES:
+            arquivo_log.replace(arquivo_log.with_name(arquivo_log.name + ".1"))
+        with open(arquivo_log, "a", encoding="utf-8") as arquivo:
+            arquivo.write(linha + "\n")
+
+
+@contextmanager
+def etapa(nome, linhas=None, cache=False):
+    """Mede o bloco. Com `cache=True` a etapa conta como acerto, salvo se marcar_execucao() for chamada."""
+    estado = _estado()
+    registro = {
+        "pagina": estado.pagina,
+        "execucao": estado.execucao,
+        "etapa": nome,
+        "linhas": linhas,
+        "cache": "hit" if cache else None,
+    }
+    estado.pilha.append(registro)
+    inicio = time.perf_counter()
+    try:
+        yield registro
+    finally:
+        registro["duracao_ms"] = round((time.perf_counter() - inicio) * 1000, 3)
+        estado.pilha.remove(registro)
+        estado.registros.append(registro)
+        _gravar(registro)
+
+
+def marcar_execucao():
+    """Chamada dentro das funções em cache: as etapas abertas não aproveitaram o cache."""
+    for registro in _estado().pilha:
+        if registro["cache"] is not None:
+            registro["cache"] = "miss"
+
+
+def painel():
+    """Painel opcional na barra lateral com as etapas da execução atual (chamar no fim da página)."""
+    if not st.sidebar.checkbox("⏱️ Painel de desempenho"):
+        return
+    tabela = pd.DataFrame(registros(), columns=["etapa", "duracao_ms", "linhas", "cache"])
+    st.sidebar.metric("Tempo medido", f"{tabela['duracao_ms'].sum():.0f} ms")
+    st.sidebar.dataframe(tabela, hide_index=True)
+    if ARQUIVO_LOG:
+        st.sidebar.caption(f"Log: {ARQUIVO_LOG}")
@@ -0,0 +1,76 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from analise.dados import RAIZ, versao_tabela
+
+# --- Limites da legislação ---
+# A tabela completa (parâmetros × normas) fica em limites.csv e pode ganhar novas
+# linhas sem mudar o código. "Sentido" indica se o limite é um máximo (a maioria)
+# ou um mínimo (ex.: oxigênio dissolvido), violado por valores abaixo dele.
+ARQUIVO_LIMITES = RAIZ / "limites.csv"
+NORMA_PADRAO = "CONAMA 357/2005 - Classe 2"
+SENTIDOS = ("máximo", "mínimo")
+_COLUNAS = ["Parâmetro", "Norma", "Limite", "Unidade", "Sentido", "Referência"]
+
+
+@lru_cache(maxsize=4)
+def _ler_tabela(caminho, versao):
+    tabela = pd.read_csv(caminho, dtype={"Limite": float})
+    faltando = set(_COLUNAS) - set(tabela.columns)
+    if faltando:
+        raise ValueError(f"{caminho}: colunas ausentes na tabela de limites: {sorted(faltando)}")
+    tabela["Sentido"] = tabela["Sentido"].fillna("máximo").str.strip().str.lower()
+    invalidos = set(tabela["Sentido"]) - set(SENTIDOS)
+    if invalidos:
+        raise ValueError(f"{caminho}: sentido inválido {sorted(invalidos)} (use {' ou '.join(SENTIDOS)})")
+    if tabela.duplicated(["Parâmetro", "Norma"]).any():
+        raise ValueError(f"{caminho}: parâmetro repetido na mesma norma")
+    return tabela[_COLUNAS]
+
+
+def versao_limites(caminho=ARQUIVO_LIMITES):
+    return versao_tabela(caminho)
+
+
+def tabela_limites(caminho=ARQUIVO_LIMITES):
+    """Tabela de limites (relida quando o arquivo muda); não deve ser alterada."""
+    return _ler_tabela(str(caminho), versao_limites(caminho))
+
+
+def normas(caminho=ARQUIVO_LIMITES):
+    return list(tabela_limites(caminho)["Norma"].unique())
+
+
+def limites_da_norma(norma=NORMA_PADRAO, caminho=ARQUIVO_LIMITES):
+    """{parâmetro: limite} de uma norma."""
+    tabela = tabela_limites(caminho)
+    linhas = tabela[tabela["Norma"] == norma]
+    if linhas.empty:
+        raise KeyError(f"Norma desconhecida: {norma!r}")
+    return dict(zip(linhas["Parâmetro"], linhas["Limite"]))
+
+
+def excedencias(df, parametros=None, norma=NORMA_PADRAO):
+    """Máscara booleana (amostra × parâmetro) das violações do limite; ausentes contam como False.
+
+    Todos os parâmetros são comparados de uma vez sobre a matriz de valores. O limite
+    é convertido antes para o tipo da coluna: em float32, 0.3 gravado na planilha não
+    pode virar excedência só porque float32(0.3) > 0.3 em float64.
+    """
+    tabela = tabela_limites()
+    tabela = tabela[tabela["Norma"] == norma].set_index("Parâmetro")
+    parametros = [p for p in (tabela.index if parametros is None else parametros)
+                  if p in df.columns and p in tabela.index]
+    if not parametros:
+        return pd.DataFrame(index=df.index)
+
+    valores = df[parametros].to_numpy()
+    if valores.dtype.kind != "f":
+        valores = valores.astype(float)
+    limites = np.array([df[p].dtype.type(tabela.at[p, "Limite"]) for p in parametros]).astype(valores.dtype)
+    minimo = (tabela.loc[parametros, "Sentido"] == "mínimo").to_numpy()
+    with np.errstate(invalid="ignore"):
+        mascara = np.where(minimo, valores < limites, valores > limites)
+    return pd.DataFrame(mascara, index=df.index, columns=parametros)
@@ -0,0 +1,377 @@
+import argparse
+import itertools
+import os
+import re
+import zipfile
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from analise.compartilhado import compartilhado
+from analise.cubo import NIVEIS
+from analise.dados import (ARQUIVO_DADOS, COLUNA_DATA, METAIS, ORDEM_CATEGORIAS, carregar_dados,
+                           normalizar_colunas, versao_dados)
+from analise.esbocos import Distribuicao, Histograma, distribuicoes_por_grupo
+from analise.estatisticas import ic_de_agregados
+from analise.ingestao import agregar, caminhos_lotes, combinar, reagrupar
+from analise.kde import kde, kde_ponderada
+from analise.limites import excedencias, versao_limites
+
+# --- Modo particionado (out-of-core) ---
+# Arquivos maiores que a memória são lidos em partições de TAMANHO_PARTICAO linhas.
+# Cada partição vira um Resumo parcial (contagens, média e M2 de Welford por grupo,
+# ausentes, frequências, mínimos/máximos, histogramas em faixas fixas e esboços de
+# distribuição por grupo para boxplots e violinos) e os resumos são combinados entre
+# si, de modo que a memória usada não depende do tamanho do arquivo. Enquanto
+# couberem em LIMITE_EXATO valores por coluna, os valores também são guardados e
+# quantis e histogramas saem exatos (o caso da planilha atual).
+TAMANHO_PARTICAO = 200_000
+LIMITE_EXATO = 1_000_000
+# Acima deste tamanho estimado em memória o dashboard passa ao modo particionado
+LIMITE_EM_MEMORIA = int(os.environ.get("DASHBOARD_LIMITE_MEMORIA_MB", 1024)) * 2 ** 20
+# Bytes por célula de planilha no DataFrame (float64 ou código de categoria + índices)
+BYTES_POR_CELULA = 16
+LINHAS_PREVIA = 5
+COLUNAS_FREQUENCIA = ["Categoria", "Estação"]
+_FORMATOS = {".feather": "ipc", ".arrow": "ipc", ".ipc": "ipc", ".parquet": "parquet", ".csv": "csv"}
+_DATA_ZERO = np.datetime64("1900-01-01", "D")
+_DIAS = 200 * 366
+
+
+class Resumo:
+    """Agregados parciais de um conjunto de linhas; `combinar` junta resumos de partições."""
+
+    def __init__(self, metais=METAIS):
+        self.metais = list(metais)
+        self.linhas = 0
+        self.tipos = pd.Series(dtype=object)
+        self.ausentes = pd.Series(dtype="int64")
+        self.frequencias = {coluna: pd.Series(dtype="int64") for coluna in COLUNAS_FREQUENCIA}
+        self.linhas_por_grupo = pd.Series(dtype="int64")
+        self.momentos = None   # n, Média, M2 e Excedências por metal (todas as linhas)
+        self.grupos = None     # idem por (Categoria, Estação, Metal), formato de ingestao.agregar
+        self.minimos = pd.Series(np.nan, index=self.metais)
+        self.maximos = pd.Series(np.nan, index=self.metais)
+        self.histogramas = {metal: Histograma() for metal in self.metais}
+        self.esbocos = {}  # (Categoria, Estação, Metal) -> esbocos.Distribuicao
+        self.dias = np.zeros(_DIAS, dtype=np.int64)
+        self.soma_datas = 0
+        self.exatos = {}       # coluna -> valores, até LIMITE_EXATO (None depois)
+        self.primeiras = None  # primeiras linhas lidas, para a pré-visualização
+
+    # --- Acumulação ---
+    def adicionar(self, df):
+        """Inclui as linhas de `df` (já normalizado) no resumo."""
+        parcial = Resumo(self.metais)
+        parcial.linhas = len(df)
+        parcial.primeiras = df.head(LINHAS_PREVIA)
+        parcial.tipos = df.dtypes.astype(str)
+        parcial.ausentes = df.isna().sum()
+        for coluna in COLUNAS_FREQUENCIA:
+            if coluna in df.columns:
+                parcial.frequencias[coluna] = df[coluna].value_counts()
+        if "Categoria" in df.columns and "Estação" in df.columns:
+            parcial.linhas_por_grupo = df.groupby(["Categoria", "Estação"], observed=True).size()
+
+        metais = [m for m in self.metais if m in df.columns]
+        parcial.momentos = _momentos(df, metais)
+        if "Categoria" in df.columns and "Estação" in df.columns:
+            parcial.grupos = agregar(df)
+            parcial.esbocos = distribuicoes_por_grupo(df, metais)
+        parcial.minimos = df[metais].min().astype(float).reindex(self.metais)
+        parcial.maximos = df[metais].max().astype(float).reindex(self.metais)
+        for metal in metais:
+            parcial.histogramas[metal].adicionar(df[metal].to_numpy())
+            parcial.exatos[metal] = df[metal].dropna()
+
+        if COLUNA_DATA in df.columns:
+            datas = df[COLUNA_DATA].dropna()
+            dias = (datas.to_numpy().astype("datetime64[D]") - _DATA_ZERO).astype(np.int64)
+            parcial.dias = np.bincount(np.clip(dias, 0, _DIAS - 1), minlength=_DIAS)
+            # Soma em segundos como inteiro Python: em nanossegundos estouraria o int64
+            parcial.soma_datas = int(datas.to_numpy().astype("datetime64[s]").astype(np.int64).sum())
+            parcial.exatos[COLUNA_DATA] = datas
+        return self.combinar(parcial)
+
+    def combinar(self, outro):
+        """Junta `outro` a este resumo (a ordem das partições não altera o resultado)."""
+        if not self.linhas:
+            self.tipos = outro.tipos
+            self.primeiras = outro.primeiras
+        self.linhas += outro.linhas
+        self.ausentes = _somar(self.ausentes, outro.ausentes)
+        for coluna in COLUNAS_FREQUENCIA:
+            self.frequencias[coluna] = _somar(self.frequencias[coluna], outro.frequencias[coluna]).sort_values(
+                ascending=False, kind="stable")
+        self.linhas_por_grupo = _somar(self.linhas_por_grupo, outro.linhas_por_grupo)
+        self.momentos = _juntar(self.momentos, outro.momentos, ["Metal"])
+        self.grupos = _juntar(self.grupos, outro.grupos, ["Categoria", "Estação", "Metal"])
+        self.minimos = self.minimos.combine(outro.minimos, np.fmin)
+        self.maximos = self.maximos.combine(outro.maximos, np.fmax)
+        for metal in self.metais:
+            self.histogramas[metal] = self.histogramas[metal] + outro.histogramas[metal]
+        for grupo, distribuicao in outro.esbocos.items():
+            if grupo in self.esbocos:
+                self.esbocos[grupo].combinar(distribuicao)
+            else:
+                self.esbocos[grupo] = distribuicao
+        self.dias = self.dias + outro.dias
+        self.soma_datas += outro.soma_datas
+
+        for coluna in set(self.exatos) | set(outro.exatos):
+            atual, novo = self.exatos.get(coluna), outro.exatos.get(coluna)
+            if atual is None and coluna in self.exatos or novo is None and coluna in outro.exatos:
+                self.exatos[coluna] = None
+            else:
+                juntos = pd.concat([v for v in (atual, novo) if v is not None], ignore_index=True)
+                self.exatos[coluna] = juntos if len(juntos) <= LIMITE_EXATO else None
+        return self
+
+    # --- Consultas ---
+    @property
+    def exato(self):
+        return all(valores is not None for valores in self.exatos.values())
+
+    @property
+    def estacoes_por_categoria(self):
+        """{categoria: estações}, na mesma ordem de `registro.Registro`, sem ler as amostras."""
+        pares = self.linhas_por_grupo.index.to_frame(index=False)
+        return {cat: sorted(pares.loc[pares["Categoria"] == cat, "Estação"])
+                for cat in _ordenar_categorias(set(pares["Categoria"]))}
+
+    def quantis(self, coluna, qs):
+        """Quantis exatos enquanto os valores couberem em memória; senão, do histograma."""
+        valores = self.exatos.get(coluna)
+        if valores is not None:
+            return valores.quantile(list(qs)).to_numpy()
+        if coluna == COLUNA_DATA:
+            acumulada = np.cumsum(self.dias)
+            # Primeiro dia em que a contagem acumulada alcança a posição do quantil
+            dias = np.searchsorted(acumulada, np.maximum(np.asarray(qs) * acumulada[-1], 1), side="left")
+            return pd.to_datetime(_DATA_ZERO + dias)
+        return self.histogramas[coluna].quantis(qs, self.minimos[coluna], self.maximos[coluna])
+
+    def descrever(self):
+        """Equivalente a `df.describe()` para a data e os metais."""
+        colunas = [c for c in [COLUNA_DATA] + self.metais if c in self.exatos]
+        if self.exato:
+            return pd.DataFrame({c: self.exatos[c] for c in colunas}).describe()
+
+        tabela = {}
+        if COLUNA_DATA in colunas:
+            n = int(self.dias.sum())
+            q = self.quantis(COLUNA_DATA, (0, 0.25, 0.5, 0.75, 1))
+            media = pd.Timestamp(self.soma_datas // max(n, 1), unit="s")
+            tabela[COLUNA_DATA] = pd.Series([n, media, *q, pd.NaT],
+                                            index=["count", "mean", "min", "25%", "50%", "75%", "max", "std"])
+        momentos = self.momentos.set_index("Metal")
+        for metal in colunas[1:] if COLUNA_DATA in colunas else colunas:
+            n, media, m2 = momentos.loc[metal, ["n", "Média", "M2"]]
+            q = self.quantis(metal, (0.25, 0.5, 0.75))
+            tabela[metal] = pd.Series([n, media, self.minimos[metal], *q, self.maximos[metal],
+                                       np.sqrt(m2 / (n - 1)) if n > 1 else np.nan],
+                                      index=["count", "mean", "min", "25%", "50%", "75%", "max", "std"])
+        return pd.DataFrame(tabela)
+
+    def intervalos(self, nivel="Categoria", alpha=0.05):
+        """IC t-Student da média por grupo e metal, como `intervalo_confianca`, a partir dos agregados."""
+        chaves = NIVEIS[nivel]
+        tabela = reagrupar(self.grupos, chaves) if chaves else self.momentos
+        with np.errstate(invalid="ignore", divide="ignore"):
+            variancia = tabela["M2"] / (tabela["n"] - 1).where(tabela["n"] > 1)
+        resultado = ic_de_agregados(tabela["n"], tabela["Média"], variancia, alpha)
+        return pd.concat([tabela[chaves + ["Metal"]].reset_index(drop=True), resultado], axis=1)
+
+    def histograma(self, metal, arestas):
+        """Contagens de `metal` nas faixas `arestas` (exatas ou reagrupadas do histograma fixo)."""
+        valores = self.exatos.get(metal)
+        if valores is not None:
+            return np.histogram(valores.astype(float), arestas)[0]
+        return self.histogramas[metal].contagens_em(arestas, self.minimos[metal], self.maximos[metal])
+
+    def histograma_com_kde(self, metal, bins=30, pontos=200):
+        """(arestas, contagens, grade, curva) de `metal`, como `graficos.histograma_com_kde`.
+
+        `bins` faixas iguais entre o mínimo e o máximo e a KDE (regra de Scott) na escala
+        das contagens; sem os valores exatos, a KDE sai do histograma em faixas fixas.
+        Com menos de dois valores distintos a grade e a curva são None.
+        """
+        minimo, maximo = self.minimos[metal], self.maximos[metal]
+        arestas = np.linspace(minimo, maximo, bins + 1)
+        contagens = self.histograma(metal, arestas)
+        n, m2 = self.momentos.set_index("Metal").loc[metal, ["n", "M2"]]
+        if n < 2 or not minimo < maximo:
+            return arestas, contagens, None, None
+        grade = np.linspace(minimo, maximo, pontos)
+        valores = self.exatos.get(metal)
+        if valores is not None:
+            densidade = kde(valores.to_numpy(dtype=float), grade)
+        else:
+            h = np.sqrt(m2 / (n - 1)) * n ** (-1 / 5)
+            densidade = kde_ponderada(Histograma.CENTROS, self.histogramas[metal].contagens, grade, h)
+        return arestas, contagens, grade, densidade * n * (arestas[1] - arestas[0])
+
+    def distribuicao(self, metal, categoria=None, estacao=None):
+        """Distribuição de `metal` nos grupos que batem com o filtro (None = todos)."""
+        return Distribuicao.juntar(
+            d for (cat, est, m), d in self.esbocos.items()
+            if m == metal and categoria in (None, cat) and estacao in (None, est))
+
+    def distribuicoes(self, metal, nivel="Categoria"):
+        """{grupo: Distribuicao} de `metal` por Categoria (na ordem usual) ou por Estação."""
+        if nivel == "Categoria":
+            categorias = _ordenar_categorias({cat for cat, _, m in self.esbocos if m == metal})
+            return {c: self.distribuicao(metal, categoria=c) for c in categorias}
+        estacoes = sorted({est for _, est, m in self.esbocos if m == metal})
+        return {e: self.distribuicao(metal, estacao=e) for e in estacoes}
+
+
+def _ordenar_categorias(categorias):
+    return [c for c in ORDEM_CATEGORIAS if c in categorias] + sorted(set(categorias) - set(ORDEM_CATEGORIAS))
+
+
+def _momentos(df, metais):
+    valores = df[metais].astype("float64")
+    n = valores.count()
+    return pd.DataFrame({
+        "Metal": metais,
+        "n": n.to_numpy(dtype="int64"),
+        "Média": valores.mean().fillna(0.0).to_numpy(),
+        "M2": (valores.var() * (n - 1)).fillna(0.0).to_numpy(),
+        "Excedências": excedencias(df, metais).sum().reindex(metais, fill_value=0).to_numpy(dtype="int64"),
+    })
+
+
+def _somar(atual, novo):
+    # Contagens indexadas por rótulo; um lado vazio (resumo recém-criado) não muda o índice
+    if atual.empty or novo.empty:
+        return (novo if atual.empty else atual).astype("int64")
+    return atual.add(novo, fill_value=0).astype("int64")
+
+
+def _juntar(atual, novo, chaves):
+    if atual is None or novo is None:
+        return novo if atual is None else atual
+    return combinar(atual, novo, chaves)
+
+
+# ---------------------
+# Leitura em partições
+# ---------------------
+def _particoes_excel(caminho, linhas):
+    from openpyxl import load_workbook
+
+    livro = load_workbook(caminho, read_only=True, data_only=True)
+    try:
+        planilha = livro.worksheets[0].iter_rows(values_only=True)
+        cabecalho = [str(c) for c in next(planilha)]
+        while bloco := list(itertools.islice(planilha, linhas)):
+            yield pd.DataFrame(bloco, columns=cabecalho)
+    finally:
+        livro.close()
+
+
+def particoes(caminho, linhas=TAMANHO_PARTICAO):
+    """DataFrames normalizados de até `linhas` linhas, lidos aos poucos do arquivo (ou pasta).
+
+    Feather/Arrow, Parquet e CSV são lidos em lotes pelo pyarrow.dataset (uma pasta é
+    tratada como um conjunto de arquivos do mesmo formato); planilhas Excel, linha a
+    linha pelo openpyxl em modo somente leitura.
+    """
+    caminho = Path(caminho)
+    exemplo = next(iter(sorted(caminho.iterdir())), caminho) if caminho.is_dir() else caminho
+    if exemplo.suffix.lower() in (".xlsx", ".xlsm"):
+        blocos = _particoes_excel(caminho, linhas)
+    else:
+        import pyarrow.dataset as ds
+
+        formato = _FORMATOS.get(exemplo.suffix.lower())
+        if formato is None:
+            raise ValueError(f"{caminho}: formato não suportado no modo particionado")
+        # Sem leitura antecipada de lotes/arquivos: no máximo uma partição em memória
+        lotes = ds.dataset(caminho, format=formato).to_batches(batch_size=linhas, batch_readahead=0,
+                                                                fragment_readahead=0)
+        blocos = (lote.to_pandas() for lote in lotes)
+    for bloco in blocos:
+        if len(bloco):
+            yield normalizar_colunas(bloco)
+
+
+def resumir(df):
+    """Resumo de um DataFrame já em memória (uma única partição)."""
+    return Resumo().adicionar(df)
+
+
+def resumir_arquivos(caminhos, linhas=TAMANHO_PARTICAO):
+    """Resumo de um ou mais arquivos lidos em partições, com memória limitada."""
+    resumo = Resumo()
+    for caminho in caminhos:
+        for parte in particoes(caminho, linhas):
+            resumo.adicionar(parte)
+    return resumo
+
+
+@lru_cache(maxsize=16)
+def _tamanho_planilha(caminho, mtime_ns, tamanho):
+    # O xlsx é XML compactado: o tamanho do arquivo subestima muito o DataFrame. A
+    # dimensão declarada no início da primeira planilha dá linhas × colunas sem ler as
+    # células; sem ela, usa o tamanho descompactado do XML (estimativa por excesso).
+    with zipfile.ZipFile(caminho) as pacote:
+        planilhas = sorted(n for n in pacote.namelist() if n.startswith("xl/worksheets/sheet"))
+        if not planilhas:
+            return tamanho
+        with pacote.open(planilhas[0]) as xml:
+            inicio = xml.read(4096).decode("utf-8", "ignore")
+        dimensao = re.search(r'<dimension ref="[A-Z]+(\d+):([A-Z]+)(\d+)"', inicio)
+        if dimensao is None:
+            return pacote.getinfo(planilhas[0]).file_size
+        primeira, coluna, ultima = int(dimensao[1]), dimensao[2], int(dimensao[3])
+        colunas = sum((ord(letra) - 64) * 26 ** i for i, letra in enumerate(reversed(coluna)))
+        return (ultima - primeira + 1) * colunas * BYTES_POR_CELULA
+
+
+def tamanho_em_memoria(caminho=ARQUIVO_DADOS):
+    """Bytes estimados do DataFrame da planilha mais os lotes ingeridos (Feather)."""
+    info = os.stat(caminho)
+    if Path(caminho).suffix.lower() in (".xlsx", ".xlsm"):
+        tamanho = _tamanho_planilha(str(caminho), info.st_mtime_ns, info.st_size)
+    else:
+        tamanho = info.st_size
+    return tamanho + sum(os.stat(lote).st_size for lote in caminhos_lotes(caminho))
+
+
+def modo_particionado(caminho=ARQUIVO_DADOS):
+    """Dados estimados acima de LIMITE_EM_MEMORIA (ou DASHBOARD_PARTICIONADO=1) são lidos em partições."""
+    if os.environ.get("DASHBOARD_PARTICIONADO") == "1":
+        return True
+    return tamanho_em_memoria(caminho) > LIMITE_EM_MEMORIA
+
+
+@compartilhado(max_itens=4, persistente=True)
+def _resumo(caminho, versao, particionado, versao_tabela):
+    # A versão da tabela de limites entra na chave (excedências dos agregados)
+    if particionado:
+        return resumir_arquivos([caminho, *caminhos_lotes(caminho)])
+    return resumir(carregar_dados(caminho))
+
+
+def carregar_resumo(caminho=ARQUIVO_DADOS):
+    """Resumo dos dados (planilha + lotes ingeridos), em cache por versão dos dados."""
+    caminho = str(caminho)
+    return _resumo(caminho, versao_dados(caminho), modo_particionado(caminho), versao_limites())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resumo de arquivos grandes lidos em partições.")
+    parser.add_argument("arquivos", nargs="+", type=Path, help="Excel, CSV, Parquet, Feather ou pastas")
+    parser.add_argument("--linhas", type=int, default=TAMANHO_PARTICAO, help="linhas por partição")
+    args = parser.parse_args()
+
+    resumo = resumir_arquivos(args.arquivos, args.linhas)
+    with pd.option_context("display.width", 200, "display.max_columns", 20):
+        print(f"Total de registros: {resumo.linhas:,} ({'exato' if resumo.exato else 'quantis aproximados'})\n")
+        print("Valores ausentes por coluna:", resumo.ausentes.to_string(), sep="\n", end="\n\n")
+        print("Estatísticas descritivas:", resumo.descrever().to_string(), sep="\n", end="\n\n")
+        print("IC 95% por categoria:", resumo.intervalos("Categoria").to_string(index=False), sep="\n")
@@ -0,0 +1,239 @@
+import argparse
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+
+from analise.dados import RAIZ
+
+# --- Resultados persistentes entre reinícios do servidor ---
+# Os resultados compartilhados (analise.compartilhado) vivem só na memória do processo.
+# Os marcados como persistentes também são gravados em um banco SQLite em .cache/,
+# identificados por um hash do conteúdo dos dados (não da data de modificação, que
+# muda a cada deploy), do código e das tabelas de configuração e dos parâmetros.
+# Depois de um reinício, o primeiro acesso lê o resultado do disco em vez de
+# recalcular. O banco usa WAL: vários processos leem ao mesmo tempo e as gravações
+# não bloqueiam as leituras. Ao passar de LIMITE_BYTES, os resultados lidos há mais
+# tempo são descartados. Com DASHBOARD_RESULTADOS_MB=0 a persistência fica desativada.
+# O dataset em si já persiste no cache colunar (analise.cache_colunar) e não entra aqui.
+ARQUIVO_RESULTADOS = RAIZ / ".cache" / "resultados.sqlite3"
+LIMITE_BYTES = int(os.environ.get("DASHBOARD_RESULTADOS_MB", 512)) * 2 ** 20
+# Resultados maiores que esta fração do limite não são gravados
+FRACAO_MAXIMA_ITEM = 0.25
+# Intervalo mínimo entre atualizações do último acesso de um resultado (evita uma
+# gravação a cada leitura)
+INTERVALO_ACESSO_S = 60
+TEMPO_ESPERA_S = 30
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS resultados (
+    chave TEXT PRIMARY KEY,
+    nome TEXT NOT NULL,
+    valor BLOB NOT NULL,
+    tamanho INTEGER NOT NULL,
+    criado REAL NOT NULL,
+    acessado REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS resultados_acessado ON resultados (acessado);
+"""
+
+
+@lru_cache(maxsize=4)
+def _hash_codigo(assinaturas):
+    # As assinaturas (data de modificação e tamanho) só decidem quando reler os arquivos
+    resumo = hashlib.blake2b(digest_size=16)
+    for caminho, _, _ in assinaturas:
+        arquivo = Path(caminho)
+        resumo.update(arquivo.name.encode())
+        resumo.update(arquivo.read_bytes())
+    return resumo.hexdigest()
+
+
+def versao_codigo(raiz=RAIZ):
+    """Hash dos módulos, páginas e tabelas CSV: um deploy com mudanças invalida os resultados.
+
+    Editar limites.csv, estacoes.csv ou o código com o servidor no ar também muda a
+    versão: o conteúdo é relido quando a data de modificação ou o tamanho de algum
+    arquivo muda.
+    """
+    arquivos = sorted([*raiz.glob("*.py"), *raiz.glob("*.csv"), *(raiz / "analise").glob("*.py"),
+                       *(raiz / "pages").glob("*.py")])
+    assinaturas = []
+    for arquivo in arquivos:
+        estado = arquivo.stat()
+        assinaturas.append((str(arquivo), estado.st_mtime_ns, estado.st_size))
+    return _hash_codigo(tuple(assinaturas))
+
+
+@lru_cache(maxsize=8)
+def _conteudo(caminho, versao):
+    # A versão (data de modificação) só decide quando recalcular o hash
+    from analise.ingestao import caminhos_lotes
+
+    resumo = hashlib.blake2b(digest_size=16)
+    for arquivo in [Path(caminho), *caminhos_lotes(caminho)]:
+        with open(arquivo, "rb") as entrada:
+            for bloco in iter(lambda: entrada.read(1 << 20), b""):
+                resumo.update(bloco)
+    return resumo.hexdigest()
+
+
+def conteudo_dados(caminho, versao):
+    """Hash do conteúdo da planilha e dos lotes ingeridos, calculado uma vez por versão."""
+    return _conteudo(str(caminho), versao)
+
+
+def chave_dos_dados(caminho, versao, parametros):
+    """Chave persistente de um resultado de (caminho, versão dos dados, *parâmetros)."""
+    return f"{versao_codigo()}:{conteudo_dados(caminho, versao)}:{parametros!r}"
+
+
+class ResultadosPersistentes:
+    """Resultados serializados com pickle em SQLite (WAL), com descarte por último acesso."""
+
+    def __init__(self, caminho=ARQUIVO_RESULTADOS, limite_bytes=LIMITE_BYTES):
+        self.caminho = Path(caminho)
+        self.limite_bytes = limite_bytes
+        self._local = threading.local()
+        self.contadores = Counter()
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        self._conexao().executescript(_ESQUEMA)
+
+    def _conexao(self):
+        # Uma conexão por thread (sqlite3 não compartilha conexões entre threads)
+        conexao = getattr(self._local, "conexao", None)
+        if conexao is None:
+            conexao = sqlite3.connect(self.caminho, timeout=TEMPO_ESPERA_S, isolation_level=None)
+            conexao.execute("PRAGMA journal_mode=WAL")
+            conexao.execute("PRAGMA synchronous=NORMAL")
+            self._local.conexao = conexao
+        return conexao
+
+    @staticmethod
+    def _hash(nome, chave):
+        return hashlib.blake2b(f"{nome}\0{chave}".encode(), digest_size=20).hexdigest()
+
+    def ler(self, nome, chave):
+        """(encontrado, valor). Erros de leitura contam como ausência do resultado."""
+        chave = self._hash(nome, chave)
+        try:
+            conexao = self._conexao()
+            linha = conexao.execute("SELECT valor FROM resultados WHERE chave = ?", (chave,)).fetchone()
+            if linha is None:
+                self.contadores["ausentes"] += 1
+                return False, None
+            valor = pickle.loads(linha[0])
+        except (sqlite3.Error, pickle.UnpicklingError, AttributeError, ImportError, EOFError, TypeError, ValueError):
+            # Banco ilegível ou resultado de uma classe que mudou de forma
+            self.contadores["falhas"] += 1
+            return False, None
+        self.contadores["lidos"] += 1
+        try:
+            agora = time.time()
+            conexao.execute("UPDATE resultados SET acessado = ? WHERE chave = ? AND acessado < ?",
+                            (agora, chave, agora - INTERVALO_ACESSO_S))
+        except sqlite3.Error:
+            # Banco ocupado por uma gravação: o último acesso fica para a próxima leitura
+            pass
+        return True, valor
+
+    def gravar(self, nome, chave, valor):
+        """Grava o resultado; falhas (disco cheio, banco bloqueado) são ignoradas."""
+        try:
+            dados = pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            self.contadores["falhas"] += 1
+            return False
+        if len(dados) > self.limite_bytes * FRACAO_MAXIMA_ITEM:
+            self.contadores["grandes"] += 1
+            return False
+        agora = time.time()
+        try:
+            conexao = self._conexao()
+            conexao.execute("BEGIN IMMEDIATE")
+            try:
+                conexao.execute("INSERT OR REPLACE INTO resultados VALUES (?, ?, ?, ?, ?, ?)",
+                                (self._hash(nome, chave), nome, dados, len(dados), agora, agora))
+                self._descartar_antigos(conexao)
+                conexao.execute("COMMIT")
+            except BaseException:
+                conexao.execute("ROLLBACK")
+                raise
+        except sqlite3.Error:
+            self.contadores["falhas"] += 1
+            return False
+        self.contadores["gravados"] += 1
+        return True
+
+    def _descartar_antigos(self, conexao):
+        excesso = conexao.execute("SELECT COALESCE(SUM(tamanho), 0) FROM resultados").fetchone()[0] - self.limite_bytes
+        if excesso <= 0:
+            return
+        descartar = []
+        for chave, tamanho in conexao.execute("SELECT chave, tamanho FROM resultados ORDER BY acessado"):
+            descartar.append((chave,))
+            excesso -= tamanho
+            if excesso <= 0:
+                break
+        conexao.executemany("DELETE FROM resultados WHERE chave = ?", descartar)
+        self.contadores["descartados"] += len(descartar)
+
+    def resumo(self):
+        """Quantidade e bytes por nome de resultado."""
+        return self._conexao().execute(
+            "SELECT nome, COUNT(*), SUM(tamanho) FROM resultados GROUP BY nome ORDER BY nome").fetchall()
+
+    def limpar(self):
+        conexao = self._conexao()
+        conexao.execute("DELETE FROM resultados")
+        conexao.execute("VACUUM")
+
+
+_persistentes = None
+_trava_persistentes = threading.Lock()
+
+
+def resultados_persistentes():
+    """Instância única do processo, ou None com a persistência desativada ou indisponível."""
+    global _persistentes
+    if LIMITE_BYTES <= 0:
+        return None
+    with _trava_persistentes:
+        if _persistentes is None:
+            try:
+                _persistentes = ResultadosPersistentes()
+            except (sqlite3.Error, OSError):
+                # Ex.: diretório somente leitura; o dashboard segue só com o cache em memória
+                _persistentes = False
+        return _persistentes or None
+
+
+def memorizar(nome, chave, funcao):
+    """Resultado de `funcao()` lido do disco ou calculado e gravado sob (nome, chave)."""
+    armazenamento = resultados_persistentes()
+    if armazenamento is None:
+        return funcao()
+    encontrado, valor = armazenamento.ler(nome, chave)
+    if encontrado:
+        return valor
+    valor = funcao()
+    armazenamento.gravar(nome, chave, valor)
+    return valor
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resultados persistentes do dashboard.")
+    parser.add_argument("--limpar", action="store_true", help="apaga todos os resultados gravados")
+    args = parser.parse_args()
+
+    armazenamento = ResultadosPersistentes()
+    if args.limpar:
+        armazenamento.limpar()
+    for nome, quantidade, tamanho in armazenamento.resumo():
+        print(f"{nome:45s} {quantidade:6d} {tamanho / 2 ** 20:10.2f} MB")
+    print(f"Arquivo: {armazenamento.caminho} (limite {LIMITE_BYTES / 2 ** 20:.0f} MB)")
@@ -0,0 +1,153 @@
+import multiprocessing
+import os
+import threading
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from analise.compartilhado import compartilhado
+from analise.dados import ARQUIVO_DADOS, carregar_dados, versao_dados
+
+# --- Bootstrap e testes de permutação com reamostragem vetorizada ---
+# As reamostras são geradas como matrizes de índices (uma linha por reamostra) e
+# divididas em tarefas de tamanho fixo, cada uma com sua própria semente derivada
+# de SeedSequence. O resultado depende só da semente, não do número de processos.
+REAMOSTRAS_POR_TAREFA = 2_000
+ELEMENTOS_POR_BLOCO = 2_000_000      # limita a memória de cada matriz de índices
+ELEMENTOS_PARA_PARALELO = 50_000_000  # abaixo disso o pool não compensa
+SEMENTE = 42
+
+METODOS_IC = ["t-Student", "Bootstrap (percentil)"]
+
+_executor = None
+_trava_executor = threading.Lock()
+
+
+def _pool():
+    global _executor
+    with _trava_executor:
+        if _executor is None:
+            # forkserver: os workers não herdam por fork as threads e travas do servidor
+            _executor = ProcessPoolExecutor(max_workers=os.cpu_count(),
+                                            mp_context=multiprocessing.get_context("forkserver"))
+        return _executor
+
+
+def _sementes(semente, rotulo, total):
+    """Sementes das tarefas; o rótulo (ex.: grupo) separa os fluxos aleatórios entre grupos."""
+    entropia = [semente, zlib.crc32(str(rotulo).encode())]
+    tarefas = -(-total // REAMOSTRAS_POR_TAREFA)
+    tamanhos = [min(REAMOSTRAS_POR_TAREFA, total - i * REAMOSTRAS_POR_TAREFA) for i in range(tarefas)]
+    return list(zip(np.random.SeedSequence(entropia).spawn(tarefas), tamanhos))
+
+
+def _executar(funcao, argumentos, elementos):
+    if elementos >= ELEMENTOS_PARA_PARALELO and len(argumentos) > 1:
+        return list(_pool().map(funcao, *zip(*argumentos)))
+    return [funcao(*a) for a in argumentos]
+
+
+# ---------------------
+# Tarefas (executadas no processo principal ou nos workers)
+# ---------------------
+def _medias_bootstrap(valores, semente, quantidade):
+    rng = np.random.default_rng(semente)
+    n = len(valores)
+    bloco = max(1, ELEMENTOS_POR_BLOCO // n)
+    medias = np.empty(quantidade)
+    for inicio in range(0, quantidade, bloco):
+        fim = min(inicio + bloco, quantidade)
+        indices = rng.integers(0, n, size=(fim - inicio, n))
+        medias[inicio:fim] = valores[indices].mean(axis=1)
+    return medias
+
+
+def _diferencas_permutacao(juntos, n_a, semente, quantidade):
+    rng = np.random.default_rng(semente)
+    n = len(juntos)
+    bloco = max(1, ELEMENTOS_POR_BLOCO // n)
+    diferencas = np.empty(quantidade)
+    total = juntos.sum()
+    for inicio in range(0, quantidade, bloco):
+        fim = min(inicio + bloco, quantidade)
+        # Cada linha é uma permutação: as n_a primeiras posições formam o grupo A
+        indices = rng.random((fim - inicio, n)).argsort(axis=1)[:, :n_a]
+        soma_a = juntos[indices].sum(axis=1)
+        diferencas[inicio:fim] = soma_a / n_a - (total - soma_a) / (n - n_a)
+    return diferencas
+
+
+# ---------------------
+# API
+# ---------------------
+def bootstrap_ic(valores, n_reamostras=10_000, alpha=0.05, semente=SEMENTE, rotulo=""):
+    """IC percentil da média por bootstrap. Retorna (média, limite inferior, limite superior)."""
+    valores = np.asarray(valores, dtype=float)
+    valores = valores[~np.isnan(valores)]
+    if len(valores) < 2:
+        media = valores.mean() if len(valores) else np.nan
+        return media, np.nan, np.nan
+
+    argumentos = [(valores, s, q) for s, q in _sementes(semente, rotulo, n_reamostras)]
+    medias = np.concatenate(_executar(_medias_bootstrap, argumentos, n_reamostras * len(valores)))
+    inferior, superior = np.quantile(medias, [alpha / 2, 1 - alpha / 2])
+    return valores.mean(), inferior, superior
+
+
+def teste_permutacao(a, b, n_permutacoes=10_000, semente=SEMENTE, rotulo=""):
+    """Teste de permutação bicaudal para a diferença de médias. Retorna (diferença, p-valor)."""
+    a = np.asarray(a, dtype=float)
+    b = np.asarray(b, dtype=float)
+    a = a[~np.isnan(a)]
+    b = b[~np.isnan(b)]
+    if len(a) == 0 or len(b) == 0:
+        return np.nan, np.nan
+
+    observada = a.mean() - b.mean()
+    juntos = np.concatenate([a, b])
+    argumentos = [(juntos, len(a), s, q) for s, q in _sementes(semente, rotulo, n_permutacoes)]
+    diferencas = np.concatenate(_executar(_diferencas_permutacao, argumentos, n_permutacoes * len(juntos)))
+    # Tolerância relativa evita que erros de arredondamento excluam a própria estatística observada
+    extremos = np.count_nonzero(np.abs(diferencas) >= np.abs(observada) * (1 - 1e-12))
+    return observada, (extremos + 1) / (n_permutacoes + 1)
+
+
+def bootstrap_grupos(df, coluna_grupo, metal, n_reamostras=10_000, alpha=0.05, semente=SEMENTE):
+    """IC bootstrap da média de `metal` para cada valor de `coluna_grupo`."""
+    linhas = []
+    for grupo, valores in df.groupby(coluna_grupo, observed=True)[metal]:
+        valores = valores.dropna().to_numpy(dtype=float)
+        media, inferior, superior = bootstrap_ic(valores, n_reamostras, alpha, semente, rotulo=(grupo, metal))
+        linhas.append({coluna_grupo: grupo, "n": len(valores), "Média": media,
+                       "IC inferior": inferior, "IC superior": superior})
+    return pd.DataFrame(linhas, columns=[coluna_grupo, "n", "Média", "IC inferior", "IC superior"])
+
+
+@compartilhado(max_itens=64, persistente=True)
+def _bootstrap(caminho, versao, coluna_grupo, metal, n_reamostras, alpha, semente):
+    return bootstrap_grupos(carregar_dados(caminho), coluna_grupo, metal, n_reamostras, alpha, semente)
+
+
+def carregar_bootstrap(coluna_grupo, metal, n_reamostras=10_000, alpha=0.05, semente=SEMENTE,
+                       caminho=ARQUIVO_DADOS):
+    """ICs bootstrap em cache por versão dos dados, grupo, metal, reamostras e semente."""
+    caminho = str(caminho)
+    return _bootstrap(caminho, versao_dados(caminho), coluna_grupo, metal, n_reamostras, alpha, semente)
+
+
+@compartilhado(max_itens=64, persistente=True)
+def _permutacao(caminho, versao, metal, categoria, n_permutacoes, semente):
+    df = carregar_dados(caminho)
+    medidos = df[["Categoria", metal]].dropna()
+    a = medidos.loc[medidos["Categoria"] == categoria, metal]
+    b = medidos.loc[medidos["Categoria"] != categoria, metal]
+    return teste_permutacao(a, b, n_permutacoes, semente, rotulo=(categoria, metal))
+
+
+def carregar_permutacao(metal, categoria="Incidente", n_permutacoes=10_000, semente=SEMENTE,
+                        caminho=ARQUIVO_DADOS):
+    """Teste de permutação (categoria vs demais) em cache por versão dos dados e parâmetros."""
+    caminho = str(caminho)
+    return _permutacao(caminho, versao_dados(caminho), metal, categoria, n_permutacoes, semente)
@@ -0,0 +1,62 @@
+import numpy as np
+
+# --- Redução de pontos no servidor para os gráficos interativos ---
+# O navegador recebe no máximo PONTOS_MAXIMOS pontos por traço, qualquer que seja o
+# tamanho da série: LTTB para linhas (preserva a forma visual) e mínimo/máximo por
+# intervalo de x para nuvens de amostras (preserva picos e vales de cada "pixel").
+PONTOS_MAXIMOS = 2000
+
+
+def numerico(x):
+    """Eixo x como float (datas viram nanossegundos), para os cálculos de redução."""
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype("datetime64[ns]").astype(np.int64).astype(float)
+    return x.astype(float)
+
+
+def lttb(x, y, n_saida=PONTOS_MAXIMOS):
+    """Índices escolhidos pelo Largest-Triangle-Three-Buckets (x ordenado, sem NaN)."""
+    x, y = numerico(x), np.asarray(y, dtype=float)
+    n = len(x)
+    if n_saida >= n or n_saida < 3:
+        return np.arange(n)
+
+    # Primeiro e último pontos fixos; os demais divididos em n_saida - 2 baldes
+    arestas = np.linspace(1, n - 1, n_saida - 1).astype(np.int64)
+    indices = np.empty(n_saida, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    anterior = 0
+    for i in range(n_saida - 2):
+        inicio, fim = arestas[i], arestas[i + 1]
+        # Vértice do triângulo no balde seguinte: média dos pontos dele (ou o último ponto)
+        if i + 2 < len(arestas):
+            proximo = slice(arestas[i + 1], arestas[i + 2])
+        else:
+            proximo = slice(n - 1, n)
+        mx, my = x[proximo].mean(), y[proximo].mean()
+        area = np.abs((x[anterior] - mx) * (y[inicio:fim] - y[anterior])
+                      - (x[anterior] - x[inicio:fim]) * (my - y[anterior]))
+        anterior = inicio + int(np.argmax(area))
+        indices[i + 1] = anterior
+    return indices
+
+
+def min_max(x, y, n_baldes=PONTOS_MAXIMOS // 2):
+    """Índices do mínimo e do máximo de y em cada um de `n_baldes` intervalos iguais de x."""
+    x, y = numerico(x), np.asarray(y, dtype=float)
+    n = len(x)
+    if 2 * n_baldes >= n:
+        return np.arange(n)
+
+    x0, x1 = x.min(), x.max()
+    balde = ((x - x0) / ((x1 - x0) or 1.0) * n_baldes).astype(np.int64)
+    np.minimum(balde, n_baldes - 1, out=balde)
+
+    # Ordena por (balde, y): o primeiro de cada balde é o mínimo e o último, o máximo
+    ordem = np.lexsort((y, balde))
+    baldes = balde[ordem]
+    primeiros = np.flatnonzero(np.r_[True, baldes[1:] != baldes[:-1]])
+    ultimos = np.r_[primeiros[1:] - 1, n - 1]
+    indices = np.unique(np.r_[ordem[primeiros], ordem[ultimos]])
+    return indices[np.argsort(x[indices], kind="stable")]
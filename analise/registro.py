@@ -0,0 +1,53 @@
+from analise.compartilhado import compartilhado
+from analise.dados import ARQUIVO_DADOS, ORDEM_CATEGORIAS, carregar_dados, versao_dados
+
+
+class Registro:
+    """Estações e categorias presentes no dataset, com as posições das linhas de cada uma.
+
+    As posições são calculadas uma única vez (groupby.indices), evitando filtros
+    booleanos sobre o DataFrame inteiro a cada estação exibida.
+    """
+
+    def __init__(self, df):
+        self.posicoes_estacao = df.groupby("Estação", observed=True, sort=True).indices
+        self.posicoes_categoria = df.groupby("Categoria", observed=True).indices
+
+        pares = df[["Categoria", "Estação"]].dropna().drop_duplicates()
+        ordem = {cat: i for i, cat in enumerate(ORDEM_CATEGORIAS)}
+        categorias = sorted(pares["Categoria"].unique(), key=lambda c: (ordem.get(c, len(ordem)), c))
+        self.estacoes_por_categoria = {
+            cat: sorted(pares.loc[pares["Categoria"] == cat, "Estação"]) for cat in categorias
+        }
+        self.categoria_da_estacao = dict(zip(pares["Estação"], pares["Categoria"]))
+
+    @property
+    def categorias(self):
+        return list(self.estacoes_por_categoria)
+
+    @property
+    def estacoes(self):
+        return list(self.posicoes_estacao)
+
+    def posicoes(self, estacao=None, categoria=None):
+        if estacao is not None:
+            return self.posicoes_estacao[estacao]
+        return self.posicoes_categoria[categoria]
+
+    def linhas(self, df, estacao=None, categoria=None):
+        """Subconjunto de `df` de uma estação ou categoria, acessado por posição."""
+        return df.iloc[self.posicoes(estacao, categoria)]
+
+    def valores(self, df, coluna, estacao=None, categoria=None):
+        """Valores não nulos de `coluna` para uma estação ou categoria."""
+        return df[coluna].iloc[self.posicoes(estacao, categoria)].dropna()
+
+
+@compartilhado(max_itens=4)
+def _registro(caminho, versao):
+    return Registro(carregar_dados(caminho))
+
+
+def carregar_registro(caminho=ARQUIVO_DADOS):
+    caminho = str(caminho)
+    return _registro(caminho, versao_dados(caminho))
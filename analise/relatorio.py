@@ -0,0 +1,176 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from analise.cubo import consultar, montar_cubo, por_estacao
+from analise.dados import ARQUIVO_DADOS, COLUNA_DATA, METAIS, ler_dados, versao_dados
+from analise.limites import limites_da_norma
+from analise.particionado import resumir
+from analise.registro import Registro
+from analise.testes import executar_testes
+
+# --- Relatório completo sem navegador (CSV/JSON + figuras) ---
+# Uso: python -m analise.relatorio --saida relatorio/ [--processos N] [--formato png|svg]
+
+
+def veredito_limites(cubo):
+    """Classifica cada linha do cubo pelo IC 95% da média em relação ao limite legal."""
+    acima = cubo["IC inferior"] > cubo["Limite"]
+    abaixo = cubo["IC superior"] < cubo["Limite"]
+    veredito = np.select([acima, abaixo], ["Acima do limite", "Abaixo do limite"], "Inconclusivo")
+    veredito = np.where(cubo["IC"].isna(), "Amostra insuficiente", veredito)
+    return cubo.assign(Veredito=veredito)
+
+
+def _gravar_tabela(df, destino, nome):
+    df.to_csv(destino / f"{nome}.csv", index=False)
+    df.to_json(destino / f"{nome}.json", orient="records", force_ascii=False,
+               date_format="iso", indent=2)
+    return [f"{nome}.csv", f"{nome}.json"]
+
+
+# ---------------------
+# Figuras
+# ---------------------
+def especificacoes_figuras(registro):
+    """Lista de (tipo, metal, parâmetro) de todas as figuras do relatório."""
+    especificacoes = [("barras_incidentes", None, None), ("boxplot_violin", "Arsênio total", None)]
+    for metal in METAIS:
+        especificacoes += [
+            ("ic_categorias", metal, None),
+            ("boxplot_categorias", metal, None),
+            ("histograma_metal", metal, None),
+        ]
+        especificacoes += [("histograma_categoria", metal, c) for c in registro.categorias]
+        especificacoes += [("histograma_estacao", metal, e) for e in registro.estacoes]
+    return especificacoes
+
+
+def _construir(df, cubo, registro, resumo, tipo, metal, parametro):
+    from analise import graficos
+
+    if tipo == "barras_incidentes":
+        freq = df.loc[df["Categoria"] == "Incidente", "Estação"].value_counts()
+        return graficos.barras_incidentes(freq)
+    if tipo == "boxplot_violin":
+        return graficos.boxplot_violin(resumo.distribuicoes(metal), metal)
+    if tipo == "ic_categorias":
+        estat = consultar(cubo, metal, "Categoria").dropna(subset=["IC"]).reset_index(drop=True)
+        return graficos.grafico_ic_categorias(estat, metal, limites_da_norma()[metal])
+    if tipo == "boxplot_categorias":
+        return graficos.boxplot_categorias(resumo.distribuicoes(metal), metal)
+    if tipo == "histograma_metal":
+        return graficos.histograma_metal(df[metal].dropna(), metal)
+
+    if tipo == "histograma_categoria":
+        valores = registro.valores(df, metal, categoria=parametro)
+        tabela, cor = consultar(cubo, metal, "Categoria").set_index("Categoria"), "mediumpurple"
+    else:
+        # Uma estação pode estar em mais de uma categoria: IC com todas juntas, como na página 3
+        valores = registro.valores(df, metal, estacao=parametro)
+        tabela, cor = por_estacao(cubo, metal), "skyblue"
+    linha = tabela.loc[parametro]
+    return graficos.histograma_ic(valores, linha["Média"], linha["IC inferior"], linha["IC superior"],
+                                  f"Distribuição - {parametro}", cor)
+
+
+def _nome_figura(tipo, metal, parametro, formato):
+    partes = [tipo] + [str(p) for p in (metal, parametro) if p is not None]
+    return "__".join(p.replace(" ", "_") for p in partes) + f".{formato}"
+
+
+def renderizar_lote(caminho, especificacoes, destino, formato="png"):
+    """Renderiza um lote de figuras em arquivos (executado em um processo do pool)."""
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    df = ler_dados(caminho)
+    cubo = montar_cubo(df)
+    registro = Registro(df)
+    resumo = resumir(df)
+    arquivos = []
+    for tipo, metal, parametro in especificacoes:
+        fig = _construir(df, cubo, registro, resumo, tipo, metal, parametro)
+        try:
+            nome = _nome_figura(tipo, metal, parametro, formato)
+            fig.savefig(Path(destino) / nome, format=formato, bbox_inches="tight")
+            arquivos.append(nome)
+        finally:
+            plt.close(fig)
+    return arquivos
+
+
+def renderizar_figuras(caminho, registro, destino, processos=None, formato="png"):
+    especificacoes = especificacoes_figuras(registro)
+    processos = processos or os.cpu_count() or 1
+    if processos == 1:
+        return renderizar_lote(caminho, especificacoes, destino, formato)
+
+    # Divide as figuras entre os processos (cada um lê o cache colunar por mmap)
+    lotes = [especificacoes[i::processos] for i in range(processos)]
+    with ProcessPoolExecutor(max_workers=processos) as executor:
+        futuros = [executor.submit(renderizar_lote, caminho, lote, destino, formato) for lote in lotes if lote]
+        return [nome for futuro in futuros for nome in futuro.result()]
+
+
+# ---------------------
+# Relatório
+# ---------------------
+def gerar_relatorio(destino, caminho=ARQUIVO_DADOS, processos=None, formato="png", figuras=True):
+    """Gera todas as tabelas e figuras do dashboard em `destino`. Retorna o resumo gravado."""
+    inicio = time.perf_counter()
+    caminho = str(caminho)
+    destino = Path(destino)
+    destino.mkdir(parents=True, exist_ok=True)
+
+    df = ler_dados(caminho)
+    registro = Registro(df)
+    cubo = veredito_limites(montar_cubo(df))
+    testes = executar_testes(df, registro)
+    contingencias = pd.concat(testes.contingencias, names=["Metal"]).reset_index()
+
+    arquivos = []
+    arquivos += _gravar_tabela(cubo, destino, "estatisticas")
+    arquivos += _gravar_tabela(testes.comparacoes, destino, "testes_comparacoes")
+    arquivos += _gravar_tabela(testes.associacoes, destino, "testes_associacoes")
+    arquivos += _gravar_tabela(contingencias, destino, "contingencias")
+
+    if figuras:
+        pasta_figuras = destino / "figuras"
+        pasta_figuras.mkdir(exist_ok=True)
+        arquivos += [f"figuras/{nome}" for nome in
+                     renderizar_figuras(caminho, registro, pasta_figuras, processos, formato)]
+
+    resumo = {
+        "versao_dados": versao_dados(caminho),
+        "gerado_em": pd.Timestamp.now().isoformat(timespec="seconds"),
+        "registros": len(df),
+        "periodo": [str(df[COLUNA_DATA].min()), str(df[COLUNA_DATA].max())],
+        "metais": METAIS,
+        "estacoes": registro.estacoes,
+        "arquivos": arquivos,
+        "duracao_s": round(time.perf_counter() - inicio, 3),
+    }
+    (destino / "resumo.json").write_text(json.dumps(resumo, ensure_ascii=False, indent=2), encoding="utf-8")
+    return resumo
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera o relatório completo do dashboard sem navegador.")
+    parser.add_argument("--saida", default="relatorio", type=Path, help="diretório de saída")
+    parser.add_argument("--dados", default=ARQUIVO_DADOS, type=Path, help="planilha de dados")
+    parser.add_argument("--processos", type=int, help="processos para renderizar figuras (padrão: todos os núcleos)")
+    parser.add_argument("--formato", choices=["png", "svg"], default="png")
+    parser.add_argument("--sem-figuras", action="store_true", help="gera apenas as tabelas")
+    args = parser.parse_args()
+
+    resumo = gerar_relatorio(args.saida, args.dados, args.processos, args.formato, not args.sem_figuras)
+    print(f"{len(resumo['arquivos'])} arquivos gravados em {args.saida} ({resumo['duracao_s']} s)")
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+
+from analise.compartilhado import compartilhado
+from analise.cubo import NIVEIS
+from analise.dados import ARQUIVO_DADOS, COLUNA_DATA, METAIS, carregar_dados, versao_dados
+from analise.estatisticas import ic_de_agregados, intervalo_confianca
+
+# --- Séries temporais: concentrações agregadas por período ---
+FREQUENCIAS = {
+    "Dia": "D",
+    "Semana": "W",
+    "Mês": "MS",
+    "Trimestre": "QS",
+    "Ano": "YS",
+}
+
+
+def reamostrar(df, frequencia="MS", chaves=("Categoria",), metais=None, alpha=0.05):
+    """n, média e IC de cada metal por grupo e período (períodos sem amostras não aparecem)."""
+    por = list(chaves) + [pd.Grouper(key=COLUNA_DATA, freq=frequencia)]
+    serie = intervalo_confianca(df.dropna(subset=[COLUNA_DATA]), por, metais, alpha=alpha)
+    return serie.sort_values(list(chaves) + ["Metal", COLUNA_DATA], ignore_index=True)
+
+
+def media_movel(serie, janela=3, chaves=("Categoria",), alpha=0.05):
+    """Média móvel e IC sobre os últimos `janela` períodos com amostras, por grupo e metal.
+
+    Combina somas e somas de quadrados dos períodos (não só as médias), de modo que cada
+    janela equivale a agrupar todas as amostras dela.
+    """
+    grupo = list(chaves) + ["Metal"]
+    n = serie["n"].astype(float)
+    soma = (serie["Média"] * n).fillna(0.0)
+    quadrados = (serie["Variância"].fillna(0.0) * (n - 1).clip(lower=0) + serie["Média"].fillna(0.0) ** 2 * n)
+    somas = pd.DataFrame({"n": n, "soma": soma, "quadrados": quadrados})
+
+    # Soma móvel por grupo via somas acumuladas: acumulado(t) - acumulado(t - janela)
+    rotulos = [serie[c] for c in grupo]
+    acumulado = somas.groupby(rotulos, observed=True, sort=False).cumsum()
+    anterior = acumulado.groupby(rotulos, observed=True, sort=False).shift(janela).fillna(0.0)
+    movel = acumulado - anterior
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        media = movel["soma"] / movel["n"]
+        variancia = (movel["quadrados"] - movel["n"] * media ** 2) / (movel["n"] - 1)
+    ic = ic_de_agregados(movel["n"], media, variancia.clip(lower=0), alpha, indice=serie.index)
+    return ic.add_suffix(" (móvel)")
+
+
+def tendencias(serie, grupo, alpha=0.05, minimo=3):
+    """Teste de tendência de Kendall das médias de cada grupo ao longo dos períodos.
+
+    Grupos com menos de `minimo` períodos com amostras ficam de fora.
+    """
+    from scipy.stats import kendalltau
+
+    linhas = []
+    for nome, dados in serie[serie["n"] > 0].groupby(grupo, observed=True, sort=False):
+        if len(dados) < minimo:
+            continue
+        tau, p = kendalltau(dados[COLUNA_DATA].rank(), dados["Média"])
+        linhas.append({grupo: nome, "Períodos": len(dados), "tau": tau, "p-valor": p,
+                       "Conclusão": ("Tendência crescente" if tau > 0 else "Tendência decrescente")
+                       if p < alpha else "Sem tendência significativa"})
+    return pd.DataFrame(linhas)
+
+
+def montar_series(df, frequencia="MS", nivel="Categoria", janela=3, alpha=0.05):
+    chaves = NIVEIS[nivel]
+    serie = reamostrar(df, frequencia, chaves, METAIS, alpha)
+    return pd.concat([serie, media_movel(serie, janela, chaves, alpha)], axis=1)
+
+
+@compartilhado(max_itens=32, persistente=True)
+def _series(caminho, versao, frequencia, nivel, janela, alpha):
+    return montar_series(carregar_dados(caminho), frequencia, nivel, janela, alpha)
+
+
+def carregar_series(frequencia="MS", nivel="Categoria", janela=3, alpha=0.05, caminho=ARQUIVO_DADOS):
+    """Séries de todos os metais para um nível, em cache por versão dos dados e parâmetros."""
+    caminho = str(caminho)
+    return _series(caminho, versao_dados(caminho), frequencia, nivel, janela, alpha)
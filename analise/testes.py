@@ -0,0 +1,223 @@
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+from analise.compartilhado import compartilhado
+from analise.conformidade import ROTULOS_LIMITE, contingencias as tabelas_contingencia
+from analise.dados import ARQUIVO_DADOS, METAIS, ORDEM_CATEGORIAS, carregar_dados, versao_dados
+from analise.ingestao import reagrupar
+from analise.limites import excedencias, versao_limites
+from analise.registro import Registro
+
+# --- Bateria de testes de hipótese para todos os metais e comparações ---
+CATEGORIA_CONTROLE = "Longe"
+ALPHA = 0.05
+
+
+def corrigir_pvalores(p, metodo="holm"):
+    """p-valores ajustados para comparações múltiplas (Holm ou Benjamini-Hochberg)."""
+    p = np.asarray(p, dtype=float)
+    ajustado = np.full(p.shape, np.nan)
+    validos = np.flatnonzero(np.isfinite(p))
+    m = len(validos)
+    if m == 0:
+        return ajustado
+
+    ordem = validos[np.argsort(p[validos])]
+    ordenados = p[ordem]
+    if metodo == "holm":
+        corrigidos = np.maximum.accumulate(ordenados * (m - np.arange(m)))
+    elif metodo == "bh":
+        corrigidos = np.minimum.accumulate((ordenados * m / np.arange(1, m + 1))[::-1])[::-1]
+    else:
+        raise ValueError(f"Método de correção desconhecido: {metodo}")
+    ajustado[ordem] = np.minimum(corrigidos, 1.0)
+    return ajustado
+
+
+def comparar(a, b, alpha=ALPHA):
+    """Mesmo critério da página 4: Shapiro nos dois grupos, depois Welch ou Mann-Whitney."""
+    from scipy.stats import mannwhitneyu, shapiro, ttest_ind
+
+    p_a = shapiro(a).pvalue if len(a) >= 3 else np.nan
+    p_b = shapiro(b).pvalue if len(b) >= 3 else np.nan
+    if len(a) < 2 or len(b) < 2:
+        return p_a, p_b, None, np.nan, np.nan
+
+    if p_a > alpha and p_b > alpha:
+        resultado, teste = ttest_ind(a, b, equal_var=False), "Teste T (Welch)"
+    else:
+        resultado, teste = mannwhitneyu(a, b), "Mann-Whitney"
+    return p_a, p_b, teste, resultado.statistic, resultado.pvalue
+
+
+class ResultadoTestes:
+    """Tabelas da bateria de testes: comparações entre grupos e associação com os limites."""
+
+    def __init__(self, comparacoes, associacoes, contingencias):
+        self.comparacoes = comparacoes
+        self.associacoes = associacoes
+        self.contingencias = contingencias
+
+    def comparacao(self, metal, tipo, grupo_a, grupo_b):
+        """Linha da comparação pedida, ou None se ela não foi feita (grupo ausente no dataset)."""
+        linhas = self.comparacoes
+        linhas = linhas[(linhas["Metal"] == metal) & (linhas["Tipo"] == tipo)
+                        & (linhas["Grupo A"] == grupo_a) & (linhas["Grupo B"] == grupo_b)]
+        return None if linhas.empty else linhas.iloc[0]
+
+
+def _pares(registro, controle):
+    """(tipo, rótulo A, posições A, rótulo B, posições B) de todas as comparações."""
+    for categoria in registro.categorias:
+        outras = [registro.posicoes(categoria=c) for c in registro.categorias if c != categoria]
+        if outras:
+            yield ("Categoria vs demais", categoria, registro.posicoes(categoria=categoria),
+                   "Outros", np.concatenate(outras))
+
+    for cat_a, cat_b in combinations(registro.categorias, 2):
+        yield "Entre categorias", cat_a, registro.posicoes(categoria=cat_a), cat_b, registro.posicoes(categoria=cat_b)
+
+    if controle in registro.posicoes_categoria:
+        posicoes_controle = registro.posicoes(categoria=controle)
+        for categoria, estacoes in registro.estacoes_por_categoria.items():
+            if categoria == controle:
+                continue
+            for estacao in estacoes:
+                yield "Estação vs controle", estacao, registro.posicoes(estacao=estacao), controle, posicoes_controle
+
+
+def _corrigir(comparacoes, associacoes, contingencias, alpha):
+    comparacoes = pd.DataFrame(comparacoes)
+    comparacoes["p ajustado (Holm)"] = corrigir_pvalores(comparacoes["p-valor"], "holm")
+    comparacoes["p ajustado (BH)"] = corrigir_pvalores(comparacoes["p-valor"], "bh")
+    comparacoes["Significativo"] = comparacoes["p ajustado (Holm)"] < alpha
+    associacoes = pd.DataFrame(associacoes)
+    associacoes["p ajustado (Holm)"] = corrigir_pvalores(associacoes["p-valor"], "holm")
+    associacoes["Significativo"] = associacoes["p ajustado (Holm)"] < alpha
+    return ResultadoTestes(comparacoes, associacoes, contingencias)
+
+
+def _qui_quadrado(metal, tabela):
+    from scipy.stats import chi2_contingency
+
+    tabela = tabela.loc[:, tabela.sum() > 0]
+    if tabela.shape[0] > 1 and tabela.shape[1] > 1:
+        chi2, p, gl, _ = chi2_contingency(tabela)
+    else:
+        chi2, p, gl = np.nan, np.nan, 0
+    return {"Metal": metal, "Qui-quadrado": chi2, "gl": gl, "p-valor": p}
+
+
+def executar_testes(df, registro=None, controle=CATEGORIA_CONTROLE, alpha=ALPHA):
+    """Roda a bateria completa para todos os metais, com p-valores ajustados (Holm e BH)."""
+    registro = Registro(df) if registro is None else registro
+    linhas = []
+    for metal in METAIS:
+        valores = df[metal].to_numpy(dtype=float)
+        for tipo, rotulo_a, pos_a, rotulo_b, pos_b in _pares(registro, controle):
+            a = valores[pos_a]
+            b = valores[pos_b]
+            a = a[~np.isnan(a)]
+            b = b[~np.isnan(b)]
+            p_a, p_b, teste, estatistica, p = comparar(a, b, alpha)
+            linhas.append({
+                "Metal": metal, "Tipo": tipo, "Grupo A": rotulo_a, "Grupo B": rotulo_b,
+                "n A": len(a), "n B": len(b),
+                "Média A": a.mean() if len(a) else np.nan, "Média B": b.mean() if len(b) else np.nan,
+                "Shapiro p A": p_a, "Shapiro p B": p_b,
+                "Teste": teste, "Estatística": estatistica, "p-valor": p,
+            })
+
+    # Qui-quadrado: Categoria × (acima / dentro do limite), só com valores medidos
+    contingencias = tabelas_contingencia(df, excedencias(df, METAIS), "Categoria")
+    associacoes = [_qui_quadrado(metal, contingencias[metal]) for metal in METAIS]
+    return _corrigir(linhas, associacoes, contingencias, alpha)
+
+
+def _pares_agregados(grupos, controle):
+    """Mesmas comparações de `_pares`, como máscaras sobre as linhas de `ingestao.agregar`."""
+    pares = grupos[["Categoria", "Estação"]].dropna().drop_duplicates()
+    ordem = {cat: i for i, cat in enumerate(ORDEM_CATEGORIAS)}
+    categorias = sorted(pares["Categoria"].unique(), key=lambda c: (ordem.get(c, len(ordem)), c))
+    categoria = grupos["Categoria"]
+    for cat in categorias:
+        if len(categorias) > 1:
+            yield "Categoria vs demais", cat, categoria == cat, "Outros", categoria.notna() & (categoria != cat)
+
+    for cat_a, cat_b in combinations(categorias, 2):
+        yield "Entre categorias", cat_a, categoria == cat_a, cat_b, categoria == cat_b
+
+    if controle in categorias:
+        for cat in categorias:
+            if cat == controle:
+                continue
+            for estacao in sorted(pares.loc[pares["Categoria"] == cat, "Estação"]):
+                yield "Estação vs controle", estacao, grupos["Estação"] == estacao, controle, categoria == controle
+
+
+def testes_de_agregados(grupos, controle=CATEGORIA_CONTROLE, alpha=ALPHA):
+    """Bateria de `executar_testes` a partir de n, média e M2 por grupo (modo particionado).
+
+    Sem as amostras não há Shapiro-Wilk nem Mann-Whitney: todas as comparações usam
+    o teste T de Welch, calculado dos momentos dos grupos agregados.
+    """
+    from scipy.stats import ttest_ind_from_stats
+
+    linhas = []
+    for tipo, rotulo_a, filtro_a, rotulo_b, filtro_b in _pares_agregados(grupos, controle):
+        a = reagrupar(grupos[filtro_a.to_numpy()], []).set_index("Metal")
+        b = reagrupar(grupos[filtro_b.to_numpy()], []).set_index("Metal")
+        for metal in METAIS:
+            n_a, media_a, m2_a = a.loc[metal, ["n", "Média", "M2"]] if metal in a.index else (0, np.nan, 0.0)
+            n_b, media_b, m2_b = b.loc[metal, ["n", "Média", "M2"]] if metal in b.index else (0, np.nan, 0.0)
+            teste, estatistica, p = None, np.nan, np.nan
+            if n_a >= 2 and n_b >= 2:
+                teste = "Teste T (Welch)"
+                estatistica, p = ttest_ind_from_stats(media_a, np.sqrt(m2_a / (n_a - 1)), n_a,
+                                                      media_b, np.sqrt(m2_b / (n_b - 1)), n_b, equal_var=False)
+            linhas.append({
+                "Metal": metal, "Tipo": tipo, "Grupo A": rotulo_a, "Grupo B": rotulo_b,
+                "n A": int(n_a), "n B": int(n_b), "Média A": media_a, "Média B": media_b,
+                "Shapiro p A": np.nan, "Shapiro p B": np.nan,
+                "Teste": teste, "Estatística": estatistica, "p-valor": p,
+            })
+    linhas.sort(key=lambda linha: METAIS.index(linha["Metal"]))
+
+    por_categoria = reagrupar(grupos.dropna(subset=["Categoria"]), ["Categoria"])
+    contingencias = {}
+    for metal in METAIS:
+        tabela = por_categoria[(por_categoria["Metal"] == metal) & (por_categoria["n"] > 0)]
+        tabela = pd.DataFrame({
+            ROTULOS_LIMITE[True]: tabela["Excedências"].to_numpy(),
+            ROTULOS_LIMITE[False]: (tabela["n"] - tabela["Excedências"]).to_numpy(),
+        }, index=pd.Index(tabela["Categoria"], name="Categoria"))
+        ordem = {cat: i for i, cat in enumerate(ORDEM_CATEGORIAS)}
+        tabela = tabela.loc[sorted(tabela.index, key=lambda c: (ordem.get(c, len(ordem)), c))]
+        tabela.columns.name = "Metal_cat"
+        contingencias[metal] = tabela
+    associacoes = [_qui_quadrado(metal, contingencias[metal]) for metal in METAIS]
+    return _corrigir(linhas, associacoes, contingencias, alpha)
+
+
+@compartilhado(max_itens=4, persistente=True)
+def _testes(caminho, versao, controle, alpha, versao_tabela, particionado):
+    # A versão da tabela de limites entra na chave (tabelas de contingência)
+    from analise.particionado import carregar_resumo
+    from analise.registro import carregar_registro
+
+    if particionado:
+        return testes_de_agregados(carregar_resumo(caminho).grupos, controle, alpha)
+    return executar_testes(carregar_dados(caminho), carregar_registro(caminho), controle, alpha)
+
+
+def carregar_testes(caminho=ARQUIVO_DADOS, controle=CATEGORIA_CONTROLE, alpha=ALPHA):
+    """Resultado da bateria para a versão atual dos dados (calculado uma vez por versão).
+
+    No modo particionado a bateria sai dos agregados do resumo, sem carregar as amostras.
+    """
+    from analise.particionado import modo_particionado
+
+    caminho = str(caminho)
+    return _testes(caminho, versao_dados(caminho), controle, alpha, versao_limites(), modo_particionado(caminho))
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+from analise.dados import COLUNA_DATA, ORDEM_CATEGORIAS, compactar, normalizar_colunas
+
+# --- Gerador de dados sintéticos com o mesmo esquema da planilha de metais ---
+# Parâmetros lognormais (mediana em mg/L, dispersão) por categoria e fração de valores
+# ausentes aproximados a partir de dados_metais_com_categoria.xlsx.
+PARAMETROS = {
+    "Arsênio total": {"Incidente": (0.002, 1.4), "Medio": (0.0008, 0.6), "Longe": (0.0007, 0.4), "ausentes": 0.32},
+    "Ferro dissolvido": {"Incidente": (0.15, 0.7), "Medio": (0.2, 0.7), "Longe": (0.35, 0.6), "ausentes": 0.23},
+    "Manganês total": {"Incidente": (0.16, 1.3), "Medio": (0.06, 0.8), "Longe": (0.07, 0.9), "ausentes": 0.22},
+}
+
+
+def gerar(linhas, estacoes=8, inicio="1997-01-01", fim="2023-12-31", semente=0):
+    """DataFrame sintético com `linhas` amostras distribuídas entre `estacoes` estações."""
+    rng = np.random.default_rng(semente)
+    codigos = np.array([f"RD{i:03d}" for i in range(1, estacoes + 1)])
+    categorias = np.array(ORDEM_CATEGORIAS)[np.arange(estacoes) % len(ORDEM_CATEGORIAS)]
+
+    estacao = rng.integers(0, estacoes, size=linhas)
+    categoria = categorias[estacao]
+    inicio, fim = pd.Timestamp(inicio), pd.Timestamp(fim)
+    dias = rng.integers(0, (fim - inicio).days + 1, size=linhas)
+    minutos = rng.integers(7 * 60, 17 * 60, size=linhas)
+
+    df = pd.DataFrame({
+        "Estação": codigos[estacao],
+        COLUNA_DATA: inicio + pd.to_timedelta(dias, unit="D"),
+        "Hora de Amostragem": pd.to_timedelta(minutos, unit="min").astype(str).str[-8:],
+    })
+    for metal, parametros in PARAMETROS.items():
+        valores = np.empty(linhas)
+        for cat in ORDEM_CATEGORIAS:
+            mascara = categoria == cat
+            mediana, dispersao = parametros[cat]
+            valores[mascara] = rng.lognormal(np.log(mediana), dispersao, size=mascara.sum())
+        valores[rng.random(linhas) < parametros["ausentes"]] = np.nan
+        df[metal] = valores.round(6)
+    df["Categoria"] = categoria
+    return compactar(normalizar_colunas(df))
+
+
+def estacoes_sinteticas(estacoes=8, extensao_km=650):
+    """Tabela no formato de estacoes.csv para as estações de `gerar`, espaçadas ao longo do rio."""
+    km = np.linspace(0, extensao_km, estacoes)
+    return pd.DataFrame({
+        "Estação": [f"RD{i:03d}" for i in range(1, estacoes + 1)],
+        "Km": km,
+        "Latitude": -20.2 + km / extensao_km * 0.6,
+        "Longitude": -43.4 + km / extensao_km * 3.6,
+        "Rio": "Rio Doce",
+        "Precisão": "sintética",
+    })
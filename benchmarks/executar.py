@@ -0,0 +1,170 @@
+import argparse
+import json
+import platform
+import subprocess
+import tempfile
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from pyarrow import feather as feather_io
+
+from analise import cache_colunar
+from analise.cubo import montar_cubo
+from analise.dados import METAIS, RAIZ, compactar, normalizar_colunas
+from analise.espacial import avaliar as avaliar_espacial
+from analise.estacoes import IndiceEspacial
+from analise.estatisticas import intervalo_confianca
+from analise.explorador import IndiceExplorador
+from analise.ingestao import agregar
+from analise.kde import kde
+from analise.particionado import resumir, resumir_arquivos
+from analise.registro import Registro
+from analise.series import montar_series
+from analise.testes import executar_testes
+from benchmarks.dados_sinteticos import estacoes_sinteticas, gerar
+
+# --- Benchmarks dos caminhos usados pelas páginas, com dados sintéticos ---
+# Uso: python -m benchmarks.executar --linhas 1000 100000 1000000 --estacoes 8 200
+# Cada linha do arquivo de saída (JSON Lines) é uma medição; --comparar mostra a razão
+# entre duas execuções (por exemplo, antes e depois de uma mudança).
+DIRETORIO_RESULTADOS = RAIZ / "benchmarks" / "resultados"
+TAMANHOS = [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6]
+MAX_LINHAS_EXCEL = 100_000  # acima disso a escrita da planilha domina o tempo do benchmark
+
+
+def _versao_codigo():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconhecida"
+
+
+def _cronometrar(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos), float(np.median(tempos))
+
+
+def _renderizar_histograma(df):
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import io
+
+    import matplotlib.pyplot as plt
+
+    from analise.graficos import histograma_metal
+
+    fig = histograma_metal(df[METAIS[0]].dropna(), METAIS[0])
+    fig.savefig(io.BytesIO(), format="png")
+    plt.close(fig)
+
+
+def _renderizar_caixas(resumo):
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import io
+
+    import matplotlib.pyplot as plt
+
+    from analise.graficos import boxplot_violin
+
+    fig = boxplot_violin(resumo.distribuicoes(METAIS[0]), METAIS[0])
+    fig.savefig(io.BytesIO(), format="png")
+    plt.close(fig)
+
+
+def caminhos(df, pasta, linhas):
+    """Operações medidas: (nome, função sem argumentos)."""
+    feather = pasta / "dados.feather"
+    cache_colunar.gravar(df, feather)
+    registro = Registro(df)
+    valores = df[METAIS[2]].dropna().to_numpy()
+    grade = np.linspace(valores.min(), valores.max(), 200)
+    cubo = montar_cubo(df)
+    estatisticas = agregar(df)
+    indice = IndiceEspacial(estacoes_sinteticas(df["Estação"].nunique()))
+    resumo = resumir(df)
+    explorador = IndiceExplorador(compactar(df.copy()))
+
+    operacoes = [
+        ("carga: feather (mmap)", lambda: feather_io.read_table(feather, memory_map=True).to_pandas()),
+        ("resumo particionado (feather)", lambda: resumir_arquivos([feather])),
+        ("registro de estações", lambda: Registro(df)),
+        ("IC: categoria × estação × metal", lambda: intervalo_confianca(df, ["Categoria", "Estação"])),
+        ("cubo de estatísticas", lambda: montar_cubo(df)),
+        ("séries: mensal por estação", lambda: montar_series(df, "MS", "Estação", 3)),
+        ("espacial: perfil, trechos e vizinhas", lambda: avaliar_espacial(estatisticas, cubo, indice)),
+        ("bateria de testes", lambda: executar_testes(df, registro)),
+        ("KDE (automática)", lambda: kde(valores, grade)),
+        ("gráfico: histograma + KDE", lambda: _renderizar_histograma(df)),
+        ("gráfico: boxplot + violino (esboços)", lambda: _renderizar_caixas(resumo)),
+        ("explorador: filtro, ordenação e página", lambda: explorador.pagina(explorador.filtrar(
+            ordenar_por=METAIS[0], crescente=False, categorias=["Incidente"], metal=METAIS[1], faixa=(0, 1)), 2)),
+    ]
+    if linhas <= MAX_LINHAS_EXCEL:
+        planilha = pasta / "dados.xlsx"
+        df.to_excel(planilha, index=False)
+        operacoes.insert(0, ("carga: excel (openpyxl)", lambda: normalizar_colunas(pd.read_excel(planilha))))
+    return operacoes
+
+
+def executar(tamanhos, estacoes, repeticoes=3, saida=None):
+    saida = Path(saida or DIRETORIO_RESULTADOS / f"{time.strftime('%Y%m%d-%H%M%S')}.jsonl")
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    comum = {
+        "codigo": _versao_codigo(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "maquina": platform.machine(),
+        "data": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    with open(saida, "a", encoding="utf-8") as arquivo, tempfile.TemporaryDirectory() as temporario:
+        for n_estacoes in estacoes:
+            for linhas in tamanhos:
+                df = gerar(linhas, n_estacoes)
+                for nome, funcao in caminhos(df, Path(temporario), linhas):
+                    minimo, mediana = _cronometrar(funcao, repeticoes)
+                    medicao = {**comum, "caminho": nome, "linhas": linhas, "estacoes": n_estacoes,
+                               "repeticoes": repeticoes, "min_s": round(minimo, 6), "mediana_s": round(mediana, 6)}
+                    arquivo.write(json.dumps(medicao, ensure_ascii=False) + "\n")
+                    arquivo.flush()
+                    print(f"{nome:<36} {linhas:>10,} linhas {n_estacoes:>5} estações  {minimo * 1000:10.1f} ms")
+    return saida
+
+
+def comparar(anterior, atual):
+    """Tabela com a razão atual/anterior do tempo mínimo de cada caminho (> 1 = regressão)."""
+    chaves = ["caminho", "linhas", "estacoes"]
+    a = pd.read_json(anterior, lines=True).groupby(chaves)["min_s"].min()
+    b = pd.read_json(atual, lines=True).groupby(chaves)["min_s"].min()
+    tabela = pd.DataFrame({"anterior_s": a, "atual_s": b}).dropna()
+    tabela["razao"] = tabela["atual_s"] / tabela["anterior_s"]
+    return tabela.reset_index()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks do dashboard com dados sintéticos.")
+    parser.add_argument("--linhas", type=int, nargs="+", default=TAMANHOS)
+    parser.add_argument("--estacoes", type=int, nargs="+", default=[8, 100])
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--saida", type=Path)
+    parser.add_argument("--comparar", type=Path, metavar="ANTERIOR",
+                        help="resultado anterior para comparar com esta execução")
+    args = parser.parse_args()
+
+    # Shapiro-Wilk avisa para n > 5000; o aviso não interessa à medição.
+    warnings.simplefilter("ignore", UserWarning)
+
+    resultado = executar(args.linhas, args.estacoes, args.repeticoes, args.saida)
+    print(f"Resultados gravados em {resultado}")
+    if args.comparar:
+        print(comparar(args.comparar, resultado).to_string(index=False))
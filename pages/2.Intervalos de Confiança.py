@@ -1,90 +1,37 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-from scipy import stats
+
+from analise import instrumentacao
+from analise.cubo import carregar_cubo, consultar
+from analise.estilo import aplicar_estilo
+from analise.figuras import renderizar
+from analise.graficos import grafico_ic_categorias
+from analise.limites import NORMA_PADRAO, limites_da_norma, normas
+from analise.particionado import carregar_resumo, modo_particionado
+from analise.reamostragem import METODOS_IC, carregar_bootstrap
 
 # Configuração da página
 st.set_page_config(page_title="📏 Intervalos de Confiança", layout="wide")
+instrumentacao.iniciar("Intervalos de Confiança")
+
+# --- Estilo visual lavanda + ajuste no botão ---
+ESTILO_SELECT = """
+/* Estilo do botão selectbox */
+div[data-baseweb="select"] > div {
+    background-color: #ede6fa !important;
+    border: 1.5px solid black !important;
+    border-radius: 10px !important;
+}
 
-# --- Estilo visual lavanda embutido + ajuste no botão ---
-st.markdown("""
-<style>
-    /* Oculta o header padrão do Streamlit */
-    header {visibility: hidden;}
-    .viewerBadge_container__1QSob {visibility: hidden;}
-
-    /* Padding no conteúdo principal */
-    .main .block-container {
-        padding-top: 2rem;
-    }
-
-    /* Fundo e fontes */
-    body, .main, .block-container {
-        background-color: #f9f7fc !important;
-        color: #3e3553;
-        font-family: 'Segoe UI', sans-serif;
-    }
-
-    section[data-testid="stSidebar"] {
-        background-color: #5e4b8b !important;
-    }
-
-    section[data-testid="stSidebar"] * {
-        color: white !important;
-    }
-
-    h1, h2, h3, h4 {
-        color: #4a3d6a;
-    }
-
-    /* Caixa lavanda */
-    .lavender-box {
-        background-color: #ede6fa;
-        border-left: 6px solid #b89fe6;
-        border-radius: 10px;
-        padding: 1.5rem;
-        margin-bottom: 25px;
-        box-shadow: 0 4px 10px rgba(0,0,0,0.05);
-    }
-
-    .banner {
-        background-color: #5e4b8b;
-        color: white;
-        padding: 1.5rem;
-        text-align: center;
-        font-size: 1.5rem;
-        font-weight: 600;
-        border-radius: 10px;
-        margin-bottom: 40px;
-        letter-spacing: 0.5px;
-    }
-
-    .footer {
-        font-size: 0.9rem;
-        color: #777;
-        text-align: center;
-        margin-top: 40px;
-    }
-
-    /* Estilo do botão selectbox */
-    div[data-baseweb="select"] > div {
-        background-color: #ede6fa !important;
-        border: 1.5px solid black !important;
-        border-radius: 10px !important;
-    }
-
-
-    div[data-baseweb="select"] * {
-        color: #4a355a !important;
-        font-family: "Segoe UI", sans-serif;
-    }
-
-    div[data-baseweb="select"]:hover {
-        border-color: #4a355a !important;
-    }
-</style>
-""", unsafe_allow_html=True)
+div[data-baseweb="select"] * {
+    color: #4a355a !important;
+    font-family: "Segoe UI", sans-serif;
+}
+
+div[data-baseweb="select"]:hover {
+    border-color: #4a355a !important;
+}
+"""
+aplicar_estilo(ESTILO_SELECT)
 
 # --- Banner ---
 st.markdown('<div class="lavender-box"><h2>📏 Intervalos de Confiança</h2></div>', unsafe_allow_html=True)
@@ -110,13 +57,19 @@ Avaliar a concentração de arsênio total, ferro dissolvido e manganês total n
 st.markdown('</div>', unsafe_allow_html=True)
 
 # --- Carregar dados ---
-df = pd.read_excel("dados_metais_com_categoria.xlsx")
+# A página só usa agregados (cubo e bootstrap em cache): o número de linhas vem do
+# resumo, sem carregar a base inteira
+with instrumentacao.etapa("resumo dos dados", cache=True) as medicao:
+    medicao["linhas"] = carregar_resumo().linhas
+with instrumentacao.etapa("cubo de estatísticas", cache=True):
+    cubo = carregar_cubo()
 
 # --- Dicionários ---
-variaveis_limites = {
-    "Arsênio total": (0.01, "🔬 Arsênio Total – Média com IC 95% por Categoria"),
-    "Ferro dissolvido": (0.3, "🔩 Ferro Dissolvido – Média com IC 95% por Categoria"),
-    "Manganês total": (0.1, "⚙️ Manganês Total – Média com IC 95% por Categoria")
+# Os limites vêm da tabela de normas (limites.csv), conforme a norma escolhida abaixo
+titulos = {
+    "Arsênio total": "🔬 Arsênio Total – Média com IC 95% por Categoria",
+    "Ferro dissolvido": "🔩 Ferro Dissolvido – Média com IC 95% por Categoria",
+    "Manganês total": "⚙️ Manganês Total – Média com IC 95% por Categoria",
 }
 
 explicacoes = {
@@ -167,41 +120,36 @@ st.markdown('<div class="lavender-box">', unsafe_allow_html=True)
 st.markdown("### 🧪 Escolha o metal para análise:")
 metal_escolhido = st.selectbox(
     "",
-    options=list(variaveis_limites.keys()),
+    options=list(titulos.keys()),
     format_func=lambda x: x.capitalize(),
     index=2
 )
+# O bootstrap reamostra as amostras: no modo particionado só o IC t-Student (agregados)
+metodo_ic = st.radio("Método do intervalo de confiança:", METODOS_IC[:1] if modo_particionado() else METODOS_IC,
+                     horizontal=True)
+lista_normas = normas()
+norma = st.selectbox("Norma de referência para o limite:", lista_normas, index=lista_normas.index(NORMA_PADRAO))
 st.markdown('</div>', unsafe_allow_html=True)
 
 # --- Análise do metal selecionado ---
-df[metal_escolhido] = pd.to_numeric(df[metal_escolhido], errors='coerce')
-
-def calcular_ic_categoria(grupo):
-    dados = grupo[metal_escolhido].dropna()
-    n = len(dados)
-    if n > 1:
-        media = dados.mean()
-        sem = stats.sem(dados)
-        ic = sem * stats.t.ppf(0.975, n - 1)
-        return pd.Series({'Média': media, 'IC': ic})
-    return pd.Series({'Média': None, 'IC': None})
-
-estat = df.groupby('Categoria').apply(calcular_ic_categoria).dropna().reset_index()
-limite, titulo = variaveis_limites[metal_escolhido]
+# Consulta ao cubo pré-calculado: trocar de metal não refaz nenhum cálculo
+with instrumentacao.etapa(f"IC por categoria ({metodo_ic})", cache=True):
+    if metodo_ic == "t-Student":
+        estat = consultar(cubo, metal_escolhido, 'Categoria')
+    else:
+        estat = carregar_bootstrap('Categoria', metal_escolhido)
+estat = estat.dropna(subset=['IC inferior']).reset_index(drop=True)
+limite, titulo = limites_da_norma(norma)[metal_escolhido], titulos[metal_escolhido]
 
 st.subheader(titulo)
-fig, ax = plt.subplots(figsize=(8, 5))
-x = range(len(estat))
-ax.errorbar(x, estat['Média'], yerr=estat['IC'], fmt='o',
-            color='black', capsize=6, markersize=6, linewidth=1.5)
-ax.set_xticks(x)
-ax.set_xticklabels(estat['Categoria'])
-ax.set_ylabel(f'Concentração de {metal_escolhido} (mg/L)')
-ax.axhline(limite, color='red', linestyle='--', label=f'Limite Máx. ({limite} mg/L)')
-ax.set_title(f'{metal_escolhido} – Intervalo de Confiança 95% por Categoria')
-ax.grid(axis='y', linestyle='--', alpha=0.3)
-ax.legend()
-st.pyplot(fig)
+png = renderizar(
+    "ic_categorias",
+    lambda: grafico_ic_categorias(estat, metal_escolhido, limite),
+    metal=metal_escolhido,
+    metodo=metodo_ic,
+    limite=limite,
+)
+st.image(png, use_container_width=True)
 
 st.markdown(explicacoes[metal_escolhido])
 
@@ -221,3 +169,5 @@ st.markdown("""
 - Ações de remediação para arsênio e manganês onde ultrapassam os limites legais
 """)
 st.markdown('</div>', unsafe_allow_html=True)
+
+instrumentacao.painel()
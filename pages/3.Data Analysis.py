@@ -1,67 +1,138 @@
+import math
+
 import streamlit as st
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from scipy import stats
+
+from analise import instrumentacao
+from analise.cubo import carregar_cubo, consultar, por_estacao
+from analise.dados import COLUNA_DATA, METAIS, carregar_dados
+from analise.espacial import TRECHOS_KM, carregar_espacial
+from analise.estacoes import versao_estacoes
+from analise.estilo import aplicar_estilo
+from analise.explorador import carregar_explorador
+from analise.figuras import escolher_backend, exibir, interativo, renderizar
+from analise.graficos import boxplot_violin, histograma_ic, histograma_ic_contado, perfil_espacial
+from analise.limites import limites_da_norma
+from analise.particionado import carregar_resumo, modo_particionado
+from analise.reamostragem import METODOS_IC, carregar_bootstrap
+from analise.registro import carregar_registro
 
 # ✅ Primeira chamada obrigatória
 st.set_page_config(page_title="Análise de Intervalos de Confiança", layout="centered")
+instrumentacao.iniciar("Data Analysis")
+escolher_backend()
 
-# 🎨 Estilo lavanda profunda embutido
-st.markdown("""
-<style>
-    header {visibility: hidden;}
-    .viewerBadge_container__1QSob {visibility: hidden;}
-    .main .block-container {
-        padding-top: 2rem;
-        background-color: white;
-        border: none;
-    }
-    body, .main, .block-container {
-        background-color: white !important;
-        color: #3e3553;
-        font-family: 'Segoe UI', sans-serif;
-        margin: 0;
-    }
-    section[data-testid="stSidebar"] {
-        background-color: #5e4b8b !important;
-        color: white !important;
-    }
-    section[data-testid="stSidebar"] * {
-        color: white !important;
-    }
-    h1, h2, h3, h4 {
-        color: #4a3d6a;
-    }
-    .stSelectbox > div > div {
-        background-color: white !important;
-        color: #5e4b8b !important;
-    }
-    .lavender-box {
-        background-color: #ede6fa;
-        border-left: 6px solid #b89fe6;
-        border-radius: 10px;
-        padding: 1.5rem;
-        margin-bottom: 25px;
-        box-shadow: 0 4px 10px rgba(0,0,0,0.05);
-    }
-</style>
-""", unsafe_allow_html=True)
+# 🎨 Estilo lavanda profunda, com fundo branco
+ESTILO_FUNDO_BRANCO = """
+/* Fundo branco, sem margem */
+header {
+    background-color: white;
+    border: none;
+}
+
+body, .main, .block-container {
+    background-color: white !important;
+    margin: 0;
+}
+"""
+aplicar_estilo(ESTILO_FUNDO_BRANCO)
 
 st.title("🔍 Intervalos de Confiança por Categoria de Estação")
 
-@st.cache_data
-def load_data():
-    df = pd.read_excel("dados_metais_com_categoria.xlsx")
-    df.columns = df.columns.str.strip().str.title()
-    return df
+# No modo particionado (arquivos maiores que a memória) a página usa só o resumo e o
+# cubo: estações e categorias, histogramas e boxplots saem dos esboços por grupo e o
+# explorador dá lugar à pré-visualização das primeiras linhas
+particionado = modo_particionado()
+with instrumentacao.etapa("resumo dos dados", cache=True):
+    resumo = carregar_resumo()
+with instrumentacao.etapa("cubo de estatísticas", cache=True):
+    cubo = carregar_cubo()
+if particionado:
+    estacoes_por_categoria = resumo.estacoes_por_categoria
+else:
+    with instrumentacao.etapa("carga dos dados", cache=True) as medicao:
+        df = carregar_dados()
+        medicao["linhas"] = len(df)
+    with instrumentacao.etapa("registro de estações", cache=True):
+        registro = carregar_registro()
+    estacoes_por_categoria = registro.estacoes_por_categoria
+categorias = list(estacoes_por_categoria)
+
 
-df = load_data()
+def histograma_grupo(ic, titulo, cor, **grupo):
+    """(figura estática, figura interativa) com o IC de uma categoria ou estação, ou None sem valores."""
+    media, ic_min, ic_max = ic
+    if particionado:
+        distribuicao = resumo.distribuicao(coluna_selecionada, **grupo)
+        if not distribuicao.n:
+            return None
+        argumentos = (distribuicao.histograma_com_kde(), media, ic_min, ic_max, titulo, cor)
+        return lambda: histograma_ic_contado(*argumentos), interativo("histograma_ic_contado", *argumentos)
+    valores = registro.valores(df, coluna_selecionada, **grupo)
+    if valores.empty:
+        return None
+    argumentos = (valores, media, ic_min, ic_max, titulo, cor)
+    return lambda: histograma_ic(*argumentos), interativo("histograma_ic", *argumentos)
 
+
+# --- Explorador dos dados: filtro, ordenação e paginação no servidor ---
+# Só a página visível vai para o navegador (analise.explorador)
 st.markdown('<div class="lavender-box">', unsafe_allow_html=True)
 st.subheader("🧾 Dados Carregados")
-st.dataframe(df, use_container_width=True)
+if particionado:
+    st.caption(f"{resumo.linhas:,} registros lidos em partições; o explorador exige os dados em memória.")
+    st.dataframe(resumo.primeiras, use_container_width=True)
+else:
+    with instrumentacao.etapa("índice do explorador", cache=True):
+        explorador = carregar_explorador()
+
+    with st.expander("🔎 Filtros e ordenação"):
+        col1, col2 = st.columns(2)
+        estacoes_filtro = col1.multiselect("Estações:", registro.estacoes, key="explorador_estacoes")
+        categorias_filtro = col2.multiselect("Categorias:", categorias, key="explorador_categorias")
+
+        data_min, data_max = (d.date() for d in explorador.limites(COLUNA_DATA))
+        periodo = st.date_input("Período de amostragem:", (data_min, data_max), min_value=data_min,
+                                max_value=data_max, key="explorador_periodo")
+        # Sem filtro no período completo: linhas sem data continuam visíveis
+        datas = tuple(periodo) if len(periodo) == 2 and tuple(periodo) != (data_min, data_max) else None
+
+        col1, col2 = st.columns(2)
+        metal_filtro = col1.selectbox("Faixa de concentração:", ["(todas)"] + METAIS, key="explorador_metal")
+        faixa = None
+        if metal_filtro in METAIS:
+            minimo, maximo = (float(v) for v in explorador.limites(metal_filtro))
+            faixa = col2.slider(f"{metal_filtro} (mg/L):", minimo, maximo, (minimo, maximo),
+                                key=f"explorador_faixa_{metal_filtro}")
+
+        col1, col2, col3 = st.columns(3)
+        ordenar_por = col1.selectbox("Ordenar por:", ["(ordem original)"] + list(explorador.df.columns),
+                                     key="explorador_ordem")
+        crescente = col2.radio("Sentido:", ["Crescente", "Decrescente"], horizontal=True,
+                               key="explorador_sentido") == "Crescente"
+        por_pagina = col3.selectbox("Linhas por página:", [25, 50, 100, 250], index=1, key="explorador_por_pagina")
+
+    with instrumentacao.etapa("explorador: filtro e ordenação", linhas=len(explorador)):
+        posicoes = explorador.filtrar(
+            ordenar_por=None if ordenar_por == "(ordem original)" else ordenar_por,
+            crescente=crescente,
+            estacoes=estacoes_filtro,
+            categorias=categorias_filtro,
+            datas=datas,
+            metal=metal_filtro if faixa else None,
+            faixa=faixa,
+        )
+
+    total_paginas = max(1, math.ceil(len(posicoes) / por_pagina))
+    # Filtros novos podem reduzir o número de páginas
+    if st.session_state.get("explorador_pagina", 1) > total_paginas:
+        st.session_state["explorador_pagina"] = 1
+    pagina = st.number_input(f"Página ({total_paginas} no total)", min_value=1, max_value=total_paginas,
+                             value=1, key="explorador_pagina")
+    inicio = (pagina - 1) * por_pagina
+    st.caption(f"Linhas {min(inicio + 1, len(posicoes))}–{min(inicio + por_pagina, len(posicoes))} "
+               f"de {len(posicoes):,} ({len(explorador):,} no total)")
+    with instrumentacao.etapa("tabela de dados", linhas=por_pagina):
+        st.dataframe(explorador.pagina(posicoes, pagina, por_pagina), use_container_width=True)
 st.markdown('</div>', unsafe_allow_html=True)
 
 st.markdown('<div class="lavender-box">', unsafe_allow_html=True)
@@ -73,82 +144,141 @@ st.markdown("""
 """)
 st.markdown('</div>', unsafe_allow_html=True)
 
-grupos = {
-    "INCIDENTE": ["RD009", "RD075", "RD074", "RD059"],
-    "LONGES": ["RD095", "RD085"],
-    "MEDIOS": ["RD083", "RD039"]
-}
+ESTACOES_POR_PAGINA = 10
 
-colunas_numericas = df.select_dtypes(include=np.number).columns.tolist()
-coluna_selecionada = st.selectbox("Selecione o tipo de metal para análise:", colunas_numericas)
+coluna_selecionada = st.selectbox("Selecione o tipo de metal para análise:", METAIS)
+# O bootstrap reamostra as amostras: no modo particionado só o IC t-Student (agregados)
+metodo_ic = st.radio("Método do intervalo de confiança:", METODOS_IC[:1] if particionado else METODOS_IC,
+                     horizontal=True)
 
-def calcular_ic(dados, alpha=0.05):
-    n = len(dados)
-    media = np.mean(dados)
-    erro_padrao = stats.sem(dados, nan_policy='omit')
-    margem_erro = stats.t.ppf(1 - alpha/2, df=n-1) * erro_padrao
-    return media, media - margem_erro, media + margem_erro
+# ICs de todas as estações e categorias vêm do cubo pré-calculado
+# (ou do bootstrap, também em cache por versão dos dados)
+with instrumentacao.etapa(f"IC por estação e categoria ({metodo_ic})", cache=True):
+    if metodo_ic == "t-Student":
+        # Uma linha por estação, mesmo que ela apareça em mais de uma categoria
+        ic_estacoes = por_estacao(cubo, coluna_selecionada)
+        ic_grupos = consultar(cubo, coluna_selecionada, "Categoria").set_index("Categoria")
+    else:
+        ic_estacoes = carregar_bootstrap("Estação", coluna_selecionada).set_index("Estação")
+        ic_grupos = carregar_bootstrap("Categoria", coluna_selecionada).set_index("Categoria")
 
-for grupo_nome, regioes in grupos.items():
+def calcular_ic(tabela, chave):
+    linha = tabela.loc[chave]
+    return linha["Média"], linha["IC inferior"], linha["IC superior"]
+
+# Categorias e estações vêm do índice dos grupos (resumo) ou do registro do dataset
+for grupo_nome, regioes in estacoes_por_categoria.items():
     st.subheader(f"📊 Categoria: {grupo_nome}")
-    grupo_df = df[df["Estação"].isin(regioes)]
-    valores_categoria = grupo_df[coluna_selecionada].dropna()
+    media_cat, ic_min_cat, ic_max_cat = calcular_ic(ic_grupos, grupo_nome)
+    figura = histograma_grupo((media_cat, ic_min_cat, ic_max_cat), f'Distribuição Geral - {grupo_nome}',
+                              'mediumpurple', categoria=grupo_nome)
 
-    if not valores_categoria.empty:
-        media_cat, ic_min_cat, ic_max_cat = calcular_ic(valores_categoria)
+    if figura is not None:
         st.markdown(f"**Resumo da Categoria `{grupo_nome}`**")
         st.write(f"Média geral: `{media_cat:.2f}`, IC 95%: [`{ic_min_cat:.2f}`, `{ic_max_cat:.2f}`]")
+        exibir(
+            "histograma_categoria",
+            *figura,
+            metal=coluna_selecionada,
+            grupo=grupo_nome,
+            metodo=metodo_ic,
+            particionado=particionado,
+        )
+
+    # Resumo de todas as estações (consulta ao cubo) e gráficos só das escolhidas,
+    # com paginação para listas grandes de estações
+    estacoes = [e for e in regioes if e in ic_estacoes.index and ic_estacoes.loc[e, "n"] > 0]
+    if not estacoes:
+        continue
+
+    total_paginas = math.ceil(len(estacoes) / ESTACOES_POR_PAGINA)
+    pagina = 1
+    if total_paginas > 1:
+        pagina = st.number_input(f"Página de estações ({total_paginas} no total)", min_value=1,
+                                 max_value=total_paginas, value=1, key=f"pagina_{grupo_nome}")
+    estacoes_pagina = estacoes[(pagina - 1) * ESTACOES_POR_PAGINA:pagina * ESTACOES_POR_PAGINA]
+
+    st.dataframe(
+        ic_estacoes.loc[estacoes_pagina, ["n", "Média", "IC inferior", "IC superior"]],
+        use_container_width=True,
+    )
+    selecionadas = st.multiselect(
+        f"Estações de `{grupo_nome}` para exibir a distribuição:",
+        estacoes_pagina,
+        key=f"estacoes_{grupo_nome}",
+    )
+
+    for estacao in selecionadas:
+        media, ic_min, ic_max = calcular_ic(ic_estacoes, estacao)
+        figura = histograma_grupo((media, ic_min, ic_max), f'Distribuição - {estacao}', 'skyblue',
+                                  estacao=estacao)
 
-        fig_cat, ax_cat = plt.subplots()
-        sns.histplot(valores_categoria, kde=True, ax=ax_cat, color='mediumpurple')
-        ax_cat.axvline(ic_min_cat, color='red', linestyle='--', label='IC Min')
-        ax_cat.axvline(ic_max_cat, color='red', linestyle='--', label='IC Max')
-        ax_cat.axvline(media_cat, color='green', linestyle='-', label='Média')
-        ax_cat.set_title(f'Distribuição Geral - {grupo_nome}')
-        ax_cat.legend()
-        st.pyplot(fig_cat)
-
-    for estacao in regioes:
-        estacao_df = grupo_df[grupo_df["Estação"] == estacao]
-        valores = estacao_df[coluna_selecionada].dropna()
-
-        if valores.empty:
-            continue
-
-        media, ic_min, ic_max = calcular_ic(valores)
-        st.markdown(f"**Estação `{estacao}`**")
-        st.write(f"Média: `{media:.2f}`, IC 95%: [`{ic_min:.2f}`, `{ic_max:.2f}`]")
-
-        fig, ax = plt.subplots()
-        sns.histplot(valores, kde=True, ax=ax, color='skyblue')
-        ax.axvline(ic_min, color='red', linestyle='--', label='IC Min')
-        ax.axvline(ic_max, color='red', linestyle='--', label='IC Max')
-        ax.axvline(media, color='green', linestyle='-', label='Média')
-        ax.set_title(f'Distribuição - {estacao}')
-        ax.legend()
-        st.pyplot(fig)
+        with st.expander(f"Estação {estacao}", expanded=True):
+            st.write(f"Média: `{media:.2f}`, IC 95%: [`{ic_min:.2f}`, `{ic_max:.2f}`]")
+            if figura is not None:
+                exibir(
+                    "histograma_estacao",
+                    *figura,
+                    metal=coluna_selecionada,
+                    estacao=estacao,
+                    metodo=metodo_ic,
+                    particionado=particionado,
+                )
 
 # --- Comparação geral entre categorias ---
 st.markdown('<div class="lavender-box">', unsafe_allow_html=True)
 st.subheader("📊 Comparação entre Categorias")
 
-df_filtrado = df[df['Categoria'].isin(['Incidente', 'Medio', 'Longe'])][['Categoria', 'Arsênio Total']].dropna()
+# Boxplot e violino saem dos esboços combináveis por categoria (analise.esbocos)
+with instrumentacao.etapa("resumo dos dados", cache=True):
+    resumo = carregar_resumo()
+distribuicoes = {c: d for c, d in resumo.distribuicoes('Arsênio total').items() if c in categorias}
 
-def plot_boxplot_violin(df_filtrado):
-    fig, axs = plt.subplots(1, 2, figsize=(14, 6))
-    sns.boxplot(data=df_filtrado, x='Categoria', y='Arsênio Total', palette='Pastel1', ax=axs[0])
-    axs[0].set_title('Boxplot - Arsênio Total por Categoria')
-    axs[0].set_ylabel('ARSÊNIO TOTAL')
-    axs[0].set_xlabel('Categoria')
+png_comparativo = renderizar(
+    "boxplot_violin",
+    lambda: boxplot_violin(distribuicoes, 'Arsênio total'),
+    metal='Arsênio total',
+)
+st.image(png_comparativo, use_container_width=True)
+st.markdown('</div>', unsafe_allow_html=True)
+
+# --- Perfil espacial ao longo do rio ---
+st.markdown('<div class="lavender-box">', unsafe_allow_html=True)
+st.subheader("🗺️ Perfil ao Longo do Rio")
+st.caption("Estações posicionadas pela distância aproximada de Fundão pelo curso d'água (estacoes.csv).")
 
-    sns.violinplot(data=df_filtrado, x='Categoria', y='Arsênio Total', palette='Pastel2', ax=axs[1])
-    axs[1].set_title('Violin Plot - Arsênio Total por Categoria')
-    axs[1].set_ylabel('ARSÊNIO TOTAL')
-    axs[1].set_xlabel('Categoria')
+with instrumentacao.etapa("análise espacial", cache=True):
+    espacial = carregar_espacial()
+perfil_metal, gradiente_metal, trechos_metal, vizinhas_metal = espacial.do_metal(coluna_selecionada)
+if espacial.sem_localizacao:
+    st.warning(f"Estações sem localização em estacoes.csv (fora do perfil): {', '.join(espacial.sem_localizacao)}")
 
-    plt.tight_layout()
-    return fig
+if not perfil_metal.empty:
+    limite = limites_da_norma()[coluna_selecionada]
+    argumentos = (perfil_metal, gradiente_metal, coluna_selecionada, limite, TRECHOS_KM)
+    exibir(
+        "perfil_espacial",
+        lambda: perfil_espacial(*argumentos),
+        interativo("perfil_espacial", *argumentos),
+        metal=coluna_selecionada,
+        limite=limite,
+        estacoes=versao_estacoes(),
+    )
 
-fig_comparativo = plot_boxplot_violin(df_filtrado)
-st.pyplot(fig_comparativo)
+    st.markdown("**Gradiente com a distância** (regressão das médias das estações, ponderada por n)")
+    st.dataframe(gradiente_metal.drop(columns="Metal").set_index("Estações"), use_container_width=True)
+
+    st.markdown("**Por trecho do rio**")
+    st.dataframe(
+        trechos_metal.set_index("Trecho")[["Estações", "n", "Média", "IC inferior", "IC superior", "Taxa de excedência"]],
+        use_container_width=True,
+    )
+
+    st.markdown("**Estação a montante × próxima a jusante** (teste t de Welch)")
+    st.dataframe(
+        vizinhas_metal.drop(columns=["Metal", "Km montante", "Km jusante"]).set_index(["Montante", "Jusante"]),
+        use_container_width=True,
+    )
 st.markdown('</div>', unsafe_allow_html=True)
+
+instrumentacao.painel()
@@ -1,77 +1,23 @@
 import streamlit as st
-import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
-from scipy.stats import ttest_ind, mannwhitneyu, shapiro, chi2_contingency
+
+from analise import instrumentacao
+from analise.compartilhado import antecipar, esperar
+from analise.conformidade import carregar_conformidade, taxas_de_agregados
+from analise.estilo import aplicar_estilo
+from analise.figuras import escolher_backend, exibir, interativo, renderizar
+from analise.graficos import barras_incidentes, boxplot_categorias, histograma_contado
+from analise.limites import NORMA_PADRAO, limites_da_norma, normas
+from analise.particionado import carregar_resumo, modo_particionado
+from analise.reamostragem import carregar_permutacao
+from analise.testes import carregar_testes
 
 # --- Configuração da página ---
 st.set_page_config(page_title="Teste de Hipóteses - Metais", layout="wide")
+instrumentacao.iniciar("Teste de Hipóteses - Metais")
+escolher_backend()
 
-# --- Estilo embutido: header oculto e fundo uniforme ---
-st.markdown("""
-<style>
-    /* Oculta o header padrão do Streamlit */
-    header {visibility: hidden;}
-    .viewerBadge_container__1QSob {visibility: hidden;}
-
-    /* Ajusta o padding do conteúdo principal */
-    .main .block-container {
-        padding-top: 2rem;
-    }
-
-    /* Estilo geral */
-    body, .main, .block-container {
-        background-color: #f9f7fc !important;
-        color: #3e3553;
-        font-family: 'Segoe UI', sans-serif;
-    }
-
-    section[data-testid="stSidebar"] {
-        background-color: #5e4b8b !important;
-    }
-
-    section[data-testid="stSidebar"] * {
-        color: white !important;
-    }
-
-    h1, h2, h3, h4 {
-        color: #4a3d6a;
-    }
-
-    .stSelectbox > div > div {
-        background-color: white !important;
-        color: #5e4b8b !important;
-    }
-
-    .lavender-box {
-        background-color: #ede6fa;
-        border-left: 6px solid #b89fe6;
-        border-radius: 10px;
-        padding: 1.5rem;
-        margin-bottom: 25px;
-        box-shadow: 0 4px 10px rgba(0,0,0,0.05);
-    }
-
-    .banner {
-        background-color: #5e4b8b;
-        color: white;
-        padding: 1.5rem;
-        text-align: center;
-        font-size: 1.5rem;
-        font-weight: 600;
-        border-radius: 10px;
-        margin-bottom: 40px;
-        letter-spacing: 0.5px;
-    }
-
-    .footer {
-        font-size: 0.9rem;
-        color: #777;
-        text-align: center;
-        margin-top: 40px;
-    }
-</style>
-""", unsafe_allow_html=True)
+# --- Estilo comum: header oculto e fundo uniforme ---
+aplicar_estilo()
 
 # --- Banner de destaque ---
 st.markdown('<div class="banner">💧 Monitoramento de Qualidade da Água - Testes Estatísticos</div>', unsafe_allow_html=True)
@@ -82,26 +28,40 @@ st.title("📌 Testes de Hipóteses - Metais na Água")
 # ---------------------
 # Leitura dos dados
 # ---------------------
-file_path = "dados_metais_com_categoria.xlsx"
-df = pd.read_excel(file_path)
-df.columns = df.columns.str.strip()
+# A página só usa agregados: resumo, bateria de testes e conformidade. No modo
+# particionado (arquivos maiores que a memória) nenhum deles carrega a base inteira;
+# sequências de excedência, permutação e Shapiro-Wilk precisam das amostras e ficam
+# restritos ao modo em memória
+particionado = modo_particionado()
+# Bateria completa (todos os metais e comparações) e conformidade com a norma padrão
+# começam no pool enquanto o resumo dos dados é exibido; são calculadas uma vez por
+# versão dos dados e compartilhadas entre todas as sessões
+futuro_testes = antecipar(carregar_testes)
+futuro_conformidade = None if particionado else antecipar(carregar_conformidade, NORMA_PADRAO)
 
 # ---------------------
 # Informações iniciais
 # ---------------------
 st.markdown('<div class="lavender-box">', unsafe_allow_html=True)
 st.subheader("📊 Informações do Banco de Dados")
-st.write(f"Total de registros: {len(df)}")
-st.write("**Colunas e tipos de dados:**")
-st.write(df.dtypes)
-st.write("**Valores ausentes por coluna:**")
-st.write(df.isnull().sum())
-st.write("**Estatísticas descritivas:**")
-st.write(df.describe())
-st.write("**Frequência das categorias:**")
-st.write(df["Categoria"].value_counts())
-st.subheader("🔍 Pré-visualização dos dados")
-st.dataframe(df.head())
+# Agregados combináveis (analise.particionado): com arquivos maiores que a memória
+# são calculados partição por partição, sem carregar a base inteira
+with instrumentacao.etapa("resumo dos dados", cache=True):
+    resumo = carregar_resumo()
+with instrumentacao.etapa("resumo descritivo", linhas=resumo.linhas):
+    st.write(f"Total de registros: {resumo.linhas}")
+    st.write("**Colunas e tipos de dados:**")
+    st.write(resumo.tipos)
+    st.write("**Valores ausentes por coluna:**")
+    st.write(resumo.ausentes)
+    st.write("**Estatísticas descritivas:**")
+    st.write(resumo.descrever())
+    if not resumo.exato:
+        st.caption("Quartis aproximados (histograma em faixas logarítmicas, erro relativo < 1%).")
+    st.write("**Frequência das categorias:**")
+    st.write(resumo.frequencias["Categoria"])
+    st.subheader("🔍 Pré-visualização dos dados")
+    st.dataframe(resumo.primeiras)
 st.markdown('</div>', unsafe_allow_html=True)
 
 # ---------------------
@@ -109,8 +69,12 @@ st.markdown('</div>', unsafe_allow_html=True)
 # ---------------------
 st.header("🧪 Testes de Hipótese")
 
+with instrumentacao.etapa("bateria de testes", cache=True):
+    testes = esperar(futuro_testes)
+
 metais_disponiveis = ["Ferro dissolvido", "Arsênio total", "Manganês total"]
 metal = st.selectbox("Escolha o metal para análise:", metais_disponiveis)
+N_PERMUTACOES = 20_000
 
 # ---------------------
 # TESTE 1: Comparação de Médias
@@ -118,42 +82,56 @@ metal = st.selectbox("Escolha o metal para análise:", metais_disponiveis)
 st.markdown('<div class="lavender-box">', unsafe_allow_html=True)
 st.subheader(f"📌 Teste 1 - Comparação de Médias ({metal})")
 
-df_teste = df[[metal, "Categoria"]].dropna()
-grupo_incidente = df_teste[df_teste["Categoria"] == "Incidente"][metal]
-grupo_outros = df_teste[df_teste["Categoria"] != "Incidente"][metal]
-
-st.write(f"Incidente: {len(grupo_incidente)} registros")
-st.write(f"Outros: {len(grupo_outros)} registros")
-
-# Teste de normalidade
-stat_inc, p_inc = shapiro(grupo_incidente)
-stat_out, p_out = shapiro(grupo_outros)
-
-st.write(f"Shapiro-Wilk p-valor (Incidente): {p_inc:.4f}")
-st.write(f"Shapiro-Wilk p-valor (Outros): {p_out:.4f}")
-normal = p_inc > 0.05 and p_out > 0.05
-
-# Teste t ou Mann-Whitney
-if normal:
-    stat, p = ttest_ind(grupo_incidente, grupo_outros, equal_var=False)
-    st.write("🔍 Teste T aplicado (dados com distribuição normal)")
-else:
-    stat, p = mannwhitneyu(grupo_incidente, grupo_outros)
-    st.write("🔍 Teste de Mann-Whitney aplicado (dados não normais)")
-
-st.write(f"Estatística do teste: {stat:.4f}")
-st.write(f"p-valor: {p:.4f}")
-
-if p < 0.05:
-    st.success("Rejeitamos H₀: Diferença significativa entre as médias.")
+resultado = testes.comparacao(metal, "Categoria vs demais", "Incidente", "Outros")
+if resultado is None:
+    # Sem a categoria Incidente (ou sem as demais) a comparação não é calculada
+    st.info("Não há amostras da categoria Incidente e das demais categorias para comparar este metal.")
 else:
-    st.info("Não rejeitamos H₀: Diferença não significativa.")
+    st.write(f"Incidente: {resultado['n A']} registros")
+    st.write(f"Outros: {resultado['n B']} registros")
+
+    metodo_teste = None if particionado else st.radio(
+        "Método do teste:",
+        ["Shapiro-Wilk → Teste T / Mann-Whitney", "Permutação (diferença de médias)"],
+        horizontal=True,
+    )
+
+    if particionado:
+        # Bateria calculada dos momentos dos grupos (sem as amostras)
+        st.write("🔍 Teste T (Welch) calculado a partir dos agregados (modo particionado)")
+        stat, p = resultado["Estatística"], resultado["p-valor"]
+        st.write(f"Estatística do teste: {stat:.4f}")
+    elif metodo_teste.startswith("Shapiro"):
+        # Teste de normalidade
+        st.write(f"Shapiro-Wilk p-valor (Incidente): {resultado['Shapiro p A']:.4f}")
+        st.write(f"Shapiro-Wilk p-valor (Outros): {resultado['Shapiro p B']:.4f}")
+
+        # Teste t ou Mann-Whitney
+        if resultado["Teste"].startswith("Teste T"):
+            st.write("🔍 Teste T aplicado (dados com distribuição normal)")
+        else:
+            st.write("🔍 Teste de Mann-Whitney aplicado (dados não normais)")
+
+        stat, p = resultado["Estatística"], resultado["p-valor"]
+        st.write(f"Estatística do teste: {stat:.4f}")
+    else:
+        # Não depende de normalidade: adequado para amostras pequenas ou assimétricas
+        with instrumentacao.etapa("teste de permutação", cache=True):
+            stat, p = carregar_permutacao(metal, "Incidente", N_PERMUTACOES)
+        st.write(f"🔍 Teste de permutação aplicado ({N_PERMUTACOES:,} permutações, semente fixa)")
+        st.write(f"Diferença de médias (Incidente − Outros): {stat:.4f}")
+    st.write(f"p-valor: {p:.4f}")
+
+    if p < 0.05:
+        st.success("Rejeitamos H₀: Diferença significativa entre as médias.")
+    else:
+        st.info("Não rejeitamos H₀: Diferença não significativa.")
 
 # Visualização: boxplot
 st.write("📊 Boxplot:")
-fig, ax = plt.subplots()
-sns.boxplot(data=df_teste, x="Categoria", y=metal, ax=ax)
-st.pyplot(fig)
+# Caixas desenhadas dos esboços de distribuição do resumo, sem percorrer as amostras
+png = renderizar("boxplot_categorias", lambda: boxplot_categorias(resumo.distribuicoes(metal), metal), metal=metal)
+st.image(png, use_container_width=True)
 st.markdown('</div>', unsafe_allow_html=True)
 
 # ---------------------
@@ -162,22 +140,15 @@ st.markdown('</div>', unsafe_allow_html=True)
 st.markdown('<div class="lavender-box">', unsafe_allow_html=True)
 st.subheader(f"📌 Teste 2 - Associação entre Categoria e {metal} Acima do Limite")
 
-limites = {
-    "Ferro dissolvido": 0.3,
-    "Arsênio total": 0.01,
-    "Manganês total": 0.1
-}
-limite_escolhido = limites[metal]
-
-df["Metal_cat"] = df[metal].apply(
-    lambda x: "Acima do limite" if x > limite_escolhido else "Dentro do limite"
-)
+limite_escolhido = limites_da_norma()[metal]
+st.write(f"Limite considerado: {limite_escolhido} mg/L (apenas amostras com valor medido)")
 
-contingencia = pd.crosstab(df["Categoria"], df["Metal_cat"])
+contingencia = testes.contingencias[metal]
 st.write("📋 Tabela de contingência:")
 st.write(contingencia)
 
-chi2, p_chi, dof, expected = chi2_contingency(contingencia)
+associacao = testes.associacoes.set_index("Metal").loc[metal]
+chi2, p_chi = associacao["Qui-quadrado"], associacao["p-valor"]
 
 st.write(f"Estatística Qui-Quadrado: {chi2:.4f}")
 st.write(f"p-valor: {p_chi:.4f}")
@@ -188,6 +159,70 @@ else:
     st.info("Não rejeitamos H₀: Sem associação significativa entre as variáveis.")
 st.markdown('</div>', unsafe_allow_html=True)
 
+# ---------------------
+# CONFORMIDADE COM A NORMA
+# ---------------------
+st.markdown('<div class="lavender-box">', unsafe_allow_html=True)
+st.subheader("📏 Conformidade com os limites da legislação")
+st.markdown("""
+Taxa de amostras **acima do limite** de cada metal na norma escolhida e, por estação, a
+**maior sequência de excedências consecutivas** e a **sequência atual** (excedências seguidas
+até a amostra mais recente). Amostras sem medição não interrompem a sequência.
+""")
+if particionado:
+    # Taxas dos agregados do resumo (norma padrão); as sequências exigem as amostras em ordem
+    taxas = taxas_de_agregados(resumo.grupos, ["Categoria"])
+else:
+    lista_normas = normas()
+    norma = st.selectbox("Norma:", lista_normas, index=lista_normas.index(NORMA_PADRAO))
+    with instrumentacao.etapa(f"conformidade ({norma})", cache=True):
+        conformidade = esperar(futuro_conformidade) if norma == NORMA_PADRAO else carregar_conformidade(norma)
+    taxas = conformidade.taxa("Categoria")
+
+taxas_categoria = taxas.pivot(index="Parâmetro", columns="Categoria", values="Taxa de excedência")
+st.write("**Taxa de excedência por categoria:**")
+st.dataframe(taxas_categoria.style.format("{:.1%}"), use_container_width=True)
+
+if particionado:
+    st.caption(f"Modo particionado: norma {NORMA_PADRAO}; outras normas e as sequências por estação "
+               "exigem os dados em memória.")
+else:
+    st.write(f"**Sequências de excedência por estação ({metal}):**")
+    sequencias = conformidade.sequencias[conformidade.sequencias["Parâmetro"] == metal]
+    st.dataframe(
+        sequencias.drop(columns="Parâmetro").sort_values(["Sequência atual", "Maior sequência"], ascending=False),
+        use_container_width=True,
+        hide_index=True,
+    )
+st.markdown('</div>', unsafe_allow_html=True)
+
+# ---------------------
+# MATRIZ COMPLETA DE TESTES
+# ---------------------
+st.markdown('<div class="lavender-box">', unsafe_allow_html=True)
+st.subheader("🧮 Matriz completa de testes (todos os metais)")
+st.markdown("""
+Todas as comparações executadas de uma só vez, para **todos os metais**:
+
+- cada **categoria contra as demais** (o Teste 1 acima é a linha *Incidente vs Outros*);
+- **todos os pares de categorias**;
+- cada **estação contra o grupo controle** (categoria *Longe*).
+
+Como são muitos testes simultâneos, os p-valores são ajustados por **Holm** (controle do erro
+familiar) e por **Benjamini-Hochberg** (taxa de falsas descobertas). A coluna *Significativo*
+usa o p ajustado por Holm a 5%.
+""")
+st.dataframe(testes.comparacoes, use_container_width=True)
+st.write("**Qui-quadrado (Categoria × acima do limite) por metal:**")
+st.dataframe(testes.associacoes, use_container_width=True)
+st.download_button(
+    "⬇️ Baixar matriz de testes (CSV)",
+    testes.comparacoes.to_csv(index=False).encode("utf-8"),
+    file_name="matriz_testes.csv",
+    mime="text/csv",
+)
+st.markdown('</div>', unsafe_allow_html=True)
+
 # ---------------------
 # VISUALIZAÇÕES ADICIONAIS
 # ---------------------
@@ -201,16 +236,12 @@ Este gráfico de barras mostra **quantos registros classificados como "Incidente
 Ele é útil para identificar **quais estações têm maior concentração de eventos críticos**, permitindo análises direcionadas para prevenção ou investigação.
 """)
 
-if "Estação" in df.columns and "Categoria" in df.columns:
-    freq_incidentes = df[df["Categoria"] == "Incidente"]["Estação"].value_counts()
-    fig2, ax2 = plt.subplots()
-    sns.barplot(x=freq_incidentes.index, y=freq_incidentes.values, ax=ax2)
-    ax2.set_ylabel("Número de Incidentes")
-    ax2.set_xlabel("Estação")
-    ax2.set_title("Incidentes por Estação")
-    st.pyplot(fig2)
+if "Incidente" in resumo.linhas_por_grupo.index.get_level_values("Categoria"):
+    freq_incidentes = resumo.linhas_por_grupo.loc["Incidente"].sort_values(ascending=False)
+    png2 = renderizar("barras_incidentes", lambda: barras_incidentes(freq_incidentes))
+    st.image(png2, use_container_width=True)
 else:
-    st.warning("Coluna 'Estação' não encontrada no banco de dados.")
+    st.warning("Nenhum registro da categoria 'Incidente' no banco de dados.")
 st.markdown('</div>', unsafe_allow_html=True)
 
 # Histogramas
@@ -227,15 +258,18 @@ Esses gráficos ajudam a entender:
 """)
 
 for m in metais_disponiveis:
-    if m in df.columns:
+    if m in resumo.histogramas and resumo.histogramas[m].n:
         st.markdown(f"**Distribuição de {m}:**")
-        fig3, ax3 = plt.subplots()
-        sns.histplot(df[m].dropna(), kde=True, bins=30, ax=ax3)
-        ax3.set_xlabel(m)
-        ax3.set_ylabel("Frequência")
-        st.pyplot(fig3)
+        # Contagens e KDE do resumo: exatas enquanto os valores cabem em memória
+        contado = resumo.histograma_com_kde(m)
+        exibir("histograma_metal",
+               lambda: histograma_contado(*contado, m),
+               interativo("histograma_contado", *contado, m),
+               metal=m)
 st.markdown('</div>', unsafe_allow_html=True)
 
 # --- Rodapé ---
 st.markdown("---")
 st.markdown('<div class="footer">🎓 Projeto acadêmico - FIAP | Uso interno e institucional</div>', unsafe_allow_html=True)
+
+instrumentacao.painel()
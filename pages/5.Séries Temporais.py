@@ -0,0 +1,106 @@
+import streamlit as st
+
+from analise import instrumentacao
+from analise.dados import COLUNA_DATA, METAIS, carregar_dados
+from analise.estilo import aplicar_estilo
+from analise.figuras import escolher_backend, exibir, interativo
+from analise.graficos import grafico_serie_temporal
+from analise.limites import limites_da_norma
+from analise.series import FREQUENCIAS, carregar_series, tendencias
+
+# --- Configuração da página ---
+st.set_page_config(page_title="Séries Temporais - Metais", layout="wide")
+instrumentacao.iniciar("Séries Temporais")
+escolher_backend()
+
+# --- Estilo comum: header oculto e fundo uniforme ---
+aplicar_estilo()
+
+# --- Banner de destaque ---
+st.markdown('<div class="banner">💧 Monitoramento de Qualidade da Água - Evolução Temporal</div>', unsafe_allow_html=True)
+
+# --- Título ---
+st.title("📈 O comportamento das concentrações se mantém constante ao longo do tempo?")
+
+st.markdown('<div class="lavender-box">', unsafe_allow_html=True)
+st.markdown("""
+As amostras de cada metal são agregadas por **período** (dia, semana, mês, trimestre ou ano) e por
+**categoria** ou **estação**. Para cada período calculamos a média; a linha mostra a **média móvel**
+dos últimos períodos com o respectivo **IC 95%** (faixa sombreada).
+
+O teste de **Kendall** sobre as médias por período indica se há tendência monotônica
+(crescente ou decrescente) ao longo do tempo.
+""")
+st.markdown('</div>', unsafe_allow_html=True)
+
+# ---------------------
+# Parâmetros
+# ---------------------
+col1, col2, col3, col4 = st.columns(4)
+with col1:
+    metal = st.selectbox("Metal:", METAIS, index=2)
+with col2:
+    nome_frequencia = st.selectbox("Período:", list(FREQUENCIAS), index=4)
+with col3:
+    nivel = st.selectbox("Agrupar por:", ["Categoria", "Estação"])
+with col4:
+    janela = st.number_input("Janela da média móvel (períodos):", min_value=1, max_value=24, value=3)
+
+# Todas as séries do nível ficam em cache: trocar de metal ou de grupo é só um filtro
+with instrumentacao.etapa("séries temporais", cache=True) as medicao:
+    series = carregar_series(FREQUENCIAS[nome_frequencia], nivel, int(janela))
+    medicao["linhas"] = len(series)
+serie_metal = series[series["Metal"] == metal]
+
+grupos_disponiveis = list(serie_metal[nivel].dropna().unique())
+grupos_escolhidos = st.multiselect(f"{nivel}:", grupos_disponiveis,
+                                   default=grupos_disponiveis[:4] if nivel == "Estação" else grupos_disponiveis)
+serie_metal = serie_metal[serie_metal[nivel].isin(grupos_escolhidos)]
+
+# ---------------------
+# Gráfico
+# ---------------------
+st.markdown('<div class="lavender-box">', unsafe_allow_html=True)
+st.subheader(f"📈 {metal} – média por {nome_frequencia.lower()}")
+if serie_metal.empty:
+    st.info("Nenhuma amostra para os filtros escolhidos.")
+else:
+    # As amostras individuais só existem no gráfico interativo, já reduzidas a mínimo/máximo por intervalo
+    mostrar_amostras = st.checkbox("Mostrar amostras individuais (gráfico interativo)")
+    amostras = carregar_dados()[[COLUNA_DATA, nivel, metal]] if mostrar_amostras else None
+    limite = limites_da_norma()[metal]
+    exibir(
+        "serie_temporal",
+        lambda: grafico_serie_temporal(serie_metal, metal, limite, nivel, COLUNA_DATA),
+        interativo("grafico_serie_temporal", serie_metal, metal, limite, nivel, COLUNA_DATA, amostras),
+        metal=metal,
+        limite=limite,
+        frequencia=FREQUENCIAS[nome_frequencia],
+        nivel=nivel,
+        janela=int(janela),
+        grupos=tuple(grupos_escolhidos),
+        amostras=mostrar_amostras,
+    )
+st.markdown('</div>', unsafe_allow_html=True)
+
+# ---------------------
+# Tendência
+# ---------------------
+st.markdown('<div class="lavender-box">', unsafe_allow_html=True)
+st.subheader("📌 Teste de tendência (Kendall)")
+
+tendencia = tendencias(serie_metal, nivel)
+if not tendencia.empty:
+    st.dataframe(tendencia, use_container_width=True)
+else:
+    st.info("São necessários pelo menos 3 períodos com amostras para o teste.")
+st.markdown('</div>', unsafe_allow_html=True)
+
+with st.expander("📋 Tabela da série"):
+    st.dataframe(serie_metal.drop(columns=["t", "t (móvel)"]), use_container_width=True)
+
+# --- Rodapé ---
+st.markdown("---")
+st.markdown('<div class="footer">🎓 Projeto acadêmico - FIAP | Uso interno e institucional</div>', unsafe_allow_html=True)
+
+instrumentacao.painel()
@@ -0,0 +1,56 @@
+import threading
+import time
+
+import pytest
+
+from analise.compartilhado import ResultadosCompartilhados
+
+SESSOES = 8
+
+
+def test_pedidos_simultaneos_calculam_uma_vez():
+    resultados = ResultadosCompartilhados(workers=2)
+    chamadas = []
+    liberar = threading.Event()
+
+    def calcular():
+        chamadas.append(threading.current_thread().name)
+        liberar.wait(timeout=10)
+        return object()
+
+    recebidos = [None] * SESSOES
+
+    def sessao(i):
+        recebidos[i] = resultados.obter("cubo", ("dados", 1), calcular)[0].result(timeout=10)
+
+    threads = [threading.Thread(target=sessao, args=(i,)) for i in range(SESSOES)]
+    for thread in threads:
+        thread.start()
+    # Só libera o cálculo depois que todas as outras sessões receberam o Future em andamento
+    for _ in range(1000):
+        if resultados.contadores["coalescidos"] == SESSOES - 1:
+            break
+        time.sleep(0.01)
+    liberar.set()
+    for thread in threads:
+        thread.join(timeout=10)
+
+    assert len(chamadas) == 1
+    assert all(resultado is recebidos[0] for resultado in recebidos)
+    assert resultados.contadores["calculados"] == 1
+    assert resultados.contadores["coalescidos"] == SESSOES - 1
+
+
+def test_chaves_diferentes_calculam_separado_e_erros_nao_ficam_em_cache():
+    resultados = ResultadosCompartilhados(workers=2)
+    assert resultados.obter("cubo", 1, lambda: "a")[0].result() == "a"
+    assert resultados.obter("cubo", 2, lambda: "b")[0].result() == "b"
+
+    def falhar():
+        raise ValueError("falha")
+
+    with pytest.raises(ValueError):
+        resultados.obter("cubo", 3, falhar)[0].result()
+    futuro, novo = resultados.obter("cubo", 3, lambda: "c")
+    assert novo and futuro.result() == "c"
+    assert resultados.contadores["falhas"] == 1
@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analise.conformidade import sequencias, taxas, taxas_de_agregados
+from analise.dados import COLUNA_DATA, METAIS, normalizar_colunas
+from analise.ingestao import agregar
+from analise.limites import excedencias
+
+METAL = "Arsênio total"
+
+
+def _amostras(estacoes, valores, dias):
+    return pd.DataFrame({
+        "Estação": estacoes,
+        COLUNA_DATA: pd.Timestamp("2021-01-01") + pd.to_timedelta(dias, unit="D"),
+        METAL: valores,
+    })
+
+
+def _violacoes(df, limite=1.0):
+    return pd.DataFrame({METAL: (df[METAL] > limite).to_numpy()}, index=df.index)
+
+
+def _sequencias_por_laco(df, violacoes):
+    """Referência: percorre as amostras de cada estação em ordem de data."""
+    linhas = {}
+    ordenado = df.assign(_violou=violacoes[METAL]).sort_values(["Estação", COLUNA_DATA], kind="stable")
+    for estacao, grupo in ordenado.groupby("Estação"):
+        atual = maior = 0
+        for valor, violou in zip(grupo[METAL], grupo["_violou"]):
+            if pd.isna(valor):
+                continue
+            atual = atual + 1 if violou else 0
+            maior = max(maior, atual)
+        linhas[estacao] = (maior, atual, int(grupo[METAL].notna().sum()), int(grupo["_violou"].sum()))
+    return linhas
+
+
+def test_sequencias_ordena_por_data_e_ignora_amostras_sem_medicao():
+    # Fora de ordem de data; a amostra sem medição (NaN) fica no meio da sequência de A
+    df = _amostras(
+        ["A", "A", "A", "A", "A", "A", "A", "B", "B"],
+        [2.0, 0.5, 2.0, np.nan, 2.0, 2.0, 2.0, 2.0, 0.5],
+        [0, 3, 1, 5, 4, 6, 7, 0, 1],
+    )
+    resultado = sequencias(df, _violacoes(df)).set_index("Estação")
+    # A por data: 2, 2, 0.5, 2, (NaN), 2, 2 → maior 3, atual 3
+    assert resultado.loc["A", "Maior sequência"] == 3
+    assert resultado.loc["A", "Sequência atual"] == 3
+    assert resultado.loc["A", "n medidos"] == 6
+    assert resultado.loc["A", "Última amostra"] == pd.Timestamp("2021-01-08")
+    assert resultado.loc["B", "Maior sequência"] == 1
+    assert resultado.loc["B", "Sequência atual"] == 0
+
+
+def test_sequencias_igual_ao_laco_por_estacao():
+    rng = np.random.default_rng(11)
+    linhas = 3_000
+    valores = rng.lognormal(0, 1, linhas)
+    valores[rng.random(linhas) < 0.2] = np.nan
+    df = _amostras(rng.choice([f"E{i:02d}" for i in range(12)], linhas), valores, rng.integers(0, 2_000, linhas))
+    violacoes = _violacoes(df)
+
+    resultado = sequencias(df, violacoes).set_index("Estação")
+    for estacao, (maior, atual, medidos, acima) in _sequencias_por_laco(df, violacoes).items():
+        assert resultado.loc[estacao, "Maior sequência"] == maior
+        assert resultado.loc[estacao, "Sequência atual"] == atual
+        assert resultado.loc[estacao, "n medidos"] == medidos
+        assert resultado.loc[estacao, "Excedências"] == acima
+
+
+def test_sequencias_sem_amostras():
+    df = _amostras([], [], [])
+    assert sequencias(df, _violacoes(df)).empty
+
+
+@pytest.mark.parametrize("chaves", [(), ("Categoria",), ("Categoria", "Estação")])
+def test_taxas_de_agregados_igual_as_taxas_das_amostras(chaves):
+    rng = np.random.default_rng(12)
+    linhas = 1_500
+    estacao = rng.choice(["E01", "E02", "E03"], linhas)
+    df = normalizar_colunas(pd.DataFrame({
+        "Estação": estacao,
+        "Categoria": np.where(estacao == "E01", "Incidente", "Longe"),
+        COLUNA_DATA: pd.Timestamp("2021-01-01") + pd.to_timedelta(rng.integers(0, 500, linhas), unit="D"),
+        **{metal: np.where(rng.random(linhas) < 0.1, np.nan, rng.lognormal(-3 + i, 1.5, linhas))
+           for i, metal in enumerate(METAIS)},
+    }))
+    direto = taxas(df, excedencias(df, METAIS), list(chaves))
+    agregado = taxas_de_agregados(agregar(df), chaves)
+    ordem = list(chaves) + ["Parâmetro"]
+    pd.testing.assert_frame_equal(
+        direto.sort_values(ordem, ignore_index=True)[agregado.columns],
+        agregado.sort_values(ordem, ignore_index=True),
+        check_dtype=False, check_categorical=False,
+    )
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from analise.esbocos import EXATO_ATE, K_PADRAO, EsbocoKLL
+
+QS = np.linspace(0.01, 0.99, 99)
+# Erro de posição da ordem de 1/k: folga de algumas vezes 1/k
+TOLERANCIA_POSICAO = 5 / K_PADRAO
+
+
+def _valores(n, semente=1):
+    return np.random.default_rng(semente).lognormal(0, 2, n)
+
+
+def _erro_de_posicao(esboco, valores):
+    ordenados = np.sort(valores)
+    return np.abs(np.searchsorted(ordenados, esboco.quantis(QS)) / len(valores) - QS).max()
+
+
+def test_exato_ate_o_limite_igual_ao_percentile():
+    valores = _valores(EXATO_ATE)
+    esboco = EsbocoKLL().adicionar(np.r_[valores[:500], np.nan, np.inf]).adicionar(valores[500:])
+    assert esboco.exato and esboco.n == EXATO_ATE
+    np.testing.assert_allclose(esboco.quantis(QS), np.percentile(valores, QS * 100), rtol=1e-12)
+
+
+def test_erro_de_posicao_limitado_com_memoria_constante():
+    valores = _valores(300_000)
+    esboco = EsbocoKLL()
+    for bloco in np.array_split(valores, 37):
+        esboco.adicionar(bloco)
+    assert not esboco.exato
+    assert _erro_de_posicao(esboco, valores) < TOLERANCIA_POSICAO
+    # Itens guardados: da ordem de k, não de n
+    assert sum(len(itens) for itens in esboco.niveis) < 3 * K_PADRAO
+    assert esboco.itens()[1].sum() == esboco.n
+
+
+def test_combinar_partes_equivale_ao_esboco_do_todo():
+    valores = _valores(200_000, semente=2)
+    partes = [EsbocoKLL().adicionar(bloco) for bloco in np.array_split(valores, 8)]
+    combinado = partes[0]
+    for parte in partes[1:]:
+        combinado.combinar(parte)
+    assert combinado.n == len(valores)
+    assert combinado.itens()[1].sum() == len(valores)
+    assert _erro_de_posicao(combinado, valores) < TOLERANCIA_POSICAO
+
+
+def test_mesma_semente_mesmo_resultado():
+    valores = _valores(50_000, semente=3)
+    a, b = EsbocoKLL(semente=7).adicionar(valores), EsbocoKLL(semente=7).adicionar(valores)
+    np.testing.assert_array_equal(a.quantis(QS), b.quantis(QS))
+
+
+def test_esboco_vazio():
+    assert np.isnan(EsbocoKLL().quantis([0.5])).all()
+
+
+@pytest.mark.parametrize("q", [0.0, 1.0])
+def test_extremos_sao_valores_da_amostra(q):
+    valores = _valores(100_000, semente=4)
+    esboco = EsbocoKLL().adicionar(valores)
+    assert esboco.quantis([q])[0] in valores
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analise.dados import COLUNA_DATA, METAIS, compactar
+from analise.explorador import IndiceExplorador
+
+METAL = METAIS[0]
+
+
+@pytest.fixture(scope="module")
+def df():
+    rng = np.random.default_rng(5)
+    linhas = 5_000
+    estacao = rng.choice(["E01", "E02", "E03", "E04", None], linhas, p=[0.3, 0.3, 0.2, 0.15, 0.05])
+    tabela = pd.DataFrame({
+        "Estação": estacao,
+        "Categoria": np.where(np.isin(estacao, ["E01", "E02"]), "Incidente", "Longe"),
+        COLUNA_DATA: pd.Timestamp("2020-01-01") + pd.to_timedelta(rng.integers(0, 1_000, linhas), unit="D"),
+        **{metal: np.where(rng.random(linhas) < 0.1, np.nan, rng.lognormal(-2, 1, linhas)) for metal in METAIS},
+    })
+    return compactar(tabela)
+
+
+def _referencia(df, estacoes, categorias, datas, faixa):
+    mascara = (df["Estação"].isin(estacoes) & df["Categoria"].isin(categorias)
+               & df[COLUNA_DATA].between(pd.Timestamp(datas[0]), pd.Timestamp(datas[1]) + pd.Timedelta("23:59:59"))
+               & df[METAL].between(*faixa))
+    return df[mascara.to_numpy(dtype=bool)]
+
+
+FILTROS = dict(estacoes=["E01", "E03"], categorias=["Incidente", "Longe"], datas=("2020-03-01", "2021-06-30"),
+               faixa=(0.05, 0.5))
+
+
+def test_filtro_igual_ao_pandas(df):
+    indice = IndiceExplorador(df)
+    posicoes = indice.filtrar(metal=METAL, **FILTROS)
+    esperado = _referencia(df, **FILTROS)
+    np.testing.assert_array_equal(posicoes, np.flatnonzero(df.index.isin(esperado.index)))
+
+
+def test_filtros_vazios_nao_filtram_e_rotulo_desconhecido_nao_casa(df):
+    indice = IndiceExplorador(df)
+    assert len(indice.filtrar(estacoes=[], categorias=None)) == len(df)
+    assert len(indice.filtrar(estacoes=["XYZ"])) == 0
+
+
+@pytest.mark.parametrize("crescente", [True, False])
+def test_ordenacao_com_ausentes_no_fim(df, crescente):
+    indice = IndiceExplorador(df)
+    posicoes = indice.filtrar(ordenar_por=METAL, crescente=crescente, estacoes=["E02", "E04"])
+    esperado = df[df["Estação"].isin(["E02", "E04"]).to_numpy(dtype=bool)].sort_values(
+        METAL, ascending=crescente, na_position="last", kind="stable")
+    np.testing.assert_array_equal(df[METAL].to_numpy()[posicoes], esperado[METAL].to_numpy())
+    assert np.isnan(df[METAL].iloc[posicoes[-1]])
+
+
+def test_ordenacao_de_categoria_segue_a_ordem_das_categorias(df):
+    indice = IndiceExplorador(df)
+    posicoes = indice.filtrar(ordenar_por="Estação")
+    codigos = df["Estação"].cat.codes.to_numpy()[posicoes]
+    presentes = codigos[codigos >= 0]
+    assert (np.diff(presentes) >= 0).all()
+    assert (codigos[len(presentes):] == -1).all()
+    # Estável: dentro da mesma estação, a ordem original das linhas
+    assert all((np.diff(posicoes[codigos == c]) > 0).all() for c in np.unique(codigos))
+
+
+def test_paginas_cobrem_o_resultado_sem_repetir(df):
+    indice = IndiceExplorador(df)
+    posicoes = indice.filtrar(ordenar_por=COLUNA_DATA, crescente=False, categorias=["Longe"])
+    paginas = [indice.pagina(posicoes, numero, por_pagina=300) for numero in range(1, len(posicoes) // 300 + 2)]
+    assert all(len(pagina) == 300 for pagina in paginas[:-1])
+    juntas = pd.concat(paginas)
+    pd.testing.assert_frame_equal(juntas, df.iloc[posicoes])
+    assert indice.pagina(posicoes, len(paginas) + 1, por_pagina=300).empty
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analise import cache_colunar, ingestao
+from analise.dados import COLUNA_DATA, METAIS, normalizar_colunas
+from analise.ingestao import CHAVES, agregar, combinar, reagrupar
+
+
+def _amostras(linhas, semente, estacoes=("E01", "E02", "E03", "E04")):
+    rng = np.random.default_rng(semente)
+    estacao = rng.choice(list(estacoes), linhas)
+    df = pd.DataFrame({
+        "Estação": estacao,
+        "Categoria": np.where(np.isin(estacao, ["E01", "E02"]), "Incidente", "Longe"),
+        COLUNA_DATA: pd.Timestamp("2020-01-01") + pd.to_timedelta(rng.integers(0, 900, linhas), unit="D"),
+        **{metal: rng.lognormal(-2 + i, 1.0, linhas) for i, metal in enumerate(METAIS)},
+    })
+    for metal in METAIS:
+        df.loc[rng.random(linhas) < 0.15, metal] = np.nan
+    return normalizar_colunas(df)
+
+
+def _ordenado(estatisticas):
+    return estatisticas.sort_values(CHAVES, ignore_index=True)[CHAVES + ["n", "Média", "M2", "Excedências"]]
+
+
+def test_combinar_equivale_a_agregar_tudo_de_uma_vez():
+    a, b = _amostras(700, 1), _amostras(300, 2, estacoes=("E03", "E04", "E05"))
+    combinado = combinar(agregar(a), agregar(b))
+    direto = agregar(pd.concat([a, b], ignore_index=True))
+    pd.testing.assert_frame_equal(_ordenado(combinado), _ordenado(direto), check_exact=False, rtol=1e-10)
+
+
+def test_reagrupar_igual_ao_groupby_das_amostras():
+    df = _amostras(2_000, 3)
+    por_categoria = reagrupar(agregar(df), ["Categoria"]).set_index(["Categoria", "Metal"])
+    for (categoria, metal), linha in por_categoria.iterrows():
+        valores = df.loc[df["Categoria"] == categoria, metal].dropna()
+        assert linha["n"] == len(valores)
+        assert linha["Média"] == pytest.approx(valores.mean(), rel=1e-12)
+        assert linha["M2"] / (linha["n"] - 1) == pytest.approx(valores.var(), rel=1e-10)
+
+
+@pytest.fixture
+def origem(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_colunar, "DIRETORIO_CACHE", tmp_path / "cache")
+    caminho = tmp_path / "base.xlsx"
+    _amostras(400, 4).to_excel(caminho, index=False)
+    (tmp_path / "novos").mkdir()
+    return caminho
+
+
+def test_ingestao_incremental_igual_ao_recalculo(origem):
+    entrada = origem.parent / "novos"
+    _amostras(150, 5).to_csv(entrada / "a.csv", index=False)
+    assert ingestao.ingerir(origem, entrada) == 150
+    primeiro_lote = ingestao.caminhos_lotes(origem)[0]
+    gravado_em = primeiro_lote.stat().st_mtime_ns
+
+    _amostras(80, 6, estacoes=("E02", "E09")).to_csv(entrada / "b.csv", index=False)
+    assert ingestao.ingerir(origem, entrada) == 80
+    # O lote anterior não é regravado: cada ingestão escreve só a partição nova
+    assert primeiro_lote.stat().st_mtime_ns == gravado_em
+
+    df = ingestao.ler_com_lotes(origem)
+    assert len(df) == 400 + 150 + 80
+    incremental = ingestao.carregar_estatisticas(origem).drop(columns="Variância")
+    recalculado = agregar(pd.concat([cache_colunar.ler(origem, normalizar_colunas), *ingestao.ler_lotes(origem)],
+                                    ignore_index=True))
+    pd.testing.assert_frame_equal(_ordenado(incremental), _ordenado(recalculado),
+                                  check_exact=False, rtol=1e-10, check_dtype=False)
+
+
+def test_lote_invalido_nao_altera_o_manifesto(origem):
+    entrada = origem.parent / "novos"
+    _amostras(50, 7).to_csv(entrada / "a.csv", index=False)
+    _amostras(50, 8).drop(columns=METAIS[0]).to_csv(entrada / "b.csv", index=False)
+    with pytest.raises(ValueError, match="b.csv"):
+        ingestao.ingerir(origem, entrada)
+    assert ingestao.caminhos_lotes(origem) == []
+    assert ingestao.ler_com_lotes(origem) is None
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+from scipy.stats import gaussian_kde
+
+from analise import kde as modulo_kde
+from analise.kde import kde_binada
+
+TOLERANCIA = 0.005  # 0,5% do pico, como documentado em analise/kde.py
+
+
+def _amostras():
+    rng = np.random.default_rng(0)
+    return {
+        "normal": rng.normal(size=20_000),
+        "cauchy": rng.standard_cauchy(20_000),
+        "lognormal com outlier": np.r_[rng.lognormal(size=19_999), 5000.0],
+    }
+
+
+def _erro_relativo(valores):
+    grade = np.linspace(valores.min(), valores.max(), 200)
+    exata = gaussian_kde(valores)(grade)
+    return np.abs(kde_binada(valores, grade) - exata).max() / exata.max()
+
+
+@pytest.mark.parametrize("nome", list(_amostras()))
+def test_kde_binada_dentro_da_tolerancia(nome):
+    assert _erro_relativo(_amostras()[nome]) < TOLERANCIA
+
+
+@pytest.mark.parametrize("nome", list(_amostras()))
+def test_soma_direta_quando_a_malha_passa_do_limite(nome, monkeypatch):
+    # Malha limitada: o intervalo das caudas passa para a soma direta dos núcleos
+    monkeypatch.setattr(modulo_kde, "MAX_PONTOS_BINNING", 4096)
+    assert _erro_relativo(_amostras()[nome]) < TOLERANCIA
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analise import particionado
+from analise.dados import COLUNA_DATA, METAIS, normalizar_colunas
+from analise.particionado import resumir, resumir_arquivos
+
+LINHAS = 5_000
+PARTICAO = 997  # não divide LINHAS: a última partição fica menor
+
+
+@pytest.fixture(scope="module")
+def amostras(tmp_path_factory):
+    """Mesmas linhas em memória e num Feather lido em partições (tipos idênticos)."""
+    rng = np.random.default_rng(1)
+    estacoes = np.array([f"E{i:02d}" for i in range(12)])
+    estacao = rng.choice(estacoes, LINHAS)
+    categoria = np.array(["Incidente", "Medio", "Longe"])[np.searchsorted(estacoes, estacao) % 3]
+    df = pd.DataFrame({
+        "Estação": estacao,
+        "Categoria": categoria,
+        COLUNA_DATA: pd.Timestamp("2015-01-01") + pd.to_timedelta(rng.integers(0, 3000, LINHAS), unit="D"),
+        **{metal: rng.lognormal(-3 + i, 1.2, LINHAS) for i, metal in enumerate(METAIS)},
+    })
+    for metal in METAIS:
+        df.loc[rng.random(LINHAS) < 0.1, metal] = np.nan
+    df.loc[rng.random(LINHAS) < 0.01, "Categoria"] = None
+    df = normalizar_colunas(df)
+
+    caminho = tmp_path_factory.mktemp("dados") / "amostras.feather"
+    df.to_feather(caminho)
+    return df, caminho
+
+
+@pytest.mark.parametrize("nivel", ["Geral", "Categoria", "Estação"])
+def test_intervalos_iguais_em_memoria_e_particionado(amostras, nivel):
+    df, caminho = amostras
+    em_memoria = resumir(df).intervalos(nivel)
+    partes = resumir_arquivos([caminho], PARTICAO).intervalos(nivel)
+    pd.testing.assert_frame_equal(partes, em_memoria, check_exact=False, rtol=1e-8, atol=0)
+
+
+def test_descricao_e_histogramas_iguais(amostras):
+    df, caminho = amostras
+    em_memoria, partes = resumir(df), resumir_arquivos([caminho], PARTICAO)
+    assert partes.exato and partes.linhas == em_memoria.linhas == LINHAS
+    pd.testing.assert_frame_equal(partes.descrever(), em_memoria.descrever())
+    pd.testing.assert_series_equal(partes.ausentes, em_memoria.ausentes)
+    for metal in METAIS:
+        arestas = np.linspace(em_memoria.minimos[metal], em_memoria.maximos[metal], 31)
+        np.testing.assert_array_equal(partes.histograma(metal, arestas), em_memoria.histograma(metal, arestas))
+
+
+def test_quantis_aproximados_sem_valores_exatos(amostras, monkeypatch):
+    # Acima de LIMITE_EXATO os quartis saem do histograma em faixas logarítmicas
+    df, caminho = amostras
+    monkeypatch.setattr(particionado, "LIMITE_EXATO", PARTICAO)
+    partes = resumir_arquivos([caminho], PARTICAO)
+    assert not partes.exato
+    aproximada, exata = partes.descrever()[METAIS], resumir(df).descrever()[METAIS]
+    np.testing.assert_allclose(aproximada.loc[["count", "mean", "std", "min", "max"]],
+                               exata.loc[["count", "mean", "std", "min", "max"]], rtol=1e-8)
+    np.testing.assert_allclose(aproximada.loc[["25%", "50%", "75%"]], exata.loc[["25%", "50%", "75%"]], rtol=0.01)
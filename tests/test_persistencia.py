@@ -0,0 +1,69 @@
+import itertools
+import os
+
+import pytest
+
+from analise import persistencia
+from analise.persistencia import ResultadosPersistentes, versao_codigo
+
+LIMITE = 10_000
+
+
+@pytest.fixture
+def armazenamento(tmp_path, monkeypatch):
+    # Relógio que sempre avança e último acesso atualizado a cada leitura
+    relogio = itertools.count(1_000)
+    monkeypatch.setattr(persistencia.time, "time", lambda: float(next(relogio)))
+    monkeypatch.setattr(persistencia, "INTERVALO_ACESSO_S", 0)
+    return ResultadosPersistentes(tmp_path / "resultados.sqlite3", limite_bytes=LIMITE)
+
+
+def _valor(i):
+    return bytes([i]) * 2_000
+
+
+def test_descarta_os_lidos_ha_mais_tempo(armazenamento):
+    for nome in "abcd":
+        assert armazenamento.gravar(nome, 1, _valor(ord(nome)))
+    # "a" lido por último entre os antigos: o descartado é "b"
+    assert armazenamento.ler("a", 1) == (True, _valor(ord("a")))
+    assert armazenamento.gravar("e", 1, _valor(ord("e")))
+
+    assert armazenamento.ler("b", 1) == (False, None)
+    for nome in "acde":
+        assert armazenamento.ler(nome, 1)[0]
+    assert armazenamento.contadores["descartados"] == 1
+    assert sum(tamanho for _, _, tamanho in armazenamento.resumo()) <= LIMITE
+
+
+def test_resultado_grande_nao_e_gravado(armazenamento):
+    assert not armazenamento.gravar("grande", 1, b"x" * int(LIMITE * persistencia.FRACAO_MAXIMA_ITEM))
+    assert armazenamento.contadores["grandes"] == 1
+    assert armazenamento.ler("grande", 1) == (False, None)
+
+
+def test_chaves_diferentes_nao_se_misturam(armazenamento):
+    armazenamento.gravar("cubo", "versao 1", "antigo")
+    armazenamento.gravar("cubo", "versao 2", "novo")
+    assert armazenamento.ler("cubo", "versao 1") == (True, "antigo")
+    assert armazenamento.ler("cubo", "versao 2") == (True, "novo")
+    assert armazenamento.ler("figuras", "versao 1") == (False, None)
+
+
+def test_versao_do_codigo_muda_com_as_tabelas(tmp_path):
+    (tmp_path / "analise").mkdir()
+    (tmp_path / "analise" / "cubo.py").write_text("ALPHA = 0.05\n")
+    limites = tmp_path / "limites.csv"
+    limites.write_text("Norma,Metal,Limite\nCONAMA,Arsênio total,0.01\n")
+    antes = versao_codigo(tmp_path)
+    assert versao_codigo(tmp_path) == antes
+
+    # Mesmo tamanho, outro conteúdo: a data de modificação decide reler o arquivo
+    limites.write_text("Norma,Metal,Limite\nCONAMA,Arsênio total,0.02\n")
+    estado = limites.stat()
+    os.utime(limites, ns=(estado.st_atime_ns, estado.st_mtime_ns + 1_000_000))
+    depois = versao_codigo(tmp_path)
+    assert depois != antes
+
+    (tmp_path / "analise" / "novo.py").write_text("")
+    assert versao_codigo(tmp_path) != depois
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analise.reducao import lttb, min_max, numerico
+
+
+def _serie(n, semente=0):
+    rng = np.random.default_rng(semente)
+    return np.arange(n, dtype=float), np.cumsum(rng.normal(size=n))
+
+
+@pytest.mark.parametrize("n, n_saida", [(10_000, 500), (1_001, 1_000), (50, 3)])
+def test_lttb_mantem_as_pontas_e_um_ponto_por_balde(n, n_saida):
+    x, y = _serie(n)
+    indices = lttb(x, y, n_saida)
+    assert len(indices) == n_saida
+    assert indices[0] == 0 and indices[-1] == n - 1
+    assert (np.diff(indices) > 0).all()
+    # Um ponto escolhido em cada balde do meio
+    arestas = np.linspace(1, n - 1, n_saida - 1).astype(np.int64)
+    np.testing.assert_array_equal(np.searchsorted(arestas, indices[1:-1], side="right") - 1, np.arange(n_saida - 2))
+
+
+def test_lttb_preserva_picos_isolados():
+    n, n_saida = 20_000, 400
+    y = np.zeros(n)
+    rng = np.random.default_rng(1)
+    # No máximo um pico por balde, longe das bordas
+    arestas = np.linspace(1, n - 1, n_saida - 1).astype(np.int64)
+    baldes = rng.choice(n_saida - 2, 30, replace=False)
+    picos = (arestas[baldes] + arestas[baldes + 1]) // 2
+    y[picos] = rng.choice([-1, 1], len(picos)) * rng.uniform(5, 10, len(picos))
+    assert set(picos) <= set(lttb(np.arange(n), y, n_saida))
+
+
+def test_lttb_sem_reducao_quando_cabe():
+    x, y = _serie(100)
+    np.testing.assert_array_equal(lttb(x, y, 100), np.arange(100))
+    np.testing.assert_array_equal(lttb(x, y, 2), np.arange(100))
+
+
+def test_lttb_aceita_datas():
+    datas = pd.date_range("2020-01-01", periods=5_000, freq="h").to_numpy()
+    _, y = _serie(5_000, semente=2)
+    np.testing.assert_array_equal(lttb(datas, y, 300), lttb(numerico(datas), y, 300))
+
+
+def test_min_max_guarda_extremos_de_cada_intervalo():
+    rng = np.random.default_rng(3)
+    n, n_baldes = 30_000, 200
+    x = np.sort(rng.uniform(0, 1_000, n))
+    y = rng.normal(size=n)
+    indices = min_max(x, y, n_baldes)
+    assert (np.diff(x[indices]) >= 0).all()
+    assert len(indices) <= 2 * n_baldes
+
+    balde = np.minimum(((x - x.min()) / (x.max() - x.min()) * n_baldes).astype(int), n_baldes - 1)
+    por_balde = pd.Series(y).groupby(balde)
+    escolhidos = set(indices)
+    assert set(por_balde.idxmin()) <= escolhidos
+    assert set(por_balde.idxmax()) <= escolhidos